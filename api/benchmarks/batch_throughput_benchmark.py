@@ -0,0 +1,93 @@
+"""여러 채용공고를 한 건씩 순차 제출할 때와 /create-cover-letters/batch로 한 번에 제출할 때의 전체 처리량을 비교합니다.
+
+실행 중인 웹 서버와 워커(docker compose up)가 필요합니다. 결과 캐시는 force_regenerate로 건너뛰지만,
+같은 URL의 1~3단계 공유 결과(singleflight)는 보관 기간 동안 재사용되므로 모드마다 다른 URL 목록을 쓰거나
+모드 사이에 Redis를 비우고 실행하세요.
+
+실행 예:
+    python -m api.benchmarks.batch_throughput_benchmark --urls-file urls.txt --mode sequential
+    python -m api.benchmarks.batch_throughput_benchmark --urls-file urls.txt --mode batch --user-story "..."
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from api.benchmarks.bench_utils import print_table
+
+READY_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+def _wait_until_ready(base_url: str, task_id: str, poll_interval: float, timeout: float) -> str:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = requests.get(f"{base_url}/tasks/{task_id}", timeout=10).json()["status"]
+        if status in READY_STATES:
+            return status
+        time.sleep(poll_interval)
+    return "TIMEOUT"
+
+
+def run_sequential(base_url: str, urls: List[str], user_story: Optional[str], poll_interval: float,
+                   timeout: float) -> Dict[str, object]:
+    """변경 전 사용 방식: URL마다 /create-cover-letter를 호출하고 끝날 때까지 기다린 뒤 다음 URL 제출."""
+    started = time.perf_counter()
+    statuses = []
+    for url in urls:
+        response = requests.post(f"{base_url}/create-cover-letter", timeout=30,
+                                 json={"job_url": url, "user_story": user_story, "force_regenerate": True})
+        response.raise_for_status()
+        statuses.append(_wait_until_ready(base_url, response.json()["task_id"], poll_interval, timeout))
+    return _summarize("sequential", statuses, time.perf_counter() - started)
+
+
+def run_batch(base_url: str, urls: List[str], user_story: Optional[str], poll_interval: float,
+              timeout: float) -> Dict[str, object]:
+    started = time.perf_counter()
+    response = requests.post(f"{base_url}/create-cover-letters/batch", timeout=60,
+                             json={"job_urls": urls, "user_story": user_story, "force_regenerate": True})
+    response.raise_for_status()
+    batch_id = response.json()["batch_id"]
+    _wait_until_ready(base_url, batch_id, poll_interval, timeout * len(urls))
+    items = requests.get(f"{base_url}/batches/{batch_id}", timeout=30).json()["items"]
+    return _summarize("batch", [item["status"] for item in items], time.perf_counter() - started)
+
+
+def _summarize(mode: str, statuses: List[str], wall_seconds: float) -> Dict[str, object]:
+    return {
+        "mode": mode,
+        "items": len(statuses),
+        "succeeded": statuses.count("SUCCESS"),
+        "failed": len(statuses) - statuses.count("SUCCESS"),
+        "wall_seconds": wall_seconds,
+        "items_per_minute": len(statuses) * 60 / wall_seconds if wall_seconds else 0.0,
+    }
+
+
+MODES = {"sequential": run_sequential, "batch": run_batch}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls-file", type=Path, required=True, help="한 줄에 채용공고 URL 하나")
+    parser.add_argument("--mode", choices=sorted(MODES), nargs="+", default=["sequential", "batch"])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user-story", default=None)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=600, help="항목 하나당 최대 대기 시간 (초)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    urls = [line.strip() for line in args.urls_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+    rows = [MODES[mode](args.base_url, urls, args.user_story, args.poll_interval, args.timeout) for mode in args.mode]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+JOB_POSTINGS_DIR = FIXTURES_DIR / "job_postings"
+
+# 벤치마크에서 검색 품질을 비교할 때 쓰는 질의 (실제 4단계 기본 프롬프트 포함)
+BENCHMARK_QUERIES = [
+    "주요 업무와 담당 역할",
+    "자격 요건과 필요한 기술 스택",
+    "우대 사항",
+    "회사가 자주 마주할 만한 문제가 뭔지 제시하고, 저의 역량으로 어떻게 해결할 수 있는지 써주세요.",
+]
+
+
+class HashingEmbeddings(Embeddings):
+    """외부 API 없이 동작하는 결정적 임베딩 (문자 2-gram 해싱). 벤치마크/로컬 테스트용 스텁입니다."""
+
+    def __init__(self, dim: int = 384, latency_seconds: float = 0.0):
+        self.dim = dim
+        self.latency_seconds = latency_seconds
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        compact = re.sub(r"\s+", " ", text)
+        for i in range(len(compact) - 1):
+            bucket = int.from_bytes(hashlib.md5(compact[i:i + 2].encode("utf-8")).digest()[:4], "little") % self.dim
+            vector[bucket] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._embed(text)
+
+
+class CountingEmbeddings(Embeddings):
+    """감싼 임베딩의 호출 수와 임베딩된 텍스트 수를 셉니다."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.calls = 0
+        self.texts = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        self.texts += 1
+        return self.embeddings.embed_query(text)
+
+
+def build_embeddings(backend: str) -> Embeddings:
+    """'stub' 이면 HashingEmbeddings, 'cohere' 이면 실제 Cohere 임베딩을 반환합니다."""
+    if backend == "cohere":
+        from langchain_cohere import CohereEmbeddings
+        from api.generate_cover_letter_semantic import EMBEDDING_MODEL
+        return CohereEmbeddings(model=EMBEDDING_MODEL, cohere_api_key=os.environ["COHERE_API_KEY"], user_agent="langchain")
+    return HashingEmbeddings()
+
+
+def load_job_postings(directory: Path = JOB_POSTINGS_DIR) -> Dict[str, str]:
+    """픽스처 디렉토리의 채용공고 텍스트를 {파일명: 내용}으로 읽습니다."""
+    return {path.stem: path.read_text(encoding="utf-8") for path in sorted(Path(directory).glob("*.txt"))}
+
+
+def token_jaccard(a: str, b: str) -> float:
+    """두 텍스트의 공백 단위 토큰 집합 자카드 유사도."""
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    if not tokens_a and not tokens_b:
+        return 1.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def print_table(rows: Sequence[Dict[str, object]]) -> None:
+    """dict 목록을 고정폭 표로 출력합니다."""
+    if not rows:
+        print("(no results)")
+        return
+    columns = list(rows[0].keys())
+    cells = [[f"{row[c]:.4f}" if isinstance(row[c], float) else str(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
@@ -0,0 +1,87 @@
+"""청킹 전략별 임베딩 호출 수, 소요 시간, 검색 결과 겹침 정도를 픽스처 채용공고로 비교합니다.
+
+검색 개수(k)가 청크 수에 가까우면 어느 전략이든 문서 대부분을 돌려주므로 겹침 값이 전략을 구분하지 못합니다.
+retrieved_fraction(검색된 청크 비율)이 낮은 행, 즉 긴 공고에서의 context_overlap_vs_semantic을 비교하세요.
+
+실행 예:
+    python -m api.benchmarks.chunking_benchmark                  # 스텁 임베딩 (API 호출 없음)
+    python -m api.benchmarks.chunking_benchmark --backend cohere # 실제 Cohere 임베딩 (COHERE_API_KEY 필요)
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_community.vectorstores import FAISS
+
+from api.benchmarks.bench_utils import (BENCHMARK_QUERIES, JOB_POSTINGS_DIR, CountingEmbeddings, build_embeddings,
+                                        load_job_postings, print_table, token_jaccard)
+from api.generate_cover_letter_semantic import CHUNKING_STRATEGIES, SemanticChunkingStrategy, get_chunking_strategy
+
+# 청크 수보다 충분히 작게 두어야 전략 간 검색 결과 차이가 드러남 (RetrievalQA 기본값 4는 짧은 공고 전체를 덮음)
+RETRIEVAL_K = 2
+
+
+def run_strategy(name: str, text: str, backend: str, k: int = RETRIEVAL_K) -> Dict[str, object]:
+    """한 전략으로 청킹 + 인덱싱 + 질의 검색을 수행하고 측정값과 검색된 컨텍스트를 반환합니다."""
+    embeddings = CountingEmbeddings(build_embeddings(backend))
+    strategy = get_chunking_strategy(name)
+
+    started = time.perf_counter()
+    docs = strategy.split(text, embeddings)
+    chunk_seconds = time.perf_counter() - started
+    chunk_embed_calls, chunk_embed_texts = embeddings.calls, embeddings.texts
+
+    vectorstore = FAISS.from_documents(docs, embeddings)
+    index_seconds = time.perf_counter() - started - chunk_seconds
+
+    retriever = vectorstore.as_retriever(search_kwargs={"k": k})
+    contexts = ["\n".join(d.page_content for d in retriever.invoke(q)) for q in BENCHMARK_QUERIES]
+    total_seconds = time.perf_counter() - started
+
+    return {
+        "chunks": len(docs),
+        "retrieved_fraction": min(k, len(docs)) / len(docs) if docs else 0.0,
+        "chunk_embed_calls": chunk_embed_calls,
+        "chunk_embed_texts": chunk_embed_texts,
+        "total_embed_calls": embeddings.calls,
+        "total_embed_texts": embeddings.texts,
+        "chunk_seconds": chunk_seconds,
+        "index_seconds": index_seconds,
+        "total_seconds": total_seconds,
+        "contexts": contexts,
+    }
+
+
+def run_benchmark(backend: str, fixtures_dir: Path, k: int = RETRIEVAL_K) -> List[Dict[str, object]]:
+    rows = []
+    for posting_name, text in load_job_postings(fixtures_dir).items():
+        results = {name: run_strategy(name, text, backend, k) for name in CHUNKING_STRATEGIES}
+        reference = results[SemanticChunkingStrategy.name]["contexts"]
+        for name, result in results.items():
+            # 기준(semantic) 전략이 검색한 컨텍스트와의 질의별 토큰 자카드 유사도 평균
+            overlap = sum(token_jaccard(a, b) for a, b in zip(result["contexts"], reference)) / len(reference)
+            row = {"posting": posting_name, "strategy": name, "context_overlap_vs_semantic": overlap}
+            row.update({k: v for k, v in result.items() if k != "contexts"})
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark step-4 chunking strategies on fixture job postings.")
+    parser.add_argument("--backend", choices=["stub", "cohere"], default="stub")
+    parser.add_argument("--fixtures", type=Path, default=JOB_POSTINGS_DIR)
+    parser.add_argument("--k", type=int, default=RETRIEVAL_K, help="질의당 검색할 청크 수")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.backend, args.fixtures, args.k)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
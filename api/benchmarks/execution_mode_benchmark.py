@@ -0,0 +1,80 @@
+"""Celery 모드(Redis + 워커)와 로컬 모드(EXECUTION_MODE=local, 단일 프로세스)의 요청당 종단 간 지연 시간을 비교합니다.
+
+모드마다 웹 서버를 따로 띄우고 --target 이름=URL로 지정합니다. 예:
+    docker compose up                                              # celery 모드, :8000
+    EXECUTION_MODE=local uvicorn api.main:app --port 8001          # 로컬 모드 (fakeredis[lua] 필요)
+
+같은 URL을 순서대로 한 건씩 제출하고 /create-cover-letter 호출부터 SUCCESS 상태 관찰까지의 시간을 잽니다.
+결과 캐시는 force_regenerate로 건너뛰지만 celery 모드는 같은 URL의 1~3단계 공유 결과(singleflight)를 보관 기간 동안
+재사용하므로 --urls-file에 서로 다른 URL을 충분히 넣거나 실행 전에 Redis를 비우세요.
+
+실행 예:
+    python -m api.benchmarks.execution_mode_benchmark --urls-file urls.txt \\
+        --target celery=http://localhost:8000 --target local=http://localhost:8001
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from api.benchmarks.bench_utils import print_table
+
+READY_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+def _run_one(base_url: str, url: str, user_story: Optional[str], poll_interval: float,
+             timeout: float) -> Tuple[str, float]:
+    started = time.perf_counter()
+    response = requests.post(f"{base_url}/create-cover-letter", timeout=30,
+                             json={"job_url": url, "user_story": user_story, "force_regenerate": True})
+    response.raise_for_status()
+    task_id = response.json()["task_id"]
+    while time.perf_counter() - started < timeout:
+        status = requests.get(f"{base_url}/tasks/{task_id}", timeout=10).json()["status"]
+        if status in READY_STATES:
+            return status, time.perf_counter() - started
+        time.sleep(poll_interval)
+    return "TIMEOUT", time.perf_counter() - started
+
+
+def run_target(name: str, base_url: str, urls: List[str], user_story: Optional[str], poll_interval: float,
+               timeout: float) -> Dict[str, object]:
+    results = [_run_one(base_url, url, user_story, poll_interval, timeout) for url in urls]
+    latencies = sorted(seconds for status, seconds in results if status == "SUCCESS")
+    return {
+        "target": name,
+        "requests": len(results),
+        "succeeded": len(latencies),
+        "mean_seconds": statistics.mean(latencies) if latencies else 0.0,
+        "p50_seconds": latencies[len(latencies) // 2] if latencies else 0.0,
+        "p95_seconds": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls-file", type=Path, required=True, help="한 줄에 채용공고 URL 하나")
+    parser.add_argument("--target", action="append", required=True, metavar="NAME=BASE_URL",
+                        help="비교할 서버 (여러 번 지정)")
+    parser.add_argument("--user-story", default=None)
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="상태 조회 간격 (초, 측정 해상도)")
+    parser.add_argument("--timeout", type=float, default=600, help="요청 하나당 최대 대기 시간 (초)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    urls = [line.strip() for line in args.urls_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+    targets = [target.split("=", 1) for target in args.target]
+    rows = [run_target(name, base_url.rstrip("/"), urls, args.user_story, args.poll_interval, args.timeout)
+            for name, base_url in targets]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""동시에 진행 중인 LLM 대기 작업 1개당 메모리를 프로세스-작업당(prefork) 모델과 이벤트 루프 모델로 비교합니다.
+
+LLM 호출은 지정한 지연 동안 소켓을 기다리는 가짜 호출로 대체합니다.
+    - prefork: 작업마다 fork된 프로세스가 블로킹 대기 (현재 워커 구성)
+    - async:   한 프로세스의 threads 풀 스레드들이 공용 이벤트 루프(run_coroutine)에 대기를 맡김
+
+메모리는 가능하면 PSS(공유 페이지를 프로세스 수로 나눈 값, /proc/<pid>/smaps_rollup), 없으면 RSS로 측정합니다.
+
+실행 예:
+    python -m api.benchmarks.llm_concurrency_benchmark --tasks 8 32 64 --latency 3
+    python -m api.benchmarks.llm_concurrency_benchmark --import-pipeline   # 워커와 같은 모듈을 미리 import
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+from typing import Dict, List
+
+from api.benchmarks.bench_utils import print_table
+
+
+def _memory_kb(pid: int) -> int:
+    for path, field in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+async def _fake_llm_call(latency: float) -> str:
+    await asyncio.sleep(latency)
+    return "x" * 4000 # 자기소개서 크기의 응답
+
+
+def _blocking_task(latency: float, ready: multiprocessing.Event) -> None:
+    ready.set()
+    time.sleep(latency)
+    _response = "x" * 4000
+
+
+def measure_prefork(tasks: int, latency: float) -> Dict[str, float]:
+    ctx = multiprocessing.get_context("fork")
+    baseline = _memory_kb(os.getpid())
+    events = [ctx.Event() for _ in range(tasks)]
+    procs = [ctx.Process(target=_blocking_task, args=(latency, e)) for e in events]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    for e in events:
+        e.wait()
+    in_flight = sum(_memory_kb(p.pid) for p in procs)
+    for p in procs:
+        p.join()
+    return {"total_kb": baseline + in_flight, "per_task_kb": in_flight / tasks, "wall_seconds": time.perf_counter() - started}
+
+
+def measure_async(tasks: int, latency: float) -> Dict[str, float]:
+    from api.utils.async_runtime import get_event_loop, run_coroutine
+    get_event_loop()
+    baseline = _memory_kb(os.getpid())
+    barrier = threading.Barrier(tasks + 1)
+
+    def worker():
+        barrier.wait()
+        run_coroutine(_fake_llm_call(latency))
+
+    threads = [threading.Thread(target=worker) for _ in range(tasks)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    barrier.wait()
+    time.sleep(min(0.5, latency / 2)) # 모든 코루틴이 대기 상태에 들어간 뒤 측정
+    in_flight = _memory_kb(os.getpid()) - baseline
+    for t in threads:
+        t.join()
+    return {"total_kb": baseline + in_flight, "per_task_kb": in_flight / tasks, "wall_seconds": time.perf_counter() - started}
+
+
+def run_benchmark(task_counts: List[int], latency: float) -> List[Dict[str, object]]:
+    rows = []
+    for tasks in task_counts:
+        for model, measure in (("prefork", measure_prefork), ("async", measure_async)):
+            row = {"model": model, "in_flight_tasks": tasks}
+            row.update(measure(tasks, latency))
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory per in-flight LLM task: process-per-task vs event loop.")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--latency", type=float, default=2.0, help="가짜 LLM 호출 지연(초)")
+    parser.add_argument("--import-pipeline", action="store_true", help="측정 전 파이프라인 작업 모듈을 import (실제 워커 메모리 재현)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    if args.import_pipeline:
+        import api.celery_tasks # noqa: F401
+
+    rows = run_benchmark(args.tasks, args.latency)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
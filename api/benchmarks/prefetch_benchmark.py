@@ -0,0 +1,100 @@
+"""URL 입력 시점의 선행 처리(/prefetch) 유무에 따라 사용자가 제출 후 기다리는 시간을 비교합니다.
+
+cold: 사용자 스토리 작성 시간(--think-seconds)만큼 기다린 뒤 /create-cover-letter 제출
+prefetch: /prefetch 호출 후 같은 시간을 기다렸다가 제출 (UI가 URL 입력 직후 호출하는 것과 같음)
+두 모드 모두 제출부터 SUCCESS 관찰까지를 잽니다. 서버 /metrics의 prefetch_lookups_total(적중률)과
+prefetch_time_saved_seconds(절약 시간) 증가분도 함께 출력합니다.
+
+실행 중인 웹 서버와 워커(docker compose up)가 필요합니다. 같은 URL의 1~3단계 공유 결과는 보관 기간 동안
+재사용되므로 모드마다 다른 URL 목록을 쓰거나 모드 사이에 Redis를 비우고 실행하세요.
+
+실행 예:
+    python -m api.benchmarks.prefetch_benchmark --urls-file urls_a.txt --mode cold --think-seconds 30
+    python -m api.benchmarks.prefetch_benchmark --urls-file urls_b.txt --mode prefetch --think-seconds 30
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from api.benchmarks.bench_utils import print_table
+
+READY_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+def _metrics(base_url: str) -> Dict[str, float]:
+    return requests.get(f"{base_url}/metrics", timeout=10).json()["metrics"]
+
+
+def _submit_and_wait(base_url: str, url: str, user_story: Optional[str], poll_interval: float,
+                     timeout: float) -> Optional[float]:
+    started = time.perf_counter()
+    response = requests.post(f"{base_url}/create-cover-letter", timeout=30,
+                             json={"job_url": url, "user_story": user_story, "force_regenerate": True})
+    response.raise_for_status()
+    task_id = response.json()["task_id"]
+    while time.perf_counter() - started < timeout:
+        status = requests.get(f"{base_url}/tasks/{task_id}", timeout=10).json()["status"]
+        if status in READY_STATES:
+            return time.perf_counter() - started if status == "SUCCESS" else None
+        time.sleep(poll_interval)
+    return None
+
+
+def run_mode(mode: str, base_url: str, urls: List[str], user_story: Optional[str], think_seconds: float,
+             poll_interval: float, timeout: float) -> Dict[str, object]:
+    before = _metrics(base_url)
+    latencies = []
+    for url in urls:
+        if mode == "prefetch":
+            requests.post(f"{base_url}/prefetch", json={"job_url": url}, timeout=30).raise_for_status()
+        time.sleep(think_seconds)
+        latency = _submit_and_wait(base_url, url, user_story, poll_interval, timeout)
+        if latency is not None:
+            latencies.append(latency)
+    after = _metrics(base_url)
+
+    def delta(field: str) -> float:
+        return after.get(field, 0.0) - before.get(field, 0.0)
+
+    hits = delta("prefetch_lookups_total{result=ready}") + delta("prefetch_lookups_total{result=in_flight}")
+    lookups = hits + delta("prefetch_lookups_total{result=miss}")
+    saved = delta("prefetch_time_saved_seconds_sum{result=ready}") + delta("prefetch_time_saved_seconds_sum{result=in_flight}")
+    return {
+        "mode": mode,
+        "requests": len(urls),
+        "succeeded": len(latencies),
+        "mean_wait_seconds": statistics.mean(latencies) if latencies else 0.0,
+        "p50_wait_seconds": statistics.median(latencies) if latencies else 0.0,
+        "prefetch_hit_rate": hits / lookups if lookups else 0.0,
+        "mean_saved_seconds": saved / hits if hits else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls-file", type=Path, required=True, help="한 줄에 채용공고 URL 하나")
+    parser.add_argument("--mode", choices=["cold", "prefetch"], nargs="+", default=["cold", "prefetch"])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user-story", default=None)
+    parser.add_argument("--think-seconds", type=float, default=20, help="URL 입력 후 제출까지 걸리는 시간 (초)")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=600, help="요청 하나당 최대 대기 시간 (초)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    urls = [line.strip() for line in args.urls_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+    rows = [run_mode(mode, args.base_url, urls, args.user_story, args.think_seconds, args.poll_interval, args.timeout)
+            for mode in args.mode]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""파이프라인 한 번당 진행 상태 기록 횟수와 Redis 명령 수를 ProgressReporter 적용 전후로 비교합니다.
+
+각 단계의 진행 보고 시점(초)을 재생하면서 실제 ProgressReporter에 기록 함수만 세는 함수로 바꿔 끼웁니다.
+
+실행 예:
+    python -m api.benchmarks.progress_benchmark
+    python -m api.benchmarks.progress_benchmark --min-interval 0.5 --speed 0.1
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Dict, List
+
+from celery import states
+
+from api.benchmarks.bench_utils import print_table
+from api.utils.progress_reporter import ProgressReporter
+
+# 단계별 진행 보고 시점 (단계 시작 기준 초, 로컬 실행 로그의 대표값). 마지막 보고는 final=True로 즉시 기록됨
+STEP_TIMELINES: Dict[str, List[float]] = {
+    "step_1_extract_html": [0.0, 0.01, 0.3, 1.0, 2.5, 4.0, 4.05, 4.1],
+    "step_2_extract_text": [0.0, 0.02, 0.05, 0.1, 0.15, 0.2],
+    "step_3_filter_content": [0.0, 0.01, 0.02, 3.5, 3.6],
+    "step_4_generate_cover_letter": [0.0, 0.5, 8.0, 8.05],
+}
+
+# 변경 전: 보고마다 AsyncResult GET + 루트 store_result(SET, PUBLISH) + 하위 작업 update_state(SET, PUBLISH)
+COMMANDS_PER_REPORT_BEFORE = 5
+# 변경 후: 기록마다 루트 해시 MULTI/HSET/EXPIRE/EXEC (왕복 1회) + 하위 작업 update_state(SET, PUBLISH)
+COMMANDS_PER_WRITE_AFTER = 6
+ROUND_TRIPS_PER_REPORT_BEFORE = 3
+ROUND_TRIPS_PER_WRITE_AFTER = 2
+
+
+def _replay(timeline: List[float], min_interval: float, speed: float) -> Dict[str, int]:
+    counts = {"root": 0, "task": 0}
+    lock = threading.Lock()
+
+    def _count(kind):
+        def _writer(*_args):
+            with lock:
+                counts[kind] += 1
+        return _writer
+
+    reporter = ProgressReporter(None, "benchmark-root", min_interval=min_interval,
+                                root_writer=_count("root"), task_writer=_count("task"),
+                                cancel_checker=lambda _root_task_id: False)
+    reporter.task_id = "benchmark-task"
+    started = time.monotonic()
+    for i, offset in enumerate(timeline):
+        delay = offset * speed - (time.monotonic() - started)
+        if delay > 0:
+            time.sleep(delay)
+        reporter.report(states.STARTED, {"percentage": i}, task_meta={"percentage": i},
+                        final=(i == len(timeline) - 1))
+    return {"reports": len(timeline), "writes": counts["root"]}
+
+
+def run(min_interval: float, speed: float) -> List[Dict[str, object]]:
+    rows = []
+    for step, timeline in STEP_TIMELINES.items():
+        # 재생 속도를 줄이면 간격 제한도 같은 비율로 줄여 결과가 실제 시간 기준과 같도록 함
+        counts = _replay(timeline, min_interval * speed, speed)
+        rows.append({"step": step, **counts})
+    total_reports = sum(r["reports"] for r in rows)
+    total_writes = sum(r["writes"] for r in rows)
+    rows.append({"step": "pipeline_total", "reports": total_reports, "writes": total_writes})
+    for row in rows:
+        row["redis_cmds_before"] = row["reports"] * COMMANDS_PER_REPORT_BEFORE
+        row["redis_cmds_after"] = row["writes"] * COMMANDS_PER_WRITE_AFTER
+        row["round_trips_before"] = row["reports"] * ROUND_TRIPS_PER_REPORT_BEFORE
+        row["round_trips_after"] = row["writes"] * ROUND_TRIPS_PER_WRITE_AFTER
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-interval", type=float, default=1.0, help="PROGRESS_MIN_INTERVAL_SECONDS")
+    parser.add_argument("--speed", type=float, default=0.1, help="재생 시간 배율 (1.0 = 실제 시간)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    rows = run(args.min_interval, args.speed)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""NumpyRetriever와 FAISS 검색기의 (인덱스 생성 + 질의) 지연 시간과 메모리를 코퍼스 크기별로 비교합니다.
+
+실행 예:
+    python -m api.benchmarks.retriever_benchmark
+    python -m api.benchmarks.retriever_benchmark --sizes 5 30 300 3000 --dim 1024 --repeats 50
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from api.benchmarks.bench_utils import BENCHMARK_QUERIES, HashingEmbeddings, print_table
+from api.utils.retrievers import DEFAULT_RETRIEVAL_K, NumpyRetriever
+
+
+def _build_numpy(docs: List[Document], vectors: np.ndarray, embeddings):
+    return NumpyRetriever.from_vectors(docs, vectors, embeddings, k=DEFAULT_RETRIEVAL_K)
+
+
+def _build_faiss(docs: List[Document], vectors: np.ndarray, embeddings):
+    vectorstore = FAISS.from_embeddings(
+        text_embeddings=list(zip([d.page_content for d in docs], vectors)),
+        embedding=embeddings,
+        metadatas=[d.metadata for d in docs]
+    )
+    return vectorstore.as_retriever(search_kwargs={"k": DEFAULT_RETRIEVAL_K})
+
+
+BUILDERS: Dict[str, Callable] = {"numpy": _build_numpy, "faiss": _build_faiss}
+
+
+def _measure(builder: Callable, docs: List[Document], vectors: np.ndarray, embeddings, repeats: int) -> Dict[str, float]:
+    build_times, query_times = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        retriever = builder(docs, vectors, embeddings)
+        build_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for query in BENCHMARK_QUERIES:
+            retriever.invoke(query)
+        query_times.append((time.perf_counter() - started) / len(BENCHMARK_QUERIES))
+
+    # 메모리는 파이썬 할당 기준 (FAISS 내부 C++ 버퍼는 tracemalloc에 잡히지 않아 벡터 바이트 수를 함께 표시)
+    tracemalloc.start()
+    retriever = builder(docs, vectors, embeddings)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retriever
+
+    return {
+        "build_ms_p50": statistics.median(build_times) * 1000,
+        "query_ms_p50": statistics.median(query_times) * 1000,
+        "build_plus_query_ms": (statistics.median(build_times) + statistics.median(query_times)) * 1000,
+        "py_alloc_peak_kb": peak_bytes / 1024,
+    }
+
+
+def run_benchmark(sizes: List[int], dim: int, repeats: int) -> List[Dict[str, object]]:
+    rng = np.random.default_rng(0)
+    embeddings = HashingEmbeddings(dim=dim)
+    rows = []
+    for size in sizes:
+        vectors = rng.standard_normal((size, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        docs = [Document(page_content=f"chunk {i}", metadata={"i": i}) for i in range(size)]
+        for name, builder in BUILDERS.items():
+            row = {"retriever": name, "docs": size, "vector_kb": vectors.nbytes / 1024}
+            row.update(_measure(builder, docs, vectors, embeddings, repeats))
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare NumpyRetriever and FAISS build+query latency and memory.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 15, 30, 100, 1000, 5000])
+    parser.add_argument("--dim", type=int, default=1024, help="embed-multilingual-v3.0 차원과 동일한 기본값")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.sizes, args.dim, args.repeats)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
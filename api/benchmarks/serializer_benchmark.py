@@ -0,0 +1,125 @@
+"""단계 작업 페이로드를 json과 cvf-msgpack(+zlib/zstd)으로 직렬화했을 때의 크기와 인코딩/디코딩 시간을 비교합니다.
+
+페이로드는 fixtures의 채용공고 텍스트로 1~4단계 출력과 같은 형태를 만듭니다 (1단계 HTML은 마크업과 스크립트를 덧붙여 생성).
+Redis 브로커는 메시지 본문을 base64로 감싸므로 broker_bytes도 함께 표시합니다.
+
+실행 예:
+    python -m api.benchmarks.serializer_benchmark
+    python -m api.benchmarks.serializer_benchmark --html-kb 800 --repeats 50
+"""
+import argparse
+import base64
+import json
+import statistics
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Tuple
+
+import msgpack
+
+from api.benchmarks.bench_utils import load_job_postings, print_table
+from api.utils import serialization
+
+HTML_BOILERPLATE = (
+    '<script type="text/javascript">window.__INITIAL_STATE__={"user":null,"flags":{"newHeader":true},"tracking":"ga-123"};'
+    'function track(e){(window.dataLayer=window.dataLayer||[]).push(e)}</script>\n'
+    '<style>.job-detail__content{margin:0 auto;max-width:960px}.job-detail__title{font-size:24px;font-weight:700}</style>\n'
+)
+
+
+def _build_html(text: str, target_kb: int) -> str:
+    body = "\n".join(f'<div class="job-detail__section"><p class="job-detail__text">{line}</p></div>'
+                     for line in text.splitlines() if line.strip())
+    html = f"<html><head><title>채용공고</title></head><body>{body}</body></html>"
+    while len(html.encode("utf-8")) < target_kb * 1024:
+        html += HTML_BOILERPLATE
+    return html
+
+
+def build_payloads(html_kb: int) -> Dict[str, Any]:
+    """1~4단계 출력(다음 단계 메시지의 인자)과 같은 구조의 페이로드."""
+    postings = load_job_postings()
+    text = "\n\n".join(postings.values())
+    url = "https://example.com/jobs/12345"
+    return {
+        "step1_html": {"html_file_path": "logs/example_raw_html.html", "original_url": url,
+                       "page_content": _build_html(text, html_kb)},
+        "step2_text": {"text_file_path": "logs/example_text.txt", "original_url": url, "html_file_path": "logs/example_raw_html.html",
+                       "extracted_text": text},
+        "step3_filtered": {"filtered_text_file_path": "logs/example_filtered.txt", "original_url": url,
+                           "filtered_content": text[: len(text) * 2 // 3], "llm_model_used_for_cv": "N/A", "job_digest": None},
+        "step4_result": {"original_url": url, "cover_letter_text": text[:2500], "status_message": "자기소개서 생성 완료",
+                         "generation_stats": {"embedding_calls": 3, "generation_path": "direct", "prompt_tokens": 2200}},
+    }
+
+
+def _kombu_json_dumps(obj: Any) -> bytes:
+    # kombu 기본 json 직렬화와 같이 ensure_ascii=True (한글이 \\uXXXX로 이스케이프됨)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _msgpack_only(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def _msgpack_zlib(obj: Any) -> bytes:
+    return zlib.compress(msgpack.packb(obj, use_bin_type=True), 6)
+
+
+CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "json": (_kombu_json_dumps, lambda b: json.loads(b.decode("utf-8"))),
+    "msgpack": (_msgpack_only, lambda b: msgpack.unpackb(b, raw=False)),
+    "msgpack+zlib": (_msgpack_zlib, lambda b: msgpack.unpackb(zlib.decompress(b), raw=False)),
+    # 실제 등록된 직렬화기 (임계값 미만은 무압축, 이상은 zstd 또는 zlib)
+    "cvf-msgpack": (serialization.dumps, serialization.loads),
+}
+
+
+def _measure(encode: Callable, decode: Callable, payload: Any, repeats: int) -> Dict[str, float]:
+    encode_times, decode_times = [], []
+    encoded = encode(payload)
+    for _ in range(repeats):
+        started = time.perf_counter()
+        encoded = encode(payload)
+        encode_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        decode(encoded)
+        decode_times.append(time.perf_counter() - started)
+    return {
+        "bytes": len(encoded),
+        "broker_bytes": len(base64.b64encode(encoded)),
+        "encode_ms_p50": statistics.median(encode_times) * 1000,
+        "decode_ms_p50": statistics.median(decode_times) * 1000,
+    }
+
+
+def run(html_kb: int, repeats: int) -> List[Dict[str, object]]:
+    rows = []
+    for payload_name, payload in build_payloads(html_kb).items():
+        baseline = None
+        for codec_name, (encode, decode) in CODECS.items():
+            assert decode(encode(payload)) == payload
+            stats = _measure(encode, decode, payload, repeats)
+            baseline = baseline or stats["bytes"]
+            rows.append({"payload": payload_name, "codec": codec_name, **stats,
+                         "size_vs_json": stats["bytes"] / baseline})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--html-kb", type=int, default=300, help="1단계 HTML 페이로드 크기 (KB)")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    rows = run(args.html_kb, args.repeats)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"zstandard installed: {serialization.zstandard is not None}")
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
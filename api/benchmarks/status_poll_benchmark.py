@@ -0,0 +1,107 @@
+"""동시 상태 조회가 많을 때 동기 AsyncResult 조회와 asyncio 상태 조회의 요청 지연과 이벤트 루프 지연을 비교합니다.
+
+CELERY/REDIS 설정과 같은 Redis가 필요합니다. 벤치마크용 작업 ID에 결과를 저장한 뒤 조회합니다.
+
+실행 예:
+    python -m api.benchmarks.status_poll_benchmark
+    python -m api.benchmarks.status_poll_benchmark --concurrency 10 100 500 --polls 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+from celery import states
+from celery.result import AsyncResult
+
+from api.benchmarks.bench_utils import print_table
+from api.celery_app import celery_app
+from api.utils.async_status import aget_task_status
+
+LOOP_PROBE_INTERVAL_SECONDS = 0.01
+
+
+async def _sync_status(task_id: str):
+    # 변경 전 main.py와 동일: async 핸들러 안에서 동기 Redis 조회
+    task_result = AsyncResult(task_id, app=celery_app)
+    return task_result.state, task_result.info
+
+
+READERS = {"sync_asyncresult": _sync_status, "async_reader": aget_task_status}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _probe_loop_lag(stop: asyncio.Event, lags: List[float]) -> None:
+    # 이벤트 루프가 막히면 sleep이 예정보다 늦게 깨어남
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_PROBE_INTERVAL_SECONDS)
+        lags.append(time.perf_counter() - started - LOOP_PROBE_INTERVAL_SECONDS)
+
+
+async def _run_mode(reader, task_id: str, concurrency: int, polls: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    lags: List[float] = []
+
+    async def _client():
+        for _ in range(polls):
+            started = time.perf_counter()
+            await reader(task_id)
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_loop_lag(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*[_client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    return {
+        "requests": len(latencies),
+        "req_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "loop_lag_max_ms": (max(lags) if lags else 0.0) * 1000,
+    }
+
+
+async def run(concurrency_levels: List[int], polls: int) -> List[Dict[str, object]]:
+    task_id = f"status-benchmark-{uuid.uuid4()}"
+    celery_app.backend.store_result(task_id, {"cover_letter_output": "x" * 2000}, states.SUCCESS)
+    rows = []
+    try:
+        for concurrency in concurrency_levels:
+            for mode, reader in READERS.items():
+                rows.append({"mode": mode, "concurrency": concurrency,
+                             **await _run_mode(reader, task_id, concurrency, polls)})
+    finally:
+        celery_app.backend.forget(task_id)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500], help="동시 조회 클라이언트 수")
+    parser.add_argument("--polls", type=int, default=20, help="클라이언트당 조회 횟수")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.concurrency, args.polls))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
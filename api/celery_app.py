@@ -5,6 +5,8 @@ import logging
 import ssl
 
 from api.logging_config import setup_logging
+from api.core.config import settings
+from api.utils.serialization import SERIALIZER_NAME, register_serializer
 setup_logging() # 중앙 로깅 설정 적용
 
 logger = logging.getLogger(__name__)
@@ -72,11 +74,17 @@ logger.info(f"Celery: BROKER_TRANSPORT_OPTIONS: {CELERY_BROKER_TRANSPORT_OPTIONS
 logger.info(f"Celery: RESULT_BACKEND_TRANSPORT_OPTIONS: {CELERY_RESULT_BACKEND_TRANSPORT_OPTIONS}")
 
 
+# 로컬 실행 모드는 워커 없이 FastAPI 프로세스에서 단계를 직접 실행하므로 브로커·결과 백엔드를 프로세스 메모리에 둠
+CELERY_BROKER_URL = "memory://" if settings.LOCAL_MODE else FINAL_REDIS_URL
+CELERY_RESULT_BACKEND = "cache+memory://" if settings.LOCAL_MODE else FINAL_REDIS_URL
+if settings.LOCAL_MODE:
+    logger.info("EXECUTION_MODE=local: using in-memory Celery broker/result backend (no worker required).")
+
 try:
     celery_app = Celery(
         'tasks',
-        broker=FINAL_REDIS_URL,
-        backend=FINAL_REDIS_URL,
+        broker=CELERY_BROKER_URL,
+        backend=CELERY_RESULT_BACKEND,
         include=['celery_tasks'],
         broker_connection_retry_on_startup=True
     )
@@ -95,15 +103,19 @@ except Exception as e:
 
 # 선택적 Celery 설정 (필요에 따라 추가)
 # Redis SSL 설정은 URL에서 처리하므로 주석 유지
-if FINAL_REDIS_URL.startswith("rediss://"):
+if FINAL_REDIS_URL.startswith("rediss://") and not settings.LOCAL_MODE:
    celery_app.conf.broker_use_ssl = {'ssl_cert_reqs': ssl.CERT_REQUIRED} # ssl.CERT_REQUIRED 사용
    celery_app.conf.redis_backend_use_ssl = {'ssl_cert_reqs': ssl.CERT_REQUIRED} # ssl.CERT_REQUIRED 사용
    logger.info("Celery SSL/TLS enabled for Upstash Redis with ssl.CERT_REQUIRED.")
 
+# msgpack(+압축) 직렬화기 등록. 단계 작업별 사용 여부는 아래 task_annotations에서 지정
+register_serializer()
+
 celery_app.conf.update(
     task_serializer='json',
-    accept_content=['json'],  # 허용할 콘텐츠 타입
-    result_serializer='json',
+    accept_content=['json', SERIALIZER_NAME],  # 허용할 콘텐츠 타입 (메시지별 content-type으로 해석하므로 섞여 있어도 됨)
+    result_accept_content=['json', SERIALIZER_NAME],
+    result_serializer=settings.CELERY_RESULT_SERIALIZER,
     timezone='Asia/Seoul', # 시간대 설정
     enable_utc=True,
     # 작업 재시도 설정 등
@@ -112,6 +124,37 @@ celery_app.conf.update(
 )
 logger.info("Celery app configuration updated.")
 
+# 단계별 작업 큐: 브라우저(메모리·CPU 집약, prefork 소수), HTML 파싱(CPU), LLM 호출(I/O 대기, threads 풀)
+# 워커마다 -Q로 큐를 지정해 동시성 모델과 prefetch를 따로 설정 (docker-compose.yml 참고)
+BROWSER_QUEUE = "browser"
+PARSE_QUEUE = "parse"
+LLM_QUEUE = "llm"
+STAGE_QUEUES = (BROWSER_QUEUE, PARSE_QUEUE, LLM_QUEUE)
+
+# 큰 텍스트(HTML, 추출/필터링 텍스트)를 주고받는 단계 작업만 바이너리 직렬화 (완료 콜백 등은 json 유지)
+PIPELINE_STEP_TASKS = (
+    'celery_tasks.step_1_extract_html',
+    'celery_tasks.step_2_extract_text',
+    'celery_tasks.step_3_filter_content',
+    'celery_tasks.step_3_attach_shared_content',
+    'celery_tasks.step_4_generate_cover_letter',
+)
+if settings.CELERY_PIPELINE_SERIALIZER != 'json':
+    celery_app.conf.task_annotations = {name: {'serializer': settings.CELERY_PIPELINE_SERIALIZER} for name in PIPELINE_STEP_TASKS}
+    logger.info(f"Pipeline step tasks use serializer '{settings.CELERY_PIPELINE_SERIALIZER}'.")
+
+if settings.CELERY_STAGE_QUEUES_ENABLED:
+    celery_app.conf.task_routes = {
+        'celery_tasks.step_1_extract_html': {'queue': BROWSER_QUEUE},
+        'celery_tasks.step_2_extract_text': {'queue': PARSE_QUEUE},
+        'celery_tasks.step_3_filter_content': {'queue': LLM_QUEUE},
+        'celery_tasks.step_3_attach_shared_content': {'queue': LLM_QUEUE},
+        'celery_tasks.step_4_generate_cover_letter': {'queue': LLM_QUEUE},
+        'celery_tasks.handle_pipeline_completion': {'queue': LLM_QUEUE},
+        'celery_tasks.handle_prefetch_completion': {'queue': LLM_QUEUE},
+    }
+    logger.info(f"Celery stage queue routing enabled: {celery_app.conf.task_routes}")
+
 app = celery_app # main.py에서 import app 할 수 있도록 추가
 
 if __name__ == '__main__':
@@ -5,12 +5,30 @@ from dotenv import load_dotenv
 from celery import chain, signature, states
 from celery.exceptions import Ignore
 import time
+from typing import Any, Dict, List, Optional
 
 from api.tasks.html_extraction import step_1_extract_html
 from api.tasks.text_extraction import step_2_extract_text
 from api.tasks.content_filtering import step_3_filter_content
 from api.tasks.cover_letter_generation import step_4_generate_cover_letter
-from api.tasks.pipeline_callbacks import handle_pipeline_completion
+from api.tasks.shared_content import step_3_attach_shared_content
+from api.tasks.pipeline_callbacks import handle_pipeline_completion, handle_prefetch_completion
+from api.utils.singleflight import COMPLETED_LEADER, url_work_key, claim_work
+from api.utils.generation_context_cache import load_generation_context, save_generation_context
+from api.utils.result_cache import lookup_pipeline_result
+from api.utils.checkpoints import (PARAMS_FIELD, PIPELINE_STEP_ORDER, STEP_EXTRACT_HTML, STEP_EXTRACT_TEXT,
+                                   STEP_FILTER_CONTENT, STEP_GENERATE_COVER_LETTER, next_incomplete_step,
+                                   load_checkpoints, save_checkpoint, save_pipeline_params)
+from api.utils.progress_store import update_progress
+from api.utils.batch_progress import create_batch
+from api.utils.admission import register_inflight
+from api.utils.deadlines import apply_deadline, make_deadline
+from api.utils.local_executor import local_executor
+from api.utils.prefetch import record_prefetch_lookup, record_prefetch_started
+from api.utils.celery_utils import _update_root_task_state
+from api.utils.metrics_utils import record_metric
+from api.core.config import settings
+import api.utils.queue_metrics  # noqa: F401 (큐 대기·실행 시간 시그널 등록)
 
 # logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 # logging.getLogger("httpcore").setLevel(logging.WARNING)
@@ -28,34 +46,242 @@ try:
 except Exception as e_dotenv:
     logger.error(f"Error loading .env file: {e_dotenv}", exc_info=True)
 
-def process_job_posting_pipeline(url: str, user_prompt_text: str = None, root_task_id: str = None) -> str:
-    """주어진 URL에 대해 전체 채용공고 처리 파이프라인을 시작합니다."""
+def _complete_from_result_cache(root_task_id: str, entry: Dict[str, Any]) -> None:
+    """보관된 최종 결과로 새 루트 작업을 곧바로 SUCCESS 상태로 기록합니다 (Celery 작업 없음)."""
+    cached_result = entry.get("result") or {}
+    _update_root_task_state(
+        root_task_id=root_task_id,
+        state=states.SUCCESS,
+        meta={
+            **cached_result,
+            'cover_letter_output': cached_result.get('cover_letter_text'),
+            'chain_log_id': root_task_id,
+            'cache_hit': True,
+            'cached_from_task_id': entry.get("task_id"),
+            'status_message': "이전에 생성된 결과를 재사용했습니다.",
+            'percentage': 100,
+        }
+    )
+    # 캐시로 완료된 작업에서도 /regenerate를 쓸 수 있도록 원본 작업의 검색 컨텍스트를 새 작업 ID로 복사
+    source_context = load_generation_context(entry.get("task_id") or "")
+    if source_context is not None:
+        save_generation_context(root_task_id, source_context["filtered_content"], source_context.get("user_prompt_text"),
+                                source_context["generation_context"], original_url=source_context.get("original_url"))
+
+
+def _launch_pipeline(root_task_id: str, signatures: List[Any], on_success, on_failure) -> None:
+    """단계 시그니처들을 실행 모드에 맞게 시작합니다: Celery 체인(마지막 단계가 루트 작업 ID) 또는 프로세스 내 실행기."""
+    if settings.LOCAL_MODE:
+        local_executor.submit(root_task_id, signatures, on_success, on_failure)
+    elif len(signatures) == 1:
+        signatures[0].apply_async(task_id=root_task_id, link=on_success, link_error=on_failure)
+    else:
+        chain(*signatures).apply_async(task_id=root_task_id, link=on_success, link_error=on_failure)
+
+
+def process_job_posting_pipeline(url: str, user_prompt_text: str = None, root_task_id: str = None, variants: int = 1,
+                                 force_regenerate: bool = False, deadline: Optional[float] = None) -> str:
+    """주어진 URL에 대해 전체 채용공고 처리 파이프라인을 시작합니다.
+
+    같은 (URL, 사용자 스토리, 초안 수)의 결과가 보관되어 있으면 force_regenerate가 아닌 한 바로 완료 처리합니다.
+    deadline(epoch 초)이 있으면 모든 단계에 전달되어 Celery expires, 단계 경계 확인, 내부 타임아웃에 쓰입니다."""
     if not root_task_id:
         root_task_id = str(uuid.uuid4())
     
     log_prefix = f"[PipelineTrigger / Root {root_task_id}]"
     logger.info(f"{log_prefix} 파이프라인 시작 요청. URL: {url}, User Prompt: {'Yes' if user_prompt_text else 'No'}")
 
-    pipeline = chain(
-        step_1_extract_html.s(url=url, chain_log_id=root_task_id),
-        step_2_extract_text.s(chain_log_id=root_task_id),
-        step_3_filter_content.s(chain_log_id=root_task_id),
-        step_4_generate_cover_letter.s(chain_log_id=root_task_id, user_prompt_text=user_prompt_text)
-    )
+    if settings.RESULT_CACHE_ENABLED:
+        if force_regenerate:
+            record_metric("result_cache_lookups_total", result="bypass")
+        else:
+            cached = lookup_pipeline_result(url, user_prompt_text, variants)
+            if cached is not None:
+                logger.info(f"{log_prefix} 결과 캐시 적중 (원본 작업: {cached.get('task_id')}). 파이프라인 없이 완료 처리합니다.")
+                _complete_from_result_cache(root_task_id, cached)
+                return root_task_id
+
+    register_inflight(root_task_id)
+    save_pipeline_params(root_task_id, {"url": url, "user_prompt_text": user_prompt_text, "variants": variants})
+
+    # 같은 URL의 1~3단계가 이미 진행 중이면 그 결과에 합류하고 사용자별 4단계만 실행
+    singleflight_key = url_work_key(url)
+    if settings.LOCAL_MODE:
+        # 로컬 모드는 합류 단계의 countdown 재시도를 쓸 수 없으므로 (eager 재시도는 즉시 반복) 항상 직접 실행
+        singleflight_key, is_leader, leader_task_id = None, True, root_task_id
+    else:
+        is_leader, leader_task_id = claim_work(singleflight_key, root_task_id)
+        prefetch_result = record_prefetch_lookup(singleflight_key, is_leader)
+        if prefetch_result in ("ready", "in_flight"):
+            logger.info(f"{log_prefix} 선행 처리 결과 사용 ({prefetch_result}). 4단계만 실행합니다.")
+
+    if is_leader:
+        signatures = [
+            step_1_extract_html.s(url=url, chain_log_id=root_task_id),
+            step_2_extract_text.s(chain_log_id=root_task_id),
+            step_3_filter_content.s(chain_log_id=root_task_id, singleflight_key=singleflight_key),
+            step_4_generate_cover_letter.s(chain_log_id=root_task_id, user_prompt_text=user_prompt_text, variants=variants)
+        ]
+    else:
+        logger.info(f"{log_prefix} 동일 URL 작업이 진행 중이거나 최근 완료됨 (리더: {leader_task_id}). 공유 결과에 합류합니다.")
+        signatures = [
+            step_3_attach_shared_content.s(url=url, singleflight_key=singleflight_key, leader_task_id=leader_task_id, chain_log_id=root_task_id),
+            step_4_generate_cover_letter.s(chain_log_id=root_task_id, user_prompt_text=user_prompt_text, variants=variants)
+        ]
+    signatures = [apply_deadline(sig, deadline) for sig in signatures]
 
     on_success_sig = handle_pipeline_completion.s(root_task_id=root_task_id, is_success=True)
+    # URL 락은 실패 상태를 기록할 때 해제됨 (_update_root_task_state)
     on_failure_sig = handle_pipeline_completion.s(root_task_id=root_task_id, is_success=False)
 
-    logger.info(f"{log_prefix} Celery 파이프라인 비동기 실행 시작.")
+    logger.info(f"{log_prefix} 파이프라인 비동기 실행 시작 (모드: {settings.EXECUTION_MODE}).")
     try:
-        pipeline.apply_async(
-            task_id=root_task_id, 
-            link=on_success_sig, 
-            link_error=on_failure_sig
-        )
+        _launch_pipeline(root_task_id, signatures, on_success_sig, on_failure_sig)
         logger.info(f"{log_prefix} 파이프라인 비동기 작업 시작됨. Root Task ID: {root_task_id}")
     except Exception as e_apply_async:
         logger.error(f"{log_prefix} 파이프라인 apply_async 호출 중 오류 발생: {e_apply_async}", exc_info=True)
         raise
 
-    return root_task_id
\ No newline at end of file
+    return root_task_id
+
+
+def prefetch_job_posting(url: str) -> Dict[str, Any]:
+    """사용자 스토리와 무관한 1~3단계를 URL이 입력된 시점에 URL single-flight 리더로 미리 실행합니다.
+
+    이후 같은 URL의 제출은 진행 중이거나 완료된 이 작업에 합류해 4단계만 실행합니다.
+    반환값: {"status": started | in_flight | ready | skipped, "prefetch_id"}"""
+    if not settings.PREFETCH_ENABLED or settings.LOCAL_MODE:
+        # 로컬 모드는 URL single-flight 합류를 쓰지 않으므로 선행 결과를 이어받을 수 없음
+        return {"status": "skipped", "prefetch_id": None}
+
+    singleflight_key = url_work_key(url)
+    prefetch_id = str(uuid.uuid4())
+    is_leader, leader_task_id = claim_work(singleflight_key, prefetch_id)
+    if not is_leader:
+        if leader_task_id == COMPLETED_LEADER:
+            return {"status": "ready", "prefetch_id": None}
+        return {"status": "in_flight", "prefetch_id": leader_task_id}
+
+    log_prefix = f"[PrefetchTrigger / Prefetch {prefetch_id}]"
+    logger.info(f"{log_prefix} 1~3단계 선행 처리 시작. URL: {url}")
+    record_prefetch_started(singleflight_key, prefetch_id)
+    # 마감 초과·취소로 중단될 때 abort_pipeline이 URL 락을 해제할 수 있도록 입력 보관
+    save_pipeline_params(prefetch_id, {"url": url, "user_prompt_text": None, "variants": 1})
+    deadline = make_deadline(settings.PIPELINE_DEADLINE_SECONDS)
+    signatures = [apply_deadline(sig, deadline) for sig in (
+        step_1_extract_html.s(url=url, chain_log_id=prefetch_id),
+        step_2_extract_text.s(chain_log_id=prefetch_id),
+        step_3_filter_content.s(chain_log_id=prefetch_id, singleflight_key=singleflight_key,
+                                shared_result_ttl_seconds=settings.PREFETCH_RESULT_TTL_SECONDS),
+    )]
+    _launch_pipeline(prefetch_id, signatures,
+                     handle_prefetch_completion.s(prefetch_id=prefetch_id, singleflight_key=singleflight_key, is_success=True),
+                     handle_prefetch_completion.s(prefetch_id=prefetch_id, singleflight_key=singleflight_key, is_success=False))
+    return {"status": "started", "prefetch_id": prefetch_id}
+
+
+def process_job_postings_batch(urls: List[str], user_prompt_text: str = None, variants: int = 1,
+                               force_regenerate: bool = False, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """여러 채용공고 URL에 같은 사용자 스토리로 파이프라인을 한꺼번에 시작하고 배치 ID로 묶습니다.
+
+    항목마다 독립된 체인(캐시·singleflight·체크포인트·완료 콜백 그대로)을 쓰고, 항목이 종료될 때
+    _update_root_task_state가 배치 진행을 갱신합니다. 반환값: {"batch_id", "items": [{"url", "task_id"}]}"""
+    batch_id = str(uuid.uuid4())
+    log_prefix = f"[BatchTrigger / Batch {batch_id}]"
+    items = [{"url": url, "task_id": str(uuid.uuid4())} for url in urls]
+    # 캐시 적중 항목은 시작과 동시에 완료되므로 매핑을 먼저 기록
+    create_batch(batch_id, items)
+    logger.info(f"{log_prefix} 배치 시작 요청. 항목 수: {len(items)}, User Prompt: {'Yes' if user_prompt_text else 'No'}")
+
+    for item in items:
+        try:
+            process_job_posting_pipeline(item["url"], user_prompt_text=user_prompt_text, root_task_id=item["task_id"],
+                                         variants=variants, force_regenerate=force_regenerate, deadline=deadline)
+        except Exception as e:
+            logger.error(f"{log_prefix} 항목 시작 실패 (URL: {item['url']}, Task ID: {item['task_id']}): {e}", exc_info=True)
+            _update_root_task_state(
+                root_task_id=item["task_id"],
+                state=states.FAILURE,
+                exc=e,
+                meta={'current_step': "오류: 작업을 시작하지 못했습니다.", 'error_message': str(e), 'url': item["url"]}
+            )
+    record_metric("batch_items_submitted_total", value=len(items))
+    return {"batch_id": batch_id, "items": items}
+
+
+def regenerate_cover_letter_pipeline(source_task_id: str, user_prompt_text: str = None, variants: int = 1) -> Optional[str]:
+    """완료된 작업의 보관된 검색 컨텍스트로 4단계만 다시 실행합니다. 보관된 컨텍스트가 없으면 None."""
+    cached = load_generation_context(source_task_id)
+    if cached is None:
+        return None
+
+    root_task_id = str(uuid.uuid4())
+    log_prefix = f"[RegenerateTrigger / Root {root_task_id} / Source {source_task_id}]"
+    if user_prompt_text is None:
+        user_prompt_text = cached.get("user_prompt_text")
+    logger.info(f"{log_prefix} 보관된 컨텍스트로 다시 생성 요청. Variants: {variants}, Prompt changed: {user_prompt_text != cached.get('user_prompt_text')}")
+
+    prev_result = {
+        "filtered_content": cached["filtered_content"],
+        "original_url": cached.get("original_url") or "N/A",
+        "generation_context": cached["generation_context"],
+        "generation_context_prompt": cached.get("user_prompt_text"),
+        "regenerated_from": source_task_id,
+    }
+    # 다시 생성이 실패해도 /resume으로 4단계만 재시도할 수 있도록 입력을 체크포인트로 보관
+    save_pipeline_params(root_task_id, {"url": cached.get("original_url"), "user_prompt_text": user_prompt_text, "variants": variants})
+    save_checkpoint(root_task_id, STEP_FILTER_CONTENT, prev_result)
+    register_inflight(root_task_id)
+    step_4 = step_4_generate_cover_letter.s(prev_result, chain_log_id=root_task_id, user_prompt_text=user_prompt_text,
+                                            variants=variants)
+    _launch_pipeline(root_task_id, [apply_deadline(step_4, make_deadline(settings.PIPELINE_DEADLINE_SECONDS))],
+                     handle_pipeline_completion.s(root_task_id=root_task_id, is_success=True),
+                     handle_pipeline_completion.s(root_task_id=root_task_id, is_success=False))
+    logger.info(f"{log_prefix} 다시 생성 작업 시작됨.")
+    return root_task_id
+
+
+def resume_pipeline(root_task_id: str) -> Optional[str]:
+    """실패한 파이프라인을 마지막으로 완료된 단계의 다음 단계부터 같은 루트 작업 ID로 다시 실행합니다.
+
+    완료된 단계는 체크포인트 결과를 다음 단계 입력으로 사용합니다. 재개한 단계 이름을 반환하고,
+    보관된 입력이 없거나 모든 단계가 이미 완료되었으면 None."""
+    checkpoints = load_checkpoints(root_task_id)
+    params = checkpoints.get(PARAMS_FIELD)
+    resume_step = next_incomplete_step(checkpoints)
+    if params is None or resume_step is None:
+        return None
+
+    log_prefix = f"[ResumeTrigger / Root {root_task_id}]"
+    user_prompt_text = params.get("user_prompt_text")
+    variants = params.get("variants", 1)
+    # 1~3단계를 다시 실행하면 같은 URL로 합류한 요청들이 받을 수 있도록 3단계 결과를 공유 결과로 게시
+    singleflight_key = url_work_key(params["url"]) if params.get("url") and not settings.LOCAL_MODE else None
+    stage_signatures = {
+        STEP_EXTRACT_HTML: lambda: step_1_extract_html.s(url=params["url"], chain_log_id=root_task_id),
+        STEP_EXTRACT_TEXT: lambda: step_2_extract_text.s(chain_log_id=root_task_id),
+        STEP_FILTER_CONTENT: lambda: step_3_filter_content.s(chain_log_id=root_task_id, singleflight_key=singleflight_key),
+        STEP_GENERATE_COVER_LETTER: lambda: step_4_generate_cover_letter.s(chain_log_id=root_task_id, user_prompt_text=user_prompt_text, variants=variants),
+    }
+    remaining = list(PIPELINE_STEP_ORDER[PIPELINE_STEP_ORDER.index(resume_step):])
+    # 재개는 새 요청으로 보고 기본 마감을 새로 적용
+    deadline = make_deadline(settings.PIPELINE_DEADLINE_SECONDS)
+    signatures = [apply_deadline(stage_signatures[step](), deadline) for step in remaining]
+    if resume_step != STEP_EXTRACT_HTML:
+        # 첫 단계에는 직전 단계의 체크포인트를 입력으로 전달
+        previous_step = PIPELINE_STEP_ORDER[PIPELINE_STEP_ORDER.index(resume_step) - 1]
+        signatures[0] = signatures[0].clone(args=(checkpoints[previous_step],))
+    logger.info(f"{log_prefix} '{resume_step}' 단계부터 재개합니다. 완료된 단계: {[s for s in PIPELINE_STEP_ORDER if s in checkpoints]}")
+
+    # 이전 실패 정보를 지우고 진행 중 상태로 되돌림
+    update_progress(root_task_id, states.STARTED, {
+        'current_step': '실패한 단계부터 작업을 다시 시작합니다...',
+        'status_message': f"(resume) '{resume_step}' 단계부터 재개",
+        'resumed_from_step': resume_step,
+    }, replace=True)
+    register_inflight(root_task_id)
+    _launch_pipeline(root_task_id, signatures,
+                     handle_pipeline_completion.s(root_task_id=root_task_id, is_success=True),
+                     handle_pipeline_completion.s(root_task_id=root_task_id, is_success=False))
+    record_metric("pipeline_resumed_total", step=resume_step)
+    return resume_step
@@ -7,4 +7,128 @@ class Settings:
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY")
     GROQ_LLM_MODEL: str = os.getenv("GROQ_LLM_MODEL", "mixtral-8x7b-32768")
 
-settings = Settings() 
\ No newline at end of file
+    # 프로바이더별 레이트 리밋 (모델별 값은 LLM_RATE_LIMIT_OVERRIDES로 덮어쓸 수 있음)
+    # 예: LLM_RATE_LIMIT_OVERRIDES='{"groq:meta-llama/llama-4-maverick-17b-128e-instruct": {"rpm": 30, "tpm": 6000}}'
+    GROQ_REQUESTS_PER_MINUTE: int = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    GROQ_TOKENS_PER_MINUTE: int = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "60000"))
+    COHERE_REQUESTS_PER_MINUTE: int = int(os.getenv("COHERE_REQUESTS_PER_MINUTE", "100"))
+    COHERE_TOKENS_PER_MINUTE: int = int(os.getenv("COHERE_TOKENS_PER_MINUTE", "200000"))
+    LLM_RATE_LIMIT_OVERRIDES: str = os.getenv("LLM_RATE_LIMIT_OVERRIDES", "")
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT_SECONDS", "120"))
+    LLM_RATE_LIMIT_MAX_429_RETRIES: int = int(os.getenv("LLM_RATE_LIMIT_MAX_429_RETRIES", "3"))
+
+    # 동일 URL/콘텐츠에 대한 중복 작업 합류(single-flight)
+    SINGLEFLIGHT_LOCK_TTL_SECONDS: int = int(os.getenv("SINGLEFLIGHT_LOCK_TTL_SECONDS", "300"))
+    SINGLEFLIGHT_RESULT_TTL_SECONDS: int = int(os.getenv("SINGLEFLIGHT_RESULT_TTL_SECONDS", "300"))
+    SINGLEFLIGHT_POLL_INTERVAL_SECONDS: int = int(os.getenv("SINGLEFLIGHT_POLL_INTERVAL_SECONDS", "2"))
+
+    # 임베딩 캐시 (로컬 SQLite, 모델+텍스트 해시 기준)
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3")
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+    # 4단계 청킹 전략: semantic (문장 임베딩 기반) | structural (제목/글머리 기호) | fixed (고정 창 + 겹침)
+    CHUNKING_STRATEGY: str = os.getenv("CHUNKING_STRATEGY", "semantic")
+
+    # 공고 콘텐츠 해시별 청크+임베딩 인덱스 저장소 (총 디스크 사용량 기준 LRU 정리)
+    VECTOR_INDEX_CACHE_ENABLED: bool = os.getenv("VECTOR_INDEX_CACHE_ENABLED", "true").lower() == "true"
+    VECTOR_INDEX_CACHE_DIR: str = os.getenv("VECTOR_INDEX_CACHE_DIR", "cache/vector_indexes")
+    VECTOR_INDEX_CACHE_MAX_BYTES: int = int(os.getenv("VECTOR_INDEX_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # 필터링된 공고가 이 토큰 수(estimate_tokens 기준) 이하이면 RAG 없이 전체를 컨텍스트로 바로 생성
+    RAG_BYPASS_ENABLED: bool = os.getenv("RAG_BYPASS_ENABLED", "true").lower() == "true"
+    RAG_BYPASS_MAX_TOKENS: int = int(os.getenv("RAG_BYPASS_MAX_TOKENS", "6000"))
+
+    # 임베딩 게이트웨이: 여러 작업의 임베딩 요청을 짧게 모아 프로바이더 배치 한도까지 채워 호출
+    # (python -m api.utils.embedding_gateway 로 별도 프로세스 실행 필요)
+    EMBEDDING_GATEWAY_ENABLED: bool = os.getenv("EMBEDDING_GATEWAY_ENABLED", "false").lower() == "true"
+    EMBEDDING_GATEWAY_MAX_BATCH_TEXTS: int = int(os.getenv("EMBEDDING_GATEWAY_MAX_BATCH_TEXTS", "96"))
+    EMBEDDING_GATEWAY_MAX_WAIT_MS: int = int(os.getenv("EMBEDDING_GATEWAY_MAX_WAIT_MS", "10"))
+    EMBEDDING_GATEWAY_REPLY_TIMEOUT_SECONDS: int = int(os.getenv("EMBEDDING_GATEWAY_REPLY_TIMEOUT_SECONDS", "30"))
+    # 요청 큐 최대 길이 (게이트웨이가 멈춰도 큐가 무한히 쌓이지 않도록 오래된 요청부터 버림)
+    EMBEDDING_GATEWAY_MAX_QUEUE_LENGTH: int = int(os.getenv("EMBEDDING_GATEWAY_MAX_QUEUE_LENGTH", "1000"))
+
+    # 청크 수가 이 값 이하이면 FAISS 대신 NumPy 내적 기반 정확 검색기를 사용
+    NUMPY_RETRIEVER_MAX_DOCS: int = int(os.getenv("NUMPY_RETRIEVER_MAX_DOCS", "2000"))
+
+    # 3·4단계 LLM 호출을 프로세스 공용 이벤트 루프에서 ainvoke로 실행 (threads 풀 워커에서 동시 호출 다중화)
+    LLM_ASYNC_ENABLED: bool = os.getenv("LLM_ASYNC_ENABLED", "true").lower() == "true"
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+    # 여러 초안 동시 생성 / 다시 생성 (검색 컨텍스트를 작업 ID별로 Redis에 보관)
+    MAX_COVER_LETTER_VARIANTS: int = int(os.getenv("MAX_COVER_LETTER_VARIANTS", "5"))
+    GENERATION_CONTEXT_TTL_SECONDS: int = int(os.getenv("GENERATION_CONTEXT_TTL_SECONDS", "86400"))
+
+    # 3단계에서 구조화된 공고 요약(digest) 생성, 4단계 컨텍스트 모드: rag (직접 컨텍스트/RAG) | digest (요약 사용, 없으면 rag)
+    JOB_DIGEST_ENABLED: bool = os.getenv("JOB_DIGEST_ENABLED", "false").lower() == "true"
+    JOB_DIGEST_CACHE_TTL_SECONDS: int = int(os.getenv("JOB_DIGEST_CACHE_TTL_SECONDS", str(7 * 86400)))
+    GENERATION_CONTEXT_MODE: str = os.getenv("GENERATION_CONTEXT_MODE", "rag")
+
+    # 루트 작업 진행 상태 Redis 해시(cvf:progress:<task_id>) 보관 기간
+    PROGRESS_TTL_SECONDS: int = int(os.getenv("PROGRESS_TTL_SECONDS", "86400"))
+    # 단계별 진행 보고를 병합해 이 간격(초)보다 자주 기록하지 않음 (종료 상태와 단계 마지막 보고는 즉시 기록)
+    PROGRESS_MIN_INTERVAL_SECONDS: float = float(os.getenv("PROGRESS_MIN_INTERVAL_SECONDS", "1.0"))
+    # SSE는 pub/sub 알림으로 갱신하고, 알림을 놓친 경우를 위해 이 간격(초)으로만 직접 조회
+    PROGRESS_SSE_FALLBACK_POLL_SECONDS: float = float(os.getenv("PROGRESS_SSE_FALLBACK_POLL_SECONDS", "15"))
+
+    # 웹 계층 asyncio Redis 커넥션 풀 크기 (상태 조회, pub/sub)
+    ASYNC_REDIS_MAX_CONNECTIONS: int = int(os.getenv("ASYNC_REDIS_MAX_CONNECTIONS", "64"))
+
+    # 단계별 큐(browser/parse/llm)로 작업 라우팅. 켜면 각 큐를 소비하는 워커가 필요 (-Q browser,parse,llm)
+    CELERY_STAGE_QUEUES_ENABLED: bool = os.getenv("CELERY_STAGE_QUEUES_ENABLED", "false").lower() == "true"
+
+    # (정규화 URL, 사용자 스토리, 초안 수)가 같은 재요청은 보관된 최종 결과를 바로 반환 (force_regenerate로 우회)
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    RESULT_CACHE_TTL_SECONDS: int = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "21600"))
+
+    # 단계별 결과 체크포인트 (cvf:checkpoint:<root_task_id>): 재시도·재전달 시 완료된 단계 건너뛰기, /tasks/{id}/resume
+    CHECKPOINTS_ENABLED: bool = os.getenv("CHECKPOINTS_ENABLED", "true").lower() == "true"
+    CHECKPOINT_TTL_SECONDS: int = int(os.getenv("CHECKPOINT_TTL_SECONDS", "86400"))
+
+    # 단계 작업 메시지 직렬화: json | cvf-msgpack (msgpack + 임계값 이상 zstd/zlib 압축)
+    # 모든 워커가 cvf-msgpack을 수신할 수 있는 버전으로 배포된 뒤에 전환 (수신은 항상 두 형식 모두 허용)
+    CELERY_PIPELINE_SERIALIZER: str = os.getenv("CELERY_PIPELINE_SERIALIZER", "json")
+    # 결과 백엔드는 저장된 값을 설정된 직렬화기로만 해석하므로, 전환 시 진행 중인 작업의 결과는 읽지 못할 수 있음
+    CELERY_RESULT_SERIALIZER: str = os.getenv("CELERY_RESULT_SERIALIZER", "json")
+    SERIALIZER_COMPRESS_MIN_BYTES: int = int(os.getenv("SERIALIZER_COMPRESS_MIN_BYTES", "4096"))
+    SERIALIZER_ZSTD_LEVEL: int = int(os.getenv("SERIALIZER_ZSTD_LEVEL", "3"))
+
+    # 일괄 제출 (/create-cover-letters/batch) 및 1단계 브라우저 재사용 (워커 프로세스당 Chromium 하나를 여러 작업이 공유)
+    BATCH_MAX_URLS: int = int(os.getenv("BATCH_MAX_URLS", "50"))
+    BROWSER_REUSE_ENABLED: bool = os.getenv("BROWSER_REUSE_ENABLED", "true").lower() == "true"
+    BROWSER_REUSE_MAX_PAGES: int = int(os.getenv("BROWSER_REUSE_MAX_PAGES", "50")) # 이 수만큼 페이지를 연 뒤 브라우저 재시작 (메모리 누수 방지)
+
+    # 접수 제어: 진행 중 파이프라인 수·큐 길이·예상 대기 시간이 한도를 넘으면 429 + Retry-After로 거절
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_INFLIGHT: int = int(os.getenv("ADMISSION_MAX_INFLIGHT", "200"))
+    ADMISSION_MAX_QUEUE_DEPTH: int = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "500"))
+    ADMISSION_MAX_WAIT_SECONDS: int = int(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "600"))
+    ADMISSION_MAX_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_MAX_RETRY_AFTER_SECONDS", "600"))
+    ADMISSION_PIPELINE_CONCURRENCY: int = int(os.getenv("ADMISSION_PIPELINE_CONCURRENCY", "8")) # 동시에 진행되는 파이프라인 수 추정치 (ETA 계산용)
+    ADMISSION_DEFAULT_PIPELINE_SECONDS: float = float(os.getenv("ADMISSION_DEFAULT_PIPELINE_SECONDS", "60")) # 완료 기록이 없을 때의 소요 시간
+    ADMISSION_LATENCY_SAMPLES: int = int(os.getenv("ADMISSION_LATENCY_SAMPLES", "50"))
+    ADMISSION_INFLIGHT_STALE_SECONDS: int = int(os.getenv("ADMISSION_INFLIGHT_STALE_SECONDS", "3600"))
+
+    # 구독자가 모두 떠난 파이프라인 자동 취소 (유예 시간 안에 다시 연결하지 않으면 남은 단계 취소)
+    CANCEL_ABANDONED_ENABLED: bool = os.getenv("CANCEL_ABANDONED_ENABLED", "true").lower() == "true"
+    CANCEL_ABANDONED_GRACE_SECONDS: int = int(os.getenv("CANCEL_ABANDONED_GRACE_SECONDS", "30"))
+    CANCEL_CHECK_INTERVAL_SECONDS: float = float(os.getenv("CANCEL_CHECK_INTERVAL_SECONDS", "1.0"))
+
+    # 요청 마감 시간 (초, 0이면 마감 없음). 마감이 지나면 남은 단계를 실행하지 않고 REVOKED로 끝냄
+    PIPELINE_DEADLINE_SECONDS: int = int(os.getenv("PIPELINE_DEADLINE_SECONDS", "600"))
+    PIPELINE_MAX_DEADLINE_SECONDS: int = int(os.getenv("PIPELINE_MAX_DEADLINE_SECONDS", "1800"))
+    # LLM 호출 1회 타임아웃 (초). 마감이 있으면 남은 시간으로 줄어듦
+    LLM_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "60"))
+
+    # 실행 모드: celery (Redis + 별도 워커) | local (FastAPI 프로세스 안에서 1~4단계 실행, Redis 대신 인메모리 저장소. fakeredis[lua] 필요)
+    EXECUTION_MODE: str = os.getenv("EXECUTION_MODE", "celery").lower()
+    LOCAL_MODE: bool = EXECUTION_MODE == "local"
+    # 로컬 모드 단계 실행 스레드 수와 그중 동시에 브라우저(1단계)를 띄울 수 있는 수
+    LOCAL_EXECUTOR_MAX_WORKERS: int = int(os.getenv("LOCAL_EXECUTOR_MAX_WORKERS", "8"))
+    LOCAL_BROWSER_CONCURRENCY: int = int(os.getenv("LOCAL_BROWSER_CONCURRENCY", "2"))
+
+    # URL 입력 시점에 1~3단계 선행 실행 (/prefetch). 결과는 사용자가 스토리를 쓰는 동안 유지되도록 공유 결과보다 오래 보관
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_RESULT_TTL_SECONDS: int = int(os.getenv("PREFETCH_RESULT_TTL_SECONDS", "1800"))
+
+settings = Settings()
@@ -1,19 +1,122 @@
 import os
+import re
+import time
 import logging
-from typing import Optional, Union
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
 from langchain_cohere import CohereEmbeddings
 from langchain_experimental.text_splitter import SemanticChunker
-from langchain.chains import RetrievalQA
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from api.core.config import settings
+from api.utils.async_runtime import invoke_llm, invoke_llm_concurrently
+from api.utils.deadlines import budget_timeout
+from api.utils.rate_limiter import RateLimitedEmbeddings, estimate_tokens
+from api.utils.embedding_cache import CachedEmbeddings
+from api.utils.embedding_gateway import GatewayEmbeddings
+from api.utils.job_digest import JobPostingDigest
+from api.utils.metrics_utils import get_recent_average, observe_duration, observe_ewma
+from api.utils.retrievers import build_retriever
+from api.utils.vector_index_store import get_default_vector_index_store, vector_index_key
 
 # 로깅 설정
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+GENERATION_LLM_MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
+EMBEDDING_MODEL = "embed-multilingual-v3.0"
+GENERATION_EXPECTED_OUTPUT_TOKENS = 1500 # 자기소개서 출력 토큰 추정치 (레이트 리밋 비용 계산용)
+VARIANT_TEMPERATURES = [0.7, 1.0, 0.4, 1.2, 0.55] # 여러 초안 생성 시 순서대로 사용 (첫 값은 ChatGroq 기본값과 동일)
+
+# 생성 프롬프트 (RetrievalQA "stuff" 체인의 기본 채팅 프롬프트와 동일한 형식, 직접 컨텍스트/RAG 경로 공용)
+GENERATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Use the following pieces of context to answer the user's question. \n"
+               "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n"
+               "----------------\n{context}"),
+    ("human", "{question}"),
+])
+
+class ChunkingStrategy(ABC):
+    """채용공고 텍스트를 검색용 문서 청크로 나누는 전략의 기본 클래스입니다."""
+    name = "base"
+
+    @abstractmethod
+    def split(self, text: str, embeddings: Embeddings) -> List[Document]:
+        """text를 문서 청크 목록으로 나눕니다."""
+
+
+class SemanticChunkingStrategy(ChunkingStrategy):
+    """문장 임베딩 간 거리로 경계를 찾는 의미론적 청킹 (문장마다 임베딩 호출 필요)."""
+    name = "semantic"
+
+    def split(self, text: str, embeddings: Embeddings) -> List[Document]:
+        return SemanticChunker(embeddings).create_documents([text])
+
+
+class StructuralChunkingStrategy(ChunkingStrategy):
+    """제목/글머리 기호 등 문서 구조를 우선 경계로 삼아 재귀적으로 나누는 청킹 (임베딩 호출 없음)."""
+    name = "structural"
+    # 빈 줄 > 제목·글머리 기호로 시작하는 줄 > 줄바꿈 > 문장 > 공백 순으로 경계를 시도
+    SEPARATORS = [r"\n\n", r"\n(?=\s*(?:\[|【|■|□|●|○|◆|◇|▶|▷|※|•|·|-|\*|\d+[.)]|[가-힣A-Za-z ]{2,20}:))", r"\n", r"(?<=[.!?])\s", r"\s"]
+
+    def __init__(self, chunk_size: int = 800, chunk_overlap: int = 80):
+        self.splitter = RecursiveCharacterTextSplitter(
+            separators=self.SEPARATORS, is_separator_regex=True,
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, keep_separator=False
+        )
+
+    def split(self, text: str, embeddings: Embeddings) -> List[Document]:
+        return self.splitter.create_documents([text])
+
+
+class FixedWindowChunkingStrategy(ChunkingStrategy):
+    """고정 길이 창을 겹치게 이동하며 자르는 청킹 (임베딩 호출 없음)."""
+    name = "fixed"
+
+    def __init__(self, window_size: int = 600, overlap: int = 120):
+        if overlap >= window_size:
+            raise ValueError("overlap must be smaller than window_size")
+        self.window_size = window_size
+        self.overlap = overlap
+
+    def split(self, text: str, embeddings: Embeddings) -> List[Document]:
+        text = text.strip()
+        step = self.window_size - self.overlap
+        chunks = [text[i:i + self.window_size] for i in range(0, max(len(text) - self.overlap, 1), step)]
+        return [Document(page_content=chunk, metadata={"start_index": i * step}) for i, chunk in enumerate(chunks) if chunk.strip()]
+
+
+CHUNKING_STRATEGIES = {
+    SemanticChunkingStrategy.name: SemanticChunkingStrategy,
+    StructuralChunkingStrategy.name: StructuralChunkingStrategy,
+    FixedWindowChunkingStrategy.name: FixedWindowChunkingStrategy,
+}
+
+
+def get_chunking_strategy(name: Optional[str] = None) -> ChunkingStrategy:
+    """이름(기본값: CHUNKING_STRATEGY 설정)에 해당하는 청킹 전략을 반환합니다."""
+    name = (name or settings.CHUNKING_STRATEGY).lower()
+    if name not in CHUNKING_STRATEGIES:
+        logger.warning(f"알 수 없는 청킹 전략 '{name}'. 기본값 'semantic'을 사용합니다. 사용 가능: {list(CHUNKING_STRATEGIES)}")
+        name = SemanticChunkingStrategy.name
+    return CHUNKING_STRATEGIES[name]()
+
+
+def _embed_documents_matrix(embeddings: Embeddings, texts: List[str]) -> np.ndarray:
+    """문서 임베딩을 (n, dim) float32 배열로 계산합니다."""
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embed_documents_array(texts)
+    return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+
 def format_text_by_length(text, length=50):
     logger.debug(f"{length}자 단위로 텍스트 포맷팅 시도...")
     try:
@@ -33,21 +136,23 @@ def format_text_by_length(text, length=50):
         logger.error(f"텍스트 포맷팅 중 오류 발생: {e}", exc_info=True)
         return text
 
-def generate_cover_letter(job_posting_content: str, prompt: Union[str, None] = None):
-    logger.debug("자기소개서 생성 함수 시작...")
-    
-    if not prompt or not prompt.strip():
-        logger.info("사용자 프롬프트가 제공되지 않았거나 비어있습니다. 기본 프롬프트를 사용합니다.")
-        prompt = "저는 귀사에 기여하고 함께 성장하고 싶은 지원자입니다. 저의 잠재력과 열정을 바탕으로 뛰어난 성과를 만들겠습니다." # 기본 사용자 프롬프트
-    else:
-        logger.debug(f"입력된 사용자 프롬프트 (일부): {prompt[:100]}...")
+@dataclass
+class GenerationContext:
+    """생성 LLM에 넣을 질의와 컨텍스트 (검색 결과 또는 공고 전체). 다시 생성할 때 검색 없이 재사용합니다."""
+    query: str
+    context: str
+    path: str # "direct" | "rag" | "digest"
+    context_tokens: int
 
-    logger.debug(f"입력된 채용 공고 내용 (일부): {job_posting_content[:200]}...")
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GenerationContext":
+        return cls(**{f: data[f] for f in ("query", "context", "path", "context_tokens")})
 
-    if not job_posting_content or not job_posting_content.strip():
-        logger.warning("채용 공고 내용이 비어있거나 유효하지 않습니다.")
-        return "", "채용 공고 내용이 비어 있어 자기소개서를 생성할 수 없습니다."
 
+def _load_api_keys():
     # .env 파일에서 환경 변수 로드 (필요시 호출)
     # load_dotenv() # API 핸들러 등 상위 레벨에서 한 번만 로드하는 것이 더 효율적일 수 있습니다.
     # 여기서는 각 호출마다 로드하도록 두거나, 필요에 따라 조정합니다.
@@ -66,62 +171,213 @@ def generate_cover_letter(job_posting_content: str, prompt: Union[str, None] = N
         logger.error("COHERE_API_KEY가 설정되지 않았습니다.")
         raise ValueError("COHERE_API_KEY가 설정되지 않았습니다.")
     logger.debug("API 키 로드 완료")
+    return GROQ_API_KEY, COHERE_API_KEY
+
+
+def _build_embeddings(cohere_api_key: str) -> Embeddings:
+    embeddings = RateLimitedEmbeddings(
+        CohereEmbeddings(model=EMBEDDING_MODEL, cohere_api_key=cohere_api_key, user_agent="langchain"),
+        provider="cohere", model=EMBEDDING_MODEL
+    )
+    if settings.EMBEDDING_GATEWAY_ENABLED:
+        # 동시 작업들의 요청을 게이트웨이가 모아 배치 호출 (게이트웨이 무응답 시 직접 호출)
+        embeddings = GatewayEmbeddings(fallback=embeddings)
+    if settings.EMBEDDING_CACHE_ENABLED:
+        # 캐시 적중 시 레이트 리미터까지 거치지 않도록 가장 바깥에서 감쌈
+        embeddings = CachedEmbeddings(embeddings, model=EMBEDDING_MODEL)
+    return embeddings
+
+
+def prepare_generation_context(job_posting_content: str, prompt: Union[str, None] = None,
+                               generation_stats: Optional[Dict[str, Any]] = None,
+                               chunking_strategy: Optional[str] = None,
+                               job_digest: Optional[Dict[str, Any]] = None) -> Optional[GenerationContext]:
+    """생성 직전까지(질의 구성, 직접 컨텍스트 또는 청킹·임베딩·검색)를 수행합니다. 검색할 내용이 없으면 None.
+
+    GENERATION_CONTEXT_MODE가 digest이고 3단계 구조화 요약(job_digest)이 있으면 요약을 컨텍스트로 사용합니다."""
+    if generation_stats is None:
+        generation_stats = {}
+
+    if not prompt or not prompt.strip():
+        logger.info("사용자 프롬프트가 제공되지 않았거나 비어있습니다. 기본 프롬프트를 사용합니다.")
+        prompt = "저는 귀사에 기여하고 함께 성장하고 싶은 지원자입니다. 저의 잠재력과 열정을 바탕으로 뛰어난 성과를 만들겠습니다." # 기본 사용자 프롬프트
+    else:
+        logger.debug(f"입력된 사용자 프롬프트 (일부): {prompt[:100]}...")
+
+    logger.debug(f"입력된 채용 공고 내용 (일부): {job_posting_content[:200]}...")
+
+    _, cohere_api_key = _load_api_keys()
+
+    # 자기소개서 생성 요청 프롬프트
+    query = f"""
+    {prompt if prompt else "프롬프트가 제공되지 않았습니다. 전달된 채용 공고를 바탕으로 자기소개서를 작성하세요."}
+    """
+    logger.debug(f"자기소개서 생성 요청 프롬프트 (일부): {query[:200]}...")
+
+    posting_tokens = estimate_tokens(job_posting_content)
+    generation_stats["posting_tokens"] = posting_tokens
+
+    if settings.GENERATION_CONTEXT_MODE == "digest" and job_digest:
+        digest_text = JobPostingDigest.model_validate(job_digest).to_prompt_text()
+        generation_stats["generation_path"] = "digest"
+        logger.info(f"생성 경로: digest (요약 추정 토큰 {estimate_tokens(digest_text)}, 공고 추정 토큰 {posting_tokens})")
+        return GenerationContext(query=query, context=digest_text, path="digest", context_tokens=estimate_tokens(digest_text))
+
+    # 공고가 모델 컨텍스트에 충분히 들어가는 길이면 청킹/임베딩/검색 없이 전체를 컨텍스트로 생성
+    use_direct_context = settings.RAG_BYPASS_ENABLED and posting_tokens <= settings.RAG_BYPASS_MAX_TOKENS
+    generation_stats["generation_path"] = "direct" if use_direct_context else "rag"
+    logger.info(f"생성 경로: {generation_stats['generation_path']} (공고 추정 토큰 {posting_tokens}, 기준 {settings.RAG_BYPASS_MAX_TOKENS})")
+
+    if use_direct_context:
+        # 건너뛴 RAG 준비(청킹+임베딩+인덱싱) 시간은 최근 RAG 경로의 이동 평균으로 추정
+        avg_rag_seconds = get_recent_average("rag_preparation_seconds")
+        if avg_rag_seconds is not None:
+            generation_stats["estimated_rag_seconds_saved"] = round(avg_rag_seconds, 3)
+        return GenerationContext(query=query, context=job_posting_content, path="direct", context_tokens=posting_tokens)
 
-    # 모델 초기화
     try:
-        llm = ChatGroq(model="meta-llama/llama-4-maverick-17b-128e-instruct", groq_api_key=GROQ_API_KEY)
-        embeddings = CohereEmbeddings(model="embed-multilingual-v3.0", cohere_api_key=COHERE_API_KEY, user_agent="langchain")
-        logger.debug("LLM 및 Embeddings 모델 초기화 성공")
+        embeddings = _build_embeddings(cohere_api_key)
+        logger.debug("Embeddings 모델 초기화 성공")
     except Exception as e:
         logger.error(f"모델 초기화 중 오류 발생: {e}", exc_info=True)
         raise
 
-    # 의미론적 청킹 (이제 job_posting_content를 직접 사용)
-    logger.debug("의미론적 청킹 시도...")
-    try:
-        text_splitter = SemanticChunker(embeddings)
-        docs = text_splitter.create_documents([job_posting_content])
-        logger.debug(f"의미론적 청킹 완료. 생성된 문서 수: {len(docs)}")
-        if not docs:
-            logger.warning("의미론적 청킹 결과 문서가 없습니다 (입력된 채용공고 기반).")
-            return "", "채용공고 내용 분석 결과, 자기소개서 생성을 위한 정보를 추출할 수 없었습니다."
-    except Exception as e:
-        logger.error(f"의미론적 청킹 중 오류 발생: {e}", exc_info=True)
-        raise
+    context = _retrieve_context(embeddings, job_posting_content, query, chunking_strategy, generation_stats)
+    if isinstance(embeddings, CachedEmbeddings):
+        generation_stats.update({
+            "embedding_provider_calls": embeddings.stats["provider_calls"],
+            "embedding_texts_embedded": embeddings.stats["texts_embedded"],
+            "embedding_cache_hits": embeddings.stats["cache_hits"],
+            "embedding_memory_hits": embeddings.stats["memory_hits"],
+        })
+    if context is None:
+        return None
+    return GenerationContext(query=query, context=context, path="rag", context_tokens=estimate_tokens(context))
 
-    # FAISS 벡터 저장소 생성
-    logger.debug("FAISS 벡터 저장소 생성 시도...")
-    try:
-        vectorstore = FAISS.from_documents(docs, embeddings)
-        logger.debug("FAISS 벡터 저장소 생성 성공")
-    except Exception as e:
-        logger.error(f"FAISS 벡터 저장소 생성 중 오류 발생: {e}", exc_info=True)
-        raise
 
-    # RAG 체인 설정
-    logger.debug("RAG 체인 설정 시도...")
+def _retrieve_context(embeddings: Embeddings, job_posting_content: str, query: str,
+                      chunking_strategy: Optional[str], generation_stats: Dict[str, Any]) -> Optional[str]:
+    """청킹 → 임베딩 → 벡터 검색으로 질의와 관련된 청크를 모아 컨텍스트 문자열을 만듭니다. 청킹 결과가 없으면 None."""
+    rag_started = time.perf_counter()
+
+    # 청킹 (전략은 CHUNKING_STRATEGY 설정 또는 chunking_strategy 인자로 선택)
+    strategy = get_chunking_strategy(chunking_strategy)
+    generation_stats["chunking_strategy"] = strategy.name
+
+    # 같은 공고 콘텐츠의 청크+임베딩 인덱스가 저장되어 있으면 재사용 (이 경우 검색 비용은 질의 임베딩 1회)
+    index_store = get_default_vector_index_store() if settings.VECTOR_INDEX_CACHE_ENABLED else None
+    index_key = vector_index_key(job_posting_content, strategy.name, EMBEDDING_MODEL)
+    stored_index = None
+    if index_store is not None:
+        load_started = time.perf_counter()
+        try:
+            stored_index = index_store.load(index_key)
+        except Exception as e:
+            logger.warning(f"저장된 벡터 인덱스 로드 실패, 새로 생성합니다: {e}")
+        generation_stats["vector_index_load_ms"] = round((time.perf_counter() - load_started) * 1000, 2)
+
+    if stored_index is not None:
+        docs, doc_vectors = stored_index.docs, stored_index.vectors
+        generation_stats["vector_index"] = "hit"
+        logger.debug(f"저장된 벡터 인덱스 재사용 (key={index_key[:12]}, 문서 수: {len(docs)})")
+    else:
+        generation_stats["vector_index"] = "miss" if index_store is not None else "disabled"
+        logger.debug(f"'{strategy.name}' 청킹 시도...")
+        try:
+            docs = strategy.split(job_posting_content, embeddings)
+            logger.debug(f"'{strategy.name}' 청킹 완료. 생성된 문서 수: {len(docs)}")
+            if not docs:
+                logger.warning(f"'{strategy.name}' 청킹 결과 문서가 없습니다 (입력된 채용공고 기반).")
+                return None
+        except Exception as e:
+            logger.error(f"'{strategy.name}' 청킹 중 오류 발생: {e}", exc_info=True)
+            raise
+
+        doc_vectors = _embed_documents_matrix(embeddings, [d.page_content for d in docs])
+        if index_store is not None:
+            try:
+                index_store.save(index_key, docs, doc_vectors)
+            except Exception as e:
+                logger.warning(f"벡터 인덱스 저장 실패 (이번 요청에는 영향 없음): {e}")
+    generation_stats["chunk_count"] = len(docs)
+
+    # 검색기 생성 (이미 계산된 벡터 사용, 작은 코퍼스는 NumPy 정확 검색 / 큰 코퍼스는 FAISS)
+    logger.debug("검색기 생성 및 검색 시도...")
     try:
-        qa_chain = RetrievalQA.from_chain_type(
-            llm,
-            retriever=vectorstore.as_retriever(),
-            chain_type="stuff"
-        )
-        logger.debug("RAG 체인 설정 성공")
+        retriever = build_retriever(docs, doc_vectors, embeddings)
+        generation_stats["retriever"] = type(retriever).__name__
+        retrieved_docs = retriever.invoke(query)
+        logger.debug(f"검색 성공 ({generation_stats['retriever']}, 검색된 청크 수: {len(retrieved_docs)})")
     except Exception as e:
-        logger.error(f"RAG 체인 설정 중 오류 발생: {e}", exc_info=True)
+        logger.error(f"검색 중 오류 발생: {e}", exc_info=True)
         raise
 
-    # 자기소개서 생성 요청 프롬프트 (RAG 활용 명시)
-    query = f"""
-    {prompt if prompt else "프롬프트가 제공되지 않았습니다. 전달된 채용 공고를 바탕으로 자기소개서를 작성하세요."}
-    """
-    logger.debug(f"자기소개서 생성 요청 프롬프트 (일부): {query[:200]}...")
+    rag_seconds = time.perf_counter() - rag_started
+    generation_stats["rag_preparation_seconds"] = round(rag_seconds, 3)
+    observe_duration("rag_preparation_seconds", rag_seconds)
+    observe_ewma("rag_preparation_seconds", rag_seconds)
+    # "stuff" 체인과 같은 방식으로 검색된 청크를 이어 붙임
+    return "\n\n".join(d.page_content for d in retrieved_docs)
+
+
+def _generation_inputs(generation_context: GenerationContext) -> Dict[str, str]:
+    return {"context": generation_context.context, "question": generation_context.query}
+
+
+def _estimated_generation_tokens(generation_context: GenerationContext) -> int:
+    return estimate_tokens(generation_context.query) + generation_context.context_tokens + GENERATION_EXPECTED_OUTPUT_TOKENS
+
+
+def _generation_chain(groq_api_key: str, temperature: Optional[float] = None):
+    llm_kwargs = {"temperature": temperature} if temperature is not None else {}
+    llm = ChatGroq(model=GENERATION_LLM_MODEL, groq_api_key=groq_api_key,
+                   timeout=budget_timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS), **llm_kwargs)
+    return GENERATION_PROMPT | llm | StrOutputParser()
+
+
+def generate_from_context(generation_context: GenerationContext, temperature: Optional[float] = None) -> str:
+    """준비된 컨텍스트로 자기소개서 한 편을 생성합니다."""
+    groq_api_key, _ = _load_api_keys()
+    return invoke_llm(_generation_chain(groq_api_key, temperature), _generation_inputs(generation_context),
+                      provider="groq", model=GENERATION_LLM_MODEL,
+                      estimated_tokens=_estimated_generation_tokens(generation_context))
+
+
+def generate_variants_from_context(generation_context: GenerationContext, variants: int) -> List[str]:
+    """같은 컨텍스트로 샘플링 설정(temperature)만 달리한 초안 variants개를 동시에 생성합니다."""
+    groq_api_key, _ = _load_api_keys()
+    temperatures = [VARIANT_TEMPERATURES[i % len(VARIANT_TEMPERATURES)] for i in range(variants)]
+    inputs = _generation_inputs(generation_context)
+    return invoke_llm_concurrently(
+        [(_generation_chain(groq_api_key, t), inputs) for t in temperatures],
+        provider="groq", model=GENERATION_LLM_MODEL,
+        estimated_tokens=_estimated_generation_tokens(generation_context)
+    )
+
+
+def generate_cover_letter(job_posting_content: str, prompt: Union[str, None] = None,
+                          generation_stats: Optional[Dict[str, Any]] = None,
+                          chunking_strategy: Optional[str] = None):
+    """채용공고와 사용자 프롬프트로 자기소개서를 생성합니다.
+
+    generation_stats에 dict를 넘기면 임베딩 호출/캐시 적중 수 등 실행 통계를 채워 줍니다."""
+    logger.debug("자기소개서 생성 함수 시작...")
+    if generation_stats is None:
+        generation_stats = {}
+
+    if not job_posting_content or not job_posting_content.strip():
+        logger.warning("채용 공고 내용이 비어있거나 유효하지 않습니다.")
+        return "", "채용 공고 내용이 비어 있어 자기소개서를 생성할 수 없습니다."
+
+    generation_context = prepare_generation_context(job_posting_content, prompt, generation_stats, chunking_strategy)
+    if generation_context is None:
+        return "", "채용공고 내용 분석 결과, 자기소개서 생성을 위한 정보를 추출할 수 없었습니다."
 
     logger.debug("자기소개서 생성 시도...")
     try:
-        result = qa_chain.invoke({"query": query})
-        generated_text = result["result"]
+        generated_text = generate_from_context(generation_context)
         logger.debug("자기소개서 생성 성공")
+        logger.info(f"생성 통계: {generation_stats}")
         
         formatted_cover_letter = format_text_by_length(generated_text, 40)
         
@@ -130,6 +386,7 @@ def generate_cover_letter(job_posting_content: str, prompt: Union[str, None] = N
         logger.error(f"자기소개서 생성 중 오류 발생: {e}", exc_info=True)
         raise
 
+
 if __name__ == "__main__":
     # 테스트를 위해서는 실제 채용 공고 내용이 필요합니다.
     # 예시: 테스트용 채용 공고 파일 읽기 (또는 직접 문자열로 제공)
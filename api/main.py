@@ -10,14 +10,24 @@ from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, Pla
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-from typing import Any, Optional, Dict
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Any, List, Optional, Dict
 from celery import current_app, states
-from celery.result import AsyncResult
 from sse_starlette.sse import EventSourceResponse
 
 from api.logging_config import setup_logging
-from api.celery_tasks import process_job_posting_pipeline
+from api.celery_tasks import (prefetch_job_posting, process_job_posting_pipeline, process_job_postings_batch,
+                              regenerate_cover_letter_pipeline, resume_pipeline)
+from api.core.config import settings
+from api.utils.metrics_utils import get_metrics_snapshot
+from api.utils.async_status import aget_task_status
+from api.utils.batch_progress import aget_batch_status
+from api.utils.admission import acheck_admission, aget_queue_position
+from api.utils.cancellation import awatch, schedule_unwatch
+from api.utils.deadlines import make_deadline
+from api.utils.queue_metrics import aget_queue_depths
+from api.utils.progress_events import progress_broadcaster
+from api.utils.local_executor import local_executor
 
 # 로깅 설정
 setup_logging()
@@ -56,6 +66,25 @@ app.add_middleware(
 class StartTaskRequest(BaseModel):
     job_url: str
     user_story: Optional[str] = None
+    variants: int = Field(default=1, ge=1, le=settings.MAX_COVER_LETTER_VARIANTS)
+    force_regenerate: bool = False # True이면 결과 캐시를 무시하고 파이프라인을 다시 실행
+    # 요청 마감 시간 (초). 생략하면 PIPELINE_DEADLINE_SECONDS
+    deadline_seconds: Optional[int] = Field(default=None, ge=10, le=settings.PIPELINE_MAX_DEADLINE_SECONDS)
+
+class StartBatchRequest(BaseModel):
+    job_urls: List[str] = Field(min_length=1, max_length=settings.BATCH_MAX_URLS)
+    user_story: Optional[str] = None
+    variants: int = Field(default=1, ge=1, le=settings.MAX_COVER_LETTER_VARIANTS)
+    force_regenerate: bool = False
+    # 배치 전체 마감 시간 (초). 항목들이 차례로 큐에서 대기하므로 생략하면 마감 없음
+    deadline_seconds: Optional[int] = Field(default=None, ge=10, le=settings.PIPELINE_MAX_DEADLINE_SECONDS)
+
+class PrefetchRequest(BaseModel):
+    job_url: str = Field(min_length=1)
+
+class RegenerateRequest(BaseModel):
+    user_story: Optional[str] = None # 생략하면 원래 작업의 프롬프트 사용
+    variants: int = Field(default=1, ge=1, le=settings.MAX_COVER_LETTER_VARIANTS)
 
 class TaskStatusResponse(BaseModel):
     task_id: str
@@ -68,11 +97,16 @@ celery_app = current_app._get_current_object()
 
 @app.on_event("startup")
 async def startup_event():
-    logger.info("FastAPI application starting up.")
+    logger.info(f"FastAPI application starting up (execution mode: {settings.EXECUTION_MODE}).")
+    if settings.LOCAL_MODE:
+        local_executor.start(asyncio.get_running_loop())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("FastAPI application shutting down.")
+    await progress_broadcaster.stop()
+    if settings.LOCAL_MODE:
+        await local_executor.stop()
 
 # --- 라우트(Routes) ---
 
@@ -81,71 +115,189 @@ async def read_root(request: Request):
     """메인 페이지를 렌더링합니다."""
     return templates.TemplateResponse("index.html", {"request": request})
 
+async def _admit_or_429(requested: int) -> None:
+    decision = await acheck_admission(requested)
+    if not decision.admitted:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server is over capacity ({decision.reason}). Estimated wait: {decision.estimated_wait_seconds:.0f}s.",
+            headers={"Retry-After": str(decision.retry_after_seconds)},
+        )
+
 @app.post("/create-cover-letter", status_code=202)
 async def create_cover_letter(request: StartTaskRequest):
-    """자기소개서 생성 파이프라인을 시작합니다."""
+    """자기소개서 생성 파이프라인을 시작합니다.
+
+    처리 한도를 넘으면 429와 예상 대기 시간 기반의 Retry-After를 반환하고, 접수되면 대기 순번과 ETA를 함께 반환합니다."""
+    await _admit_or_429(requested=1)
     try:
-        task_id = process_job_posting_pipeline(
+        # 캐시·single-flight 조회와 체인 발행은 동기 Redis/브로커 호출이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+        task_id = await asyncio.to_thread(
+            process_job_posting_pipeline,
             url=request.job_url,
-            user_prompt_text=request.user_story
+            user_prompt_text=request.user_story,
+            variants=request.variants,
+            force_regenerate=request.force_regenerate,
+            deadline=make_deadline(request.deadline_seconds or settings.PIPELINE_DEADLINE_SECONDS)
         )
         logger.info(f"Cover letter generation task started. URL: {request.job_url}, Task ID: {task_id}")
-        return {"task_id": task_id}
     except Exception as e:
         logger.error(f"Failed to start cover letter generation task: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to start the task.")
+    return {"task_id": task_id, **(await aget_queue_position(task_id) or {})}
+
+@app.post("/prefetch", status_code=202)
+async def prefetch_job_posting_endpoint(request: PrefetchRequest):
+    """URL이 입력되면 사용자 스토리를 쓰는 동안 1~3단계를 미리 실행합니다. 이후 같은 URL 제출은 4단계만 실행합니다.
+
+    추측 실행이므로 처리 한도를 넘으면 429 대신 status=skipped로 응답합니다."""
+    decision = await acheck_admission(requested=1)
+    if not decision.admitted:
+        return {"status": "skipped", "prefetch_id": None, "reason": decision.reason}
+    try:
+        return await asyncio.to_thread(prefetch_job_posting, request.job_url)
+    except Exception as e:
+        logger.warning(f"Failed to start prefetch for URL {request.job_url}: {e}", exc_info=True)
+        return {"status": "skipped", "prefetch_id": None, "reason": "error"}
+
+@app.post("/create-cover-letters/batch", status_code=202)
+async def create_cover_letters_batch(request: StartBatchRequest):
+    """여러 채용공고에 같은 사용자 스토리로 자기소개서 생성을 한꺼번에 시작합니다.
+
+    배치 전체 진행은 /tasks/{batch_id}와 /stream-task-status/{batch_id}, 항목별 결과는 /batches/{batch_id}로 조회합니다."""
+    await _admit_or_429(requested=len(request.job_urls))
+    try:
+        batch = await asyncio.to_thread(
+            process_job_postings_batch,
+            request.job_urls,
+            user_prompt_text=request.user_story,
+            variants=request.variants,
+            force_regenerate=request.force_regenerate,
+            deadline=make_deadline(request.deadline_seconds)
+        )
+    except Exception as e:
+        logger.error(f"Failed to start cover letter batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to start the batch.")
+    logger.info(f"Cover letter batch started. Batch ID: {batch['batch_id']}, Items: {len(batch['items'])}")
+    return batch
+
+@app.get("/batches/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """배치 전체 상태(완료/실패 수)와 항목별 상태·결과를 반환합니다."""
+    batch_status = await aget_batch_status(batch_id)
+    if batch_status is None:
+        raise HTTPException(status_code=404, detail="Batch not found (expired or never created).")
+    state, meta, items = batch_status
+    return {"batch_id": batch_id, "status": state, **meta, "items": items}
+
+@app.post("/tasks/{task_id}/regenerate", status_code=202)
+async def regenerate_cover_letter(task_id: str, request: RegenerateRequest):
+    """완료된 작업의 검색 컨텍스트를 재사용해 자기소개서만 다시 생성합니다. 처리 한도를 넘으면 429를 반환합니다."""
+    await _admit_or_429(requested=1)
+    try:
+        new_task_id = await asyncio.to_thread(
+            regenerate_cover_letter_pipeline,
+            source_task_id=task_id,
+            user_prompt_text=request.user_story,
+            variants=request.variants
+        )
+    except Exception as e:
+        logger.error(f"Failed to start regeneration for task {task_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to start the task.")
+    if new_task_id is None:
+        raise HTTPException(status_code=404, detail="No reusable generation context for this task (expired or not completed).")
+    logger.info(f"Cover letter regeneration task started. Source Task ID: {task_id}, Task ID: {new_task_id}")
+    return {"task_id": new_task_id}
+
+@app.post("/tasks/{task_id}/resume", status_code=202)
+async def resume_task(task_id: str):
+    """실패한 작업을 마지막 체크포인트 다음 단계부터 같은 작업 ID로 다시 실행합니다. 처리 한도를 넘으면 429를 반환합니다."""
+    state, _ = await aget_task_status(task_id)
+    if state != states.FAILURE:
+        raise HTTPException(status_code=409, detail=f"Only failed tasks can be resumed (current state: {state}).")
+    await _admit_or_429(requested=1)
+    try:
+        resumed_step = await asyncio.to_thread(resume_pipeline, task_id)
+    except Exception as e:
+        logger.error(f"Failed to resume task {task_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to resume the task.")
+    if resumed_step is None:
+        raise HTTPException(status_code=404, detail="No checkpoints to resume from for this task (expired or not started).")
+    logger.info(f"Task {task_id} resumed from step '{resumed_step}'.")
+    return {"task_id": task_id, "resumed_from_step": resumed_step}
 
 @app.get("/tasks/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(task_id: str):
     """작업의 현재 상태를 반환합니다."""
-    task_result = AsyncResult(task_id, app=celery_app)
+    state, info = await aget_task_status(task_id)
     
     current_step = None
     result_data = None
     
-    if isinstance(task_result.info, dict):
-        current_step = task_result.info.get("current_step", "상태 정보 없음")
-        result_data = task_result.info
-    elif task_result.state == states.FAILURE:
+    if isinstance(info, dict):
+        current_step = info.get("current_step", "상태 정보 없음")
+        result_data = info
+    elif state == states.FAILURE:
         current_step = "작업 실패"
-        result_data = str(task_result.info)
+        result_data = str(info)
     else:
-        current_step = task_result.state
+        current_step = state
 
     return TaskStatusResponse(
         task_id=task_id,
-        status=task_result.state,
+        status=state,
         current_step=current_step,
         result=result_data,
     )
 
 @app.get("/stream-task-status/{task_id}")
 async def stream_task_status(request: Request, task_id: str):
-    """SSE를 사용하여 작업 상태를 실시간으로 스트리밍합니다."""
+    """SSE를 사용하여 작업 상태를 실시간으로 스트리밍합니다.
+
+    단계에서 발행하는 진행 알림(pub/sub)을 받아 즉시 전달하고, 놓친 알림은 느린 폴링으로 보완합니다.
+    작업이 끝나기 전에 마지막 구독자가 떠나고 유예 시간 안에 다시 연결하지 않으면 파이프라인을 취소합니다."""
     async def event_generator():
-        while True:
-            if await request.is_disconnected():
-                logger.warning(f"Client disconnected from task {task_id} stream.")
-                break
-
-            task_result = AsyncResult(task_id, app=celery_app)
-            status_data = {"status": task_result.state, "info": task_result.info if isinstance(task_result.info, (dict, str)) else None}
-            
-            yield {
-                "event": "update",
-                "data": json.dumps(status_data)
-            }
-
-            if task_result.ready():
-                logger.info(f"Task {task_id} finished. Closing stream.")
-                final_data = {"status": task_result.state, "info": task_result.info if isinstance(task_result.info, (dict, str)) else None}
-                yield {
-                    "event": "end",
-                    "data": json.dumps(final_data)
-                }
-                break
-
-            await asyncio.sleep(1)
+        queue = progress_broadcaster.subscribe(task_id)
+        await awatch(task_id)
+        finished = False
+        try:
+            state, info = await aget_task_status(task_id)
+            last_sent = None
+            while True:
+                if await request.is_disconnected():
+                    logger.warning(f"Client disconnected from task {task_id} stream.")
+                    break
+
+                status_data = {"status": state, "info": info if isinstance(info, (dict, str)) else None}
+                if state not in states.READY_STATES:
+                    # 대기 순번과 ETA는 알림이 없어도 폴링 주기마다 갱신
+                    position = await aget_queue_position(task_id)
+                    if position is not None:
+                        status_data.update(position)
+                payload = json.dumps(status_data)
+                if payload != last_sent:
+                    yield {
+                        "event": "update",
+                        "data": payload
+                    }
+                    last_sent = payload
+
+                if state in states.READY_STATES:
+                    finished = True
+                    logger.info(f"Task {task_id} finished. Closing stream.")
+                    yield {
+                        "event": "end",
+                        "data": payload
+                    }
+                    break
+
+                try:
+                    state, info = await asyncio.wait_for(queue.get(), timeout=settings.PROGRESS_SSE_FALLBACK_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    state, info = await aget_task_status(task_id)
+        finally:
+            progress_broadcaster.unsubscribe(task_id, queue)
+            schedule_unwatch(task_id, abandoned=not finished)
 
     return EventSourceResponse(event_generator())
 
@@ -154,6 +306,13 @@ async def health_check():
     """헬스 체크 엔드포인트."""
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """레이트 리밋 대기 시간, 스로틀 횟수 등 누적 운영 지표와 큐별 대기 메시지 수를 반환합니다.
+
+    큐별 대기/실행 시간은 celery_queue_wait_seconds, celery_task_seconds의 {queue=...} 라벨로 누적됩니다."""
+    return {"metrics": get_metrics_snapshot(), "queue_depths": await aget_queue_depths()}
+
 @app.get("/logs/{filename}", response_class=PlainTextResponse)
 async def get_log_file(filename: str):
     """로그 파일을 조회합니다."""
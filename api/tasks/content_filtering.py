@@ -3,23 +3,39 @@ import logging
 import os
 import traceback
 from celery import states
-from typing import Dict, Any
+from celery.exceptions import Retry
+from typing import Dict, Any, Optional
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 import time
 
 from api.utils.file_utils import sanitize_filename
+from api.utils.progress_reporter import ProgressReporter
+from api.utils.checkpoints import STEP_FILTER_CONTENT, checkpointed
+from api.utils.cancellation import cancellable
 from api.utils.celery_utils import _update_root_task_state
+from api.utils.async_runtime import invoke_llm
+from api.utils.deadlines import budget_timeout
+from api.utils.rate_limiter import estimate_tokens
+from api.utils.metrics_utils import record_metric
+from api.utils.singleflight import (ATTACH_MAX_RETRIES, content_work_key, claim_work, is_in_flight, release_work,
+                                    get_result as get_shared_result, publish_result as publish_shared_result)
+from api.utils.job_digest import extract_job_digest
+from api.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True, name='celery_tasks.step_3_filter_content', max_retries=1, default_retry_delay=15)
-def step_3_filter_content(self, prev_result: Dict[str, str], chain_log_id: str) -> Dict[str, str]:
+@checkpointed(STEP_FILTER_CONTENT)
+@cancellable(STEP_FILTER_CONTENT)
+def step_3_filter_content(self, prev_result: Dict[str, str], chain_log_id: str, singleflight_key: Optional[str] = None,
+                          shared_result_ttl_seconds: Optional[int] = None) -> Dict[str, str]:
     """(3단계) 추출된 텍스트를 LLM으로 필터링하고 새 파일에 저장합니다."""
     task_id = self.request.id
     step_log_id = "3_filter_content"
     log_prefix = f"[Task {task_id} / Root {chain_log_id} / Step {step_log_id}]"
+    progress = ProgressReporter(self, chain_log_id)
     logger.info(f"{log_prefix} ---------- Task started. Received prev_result_keys: {list(prev_result.keys()) if isinstance(prev_result, dict) else type(prev_result)} ----------")
 
     if not isinstance(prev_result, dict) or "extracted_text" not in prev_result:
@@ -54,20 +70,16 @@ def step_3_filter_content(self, prev_result: Dict[str, str], chain_log_id: str)
         base_text_fn_for_saving = os.path.splitext(os.path.basename(raw_text_file_path))[0].replace("_extracted_text","")
 
     logger.info(f"{log_prefix} Starting LLM filtering for text (length: {len(extracted_text)}). Associated raw_text_file_path for logging: {raw_text_file_path}")
-    self.update_state(state='PROGRESS', meta={'current_step': '채용공고 내용 필터링을 준비 중입니다.', 'percentage': 0, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_STARTED'})
-    _update_root_task_state(
-        root_task_id=chain_log_id, 
-        state=states.STARTED,
-        meta={
-            'current_step': '추출된 텍스트에서 핵심 채용공고 내용을 선별하고 있습니다...',
-            'status_message': f"({step_log_id}) LLM 채용공고 필터링 시작", 
-            'current_task_id': task_id, 
-            'pipeline_step': 'CONTENT_FILTERING_STARTED',
-            'percentage': 5 # 예시 진행률
-        }
-    )
+    progress.report(states.STARTED, {
+        'current_step': '추출된 텍스트에서 핵심 채용공고 내용을 선별하고 있습니다...',
+        'status_message': f"({step_log_id}) LLM 채용공고 필터링 시작", 
+        'current_task_id': task_id, 
+        'pipeline_step': 'CONTENT_FILTERING_STARTED',
+        'percentage': 5 # 예시 진행률
+    }, task_meta={'current_step': '채용공고 내용 필터링을 준비 중입니다.', 'percentage': 0, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_STARTED'})
 
     filtered_text_file_path = None
+    job_digest = None
     raw_text = extracted_text
     try:
         if not raw_text.strip():
@@ -88,7 +100,8 @@ def step_3_filter_content(self, prev_result: Dict[str, str], chain_log_id: str)
             logger.info(f"{log_prefix} Using LLM: {llm_model} via Groq.")
             logger.debug(f"{log_prefix} GROQ_API_KEY: {'*' * (len(groq_api_key) - 4) + groq_api_key[-4:] if groq_api_key else 'Not Set'}")
             
-            chat = ChatGroq(temperature=0, groq_api_key=groq_api_key, model_name=llm_model)
+            chat = ChatGroq(temperature=0, groq_api_key=groq_api_key, model_name=llm_model,
+                            timeout=budget_timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS)) # 마감이 가까우면 남은 시간으로 제한
             logger.debug(f"{log_prefix} ChatGroq client initialized: {chat}")
 
             sys_prompt = ("당신은 전문적인 텍스트 처리 도우미입니다. 당신의 임무는 제공된 텍스트에서 핵심 채용공고 내용만 추출하는 것입니다. "
@@ -108,72 +121,106 @@ def step_3_filter_content(self, prev_result: Dict[str, str], chain_log_id: str)
             if len(raw_text) > MAX_LLM_INPUT_LEN:
                 logger.warning(f"{log_prefix} Text length ({len(raw_text)}) > limit ({MAX_LLM_INPUT_LEN}). Truncating.")
                 text_for_llm = raw_text[:MAX_LLM_INPUT_LEN]
-                _update_root_task_state(
-                    root_task_id=chain_log_id, 
-                    state=states.STARTED,
-                    meta={
-                        'current_step': '채용공고 내용이 너무 길어 일부만 사용하여 분석합니다...',
-                        'status_message': f"({step_log_id}) LLM 입력 텍스트 일부 사용 (길이 초과)", 
-                        'original_len': len(raw_text), 
-                        'truncated_len': len(text_for_llm),
-                        'current_task_id': task_id,
-                        'pipeline_step': 'CONTENT_FILTERING_INPUT_TRUNCATED'
-                    }
-                )
+                progress.report(states.STARTED, {
+                    'current_step': '채용공고 내용이 너무 길어 일부만 사용하여 분석합니다...',
+                    'status_message': f"({step_log_id}) LLM 입력 텍스트 일부 사용 (길이 초과)", 
+                    'original_len': len(raw_text), 
+                    'truncated_len': len(text_for_llm),
+                    'current_task_id': task_id,
+                    'pipeline_step': 'CONTENT_FILTERING_INPUT_TRUNCATED'
+                })
             
             logger.info(f"{log_prefix} Text length for LLM: {len(text_for_llm)}")
             logger.debug(f"{log_prefix} Text for LLM (first 500 chars): {text_for_llm[:500]}")
 
-            self.update_state(state='PROGRESS', meta={'current_step': 'LLM을 통해 채용공고 핵심 내용을 분석 중입니다...', 'percentage': 30, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_LLM_INVOKE'})
-            _update_root_task_state(
-                root_task_id=chain_log_id,
-                state=states.STARTED,
-                meta={
-                    'current_step': 'LLM을 통해 채용공고 핵심 내용을 분석하고 있습니다. 시간이 다소 소요될 수 있습니다.',
-                    'status_message': f"({step_log_id}) LLM 호출 중",
-                    'current_task_id': task_id,
-                    'pipeline_step': 'CONTENT_FILTERING_LLM_INVOKE',
-                    'percentage': 35 # 예시 진행률
-                }
-            )
-
-            try:
-                logger.info(f"{log_prefix} >>> Attempting llm_chain.invoke NOW...")
-                start_time_llm_invoke = time.time()
-                filtered_content = llm_chain.invoke({"text_content": text_for_llm})
-                end_time_llm_invoke = time.time()
-                duration_llm_invoke = end_time_llm_invoke - start_time_llm_invoke
-                logger.info(f"{log_prefix} <<< llm_chain.invoke completed. Duration: {duration_llm_invoke:.2f} seconds.")
-                logger.info(f"{log_prefix} LLM filtering complete. Output length: {len(filtered_content)}")
-                logger.debug(f"{log_prefix} Filtered content (first 500 chars): {filtered_content[:500]}")
-                self.update_state(state='PROGRESS', meta={'current_step': '채용공고 핵심 내용 분석 완료. 결과를 저장합니다.', 'percentage': 70, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_LLM_COMPLETED'})
-                _update_root_task_state(
-                    root_task_id=chain_log_id,
-                    state=states.STARTED,
-                    meta={
+            progress.report(states.STARTED, {
+                'current_step': 'LLM을 통해 채용공고 핵심 내용을 분석하고 있습니다. 시간이 다소 소요될 수 있습니다.',
+                'status_message': f"({step_log_id}) LLM 호출 중",
+                'current_task_id': task_id,
+                'pipeline_step': 'CONTENT_FILTERING_LLM_INVOKE',
+                'percentage': 35 # 예시 진행률
+            }, task_meta={'current_step': 'LLM을 통해 채용공고 핵심 내용을 분석 중입니다...', 'percentage': 30, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_LLM_INVOKE'})
+
+            # 동일한 추출 텍스트를 다른 요청이 이미 필터링했거나 필터링 중이면 LLM을 다시 호출하지 않고 결과를 공유
+            content_key = content_work_key(text_for_llm, llm_model)
+            shared_filtered = get_shared_result(content_key)
+            is_content_leader = False
+            if shared_filtered is None:
+                is_content_leader, content_leader_id = claim_work(content_key, task_id)
+                if not is_content_leader:
+                    shared_filtered = get_shared_result(content_key)
+                    if (shared_filtered is None and not settings.LOCAL_MODE and self.request.retries < ATTACH_MAX_RETRIES
+                            and is_in_flight(content_key)):
+                        # 같은 내용을 필터링 중인 리더에 합류: 워커 슬롯을 잡고 기다리지 않도록 countdown 재시도로 결과를 다시 확인
+                        # (리더가 실패하거나 락이 만료되면 재시도에서 리더 자리를 차지해 직접 호출)
+                        if self.request.retries == 0:
+                            logger.info(f"{log_prefix} Identical content is being filtered by {content_leader_id}. Waiting for its result.")
+                            progress.report(states.STARTED, {
+                                'current_step': '동일한 채용공고 내용을 분석 중인 작업이 있어 그 결과를 함께 사용합니다...',
+                                'status_message': f"({step_log_id}) 진행 중인 동일 내용 필터링에 합류 (리더: {content_leader_id})",
+                                'current_task_id': task_id,
+                                'pipeline_step': 'SHARED_CONTENT_WAITING',
+                            })
+                        raise self.retry(countdown=settings.SINGLEFLIGHT_POLL_INTERVAL_SECONDS, max_retries=ATTACH_MAX_RETRIES)
+                    if shared_filtered is None:
+                        # 로컬 모드(eager 재시도는 대기 없이 반복됨)이거나 재시도 한도를 넘은 경우 직접 호출
+                        logger.info(f"{log_prefix} Identical content is being filtered by {content_leader_id}. Filtering independently.")
+                        record_metric("singleflight_contended_total", stage="content_filter")
+
+            if shared_filtered is not None:
+                filtered_content = shared_filtered["filtered_content"]
+                record_metric("singleflight_attached_total", stage="content_filter")
+                logger.info(f"{log_prefix} Reusing filtered content from in-flight/recent identical request (length: {len(filtered_content)}).")
+            else:
+                try:
+                    logger.info(f"{log_prefix} >>> Attempting llm_chain.invoke NOW...")
+                    start_time_llm_invoke = time.time()
+                    # 입력 토큰 + 예상 출력 토큰(필터링 결과는 입력보다 짧음)으로 공유 버킷 비용을 추정
+                    input_tokens_estimate = estimate_tokens(sys_prompt) + estimate_tokens(text_for_llm)
+                    filtered_content = invoke_llm(
+                        llm_chain, {"text_content": text_for_llm}, provider="groq", model=llm_model,
+                        estimated_tokens=input_tokens_estimate + min(input_tokens_estimate, 4096)
+                    )
+                    end_time_llm_invoke = time.time()
+                    duration_llm_invoke = end_time_llm_invoke - start_time_llm_invoke
+                    logger.info(f"{log_prefix} <<< llm_chain.invoke completed. Duration: {duration_llm_invoke:.2f} seconds.")
+                    logger.info(f"{log_prefix} LLM filtering complete. Output length: {len(filtered_content)}")
+                    logger.debug(f"{log_prefix} Filtered content (first 500 chars): {filtered_content[:500]}")
+                    progress.report(states.STARTED, {
                         'current_step': '채용공고 핵심 내용 분석이 완료되었습니다. 결과를 저장하고 다음 단계를 준비합니다.',
                         'status_message': f"({step_log_id}) LLM 분석 완료",
                         'current_task_id': task_id,
                         'pipeline_step': 'CONTENT_FILTERING_LLM_COMPLETED',
                         'percentage': 75 # 예시 진행률
-                    }
-                )
-            except Exception as e_llm_invoke:
-                logger.error(f"{log_prefix} !!! EXCEPTION during llm_chain.invoke: {type(e_llm_invoke).__name__} - {str(e_llm_invoke)}", exc_info=True)
-                err_details_invoke = {'error': str(e_llm_invoke), 'type': type(e_llm_invoke).__name__, 'traceback': traceback.format_exc(), 'context': 'llm_chain.invoke'}
-                self.update_state(state=states.FAILURE, meta={'current_step': '오류: LLM 채용공고 분석 중 문제가 발생했습니다.', 'error': str(e_llm_invoke), 'type': type(e_llm_invoke).__name__, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_FAILED'})
-                _update_root_task_state(
-                    root_task_id=chain_log_id, 
-                    state=states.FAILURE, 
-                    exc=e_llm_invoke, 
-                    traceback_str=traceback.format_exc(), 
-                    meta={'status_message': f"({step_log_id}) LLM 호출 실패", **err_details_invoke, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_FAILED'}
-                )
-                raise
+                    }, task_meta={'current_step': '채용공고 핵심 내용 분석 완료. 결과를 저장합니다.', 'percentage': 70, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_LLM_COMPLETED'})
+                    if is_content_leader:
+                        publish_shared_result(content_key, task_id, {"filtered_content": filtered_content})
+                except Exception as e_llm_invoke:
+                    if is_content_leader:
+                        release_work(content_key, task_id)
+                    logger.error(f"{log_prefix} !!! EXCEPTION during llm_chain.invoke: {type(e_llm_invoke).__name__} - {str(e_llm_invoke)}", exc_info=True)
+                    err_details_invoke = {'error': str(e_llm_invoke), 'type': type(e_llm_invoke).__name__, 'traceback': traceback.format_exc(), 'context': 'llm_chain.invoke'}
+                    self.update_state(state=states.FAILURE, meta={'current_step': '오류: LLM 채용공고 분석 중 문제가 발생했습니다.', 'error': str(e_llm_invoke), 'type': type(e_llm_invoke).__name__, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_FAILED'})
+                    _update_root_task_state(
+                        root_task_id=chain_log_id, 
+                        state=states.FAILURE, 
+                        exc=e_llm_invoke, 
+                        traceback_str=traceback.format_exc(), 
+                        meta={'status_message': f"({step_log_id}) LLM 호출 실패", **err_details_invoke, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_FAILED'}
+                    )
+                    raise
 
             if filtered_content.strip() == "추출할 채용공고 내용 없음":
                 logger.warning(f"{log_prefix} LLM reported no extractable job content.")
                 filtered_content = "<!-- LLM 분석: 추출할 채용공고 내용 없음 -->"
+            elif settings.JOB_DIGEST_ENABLED:
+                # 4단계 프롬프트 축소용 구조화 요약 (실패해도 필터링 결과는 그대로 사용)
+                try:
+                    digest = extract_job_digest(filtered_content, llm_model, groq_api_key)
+                    job_digest = digest.model_dump() if digest else None
+                    logger.info(f"{log_prefix} Job digest {'created' if job_digest else 'unavailable (invalid or empty)'}.")
+                except Exception as e_digest:
+                    logger.warning(f"{log_prefix} Job digest extraction failed, continuing without digest: {e_digest}")
 
         logs_dir = "logs"
         os.makedirs(logs_dir, exist_ok=True)
@@ -184,19 +231,14 @@ def step_3_filter_content(self, prev_result: Dict[str, str], chain_log_id: str)
         with open(filtered_text_file_path, "w", encoding="utf-8") as f:
             f.write(filtered_content)
         logger.info(f"{log_prefix} Filtered text saved to: {filtered_text_file_path}")
-        self.update_state(state='PROGRESS', meta={'current_step': '분석된 채용공고 내용을 안전하게 저장했습니다.', 'percentage': 90, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_SAVED'})
-        _update_root_task_state(
-            root_task_id=chain_log_id,
-            state=states.STARTED, # SUCCESS 전 마지막 PROGRESS 상태로 간주
-            meta={
-                'current_step': '핵심 채용공고 내용 선별 완료. 자기소개서 생성을 준비합니다...',
-                'status_message': f"({step_log_id}) 필터링된 텍스트 파일 저장 완료", 
-                'filtered_text_file_path': filtered_text_file_path, 
-                'current_task_id': task_id, 
-                'pipeline_step': 'CONTENT_FILTERING_COMPLETED',
-                'percentage': 95 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '핵심 채용공고 내용 선별 완료. 자기소개서 생성을 준비합니다...',
+            'status_message': f"({step_log_id}) 필터링된 텍스트 파일 저장 완료", 
+            'filtered_text_file_path': filtered_text_file_path, 
+            'current_task_id': task_id, 
+            'pipeline_step': 'CONTENT_FILTERING_COMPLETED',
+            'percentage': 95 # 예시 진행률
+        }, task_meta={'current_step': '분석된 채용공고 내용을 안전하게 저장했습니다.', 'percentage': 90, 'current_task_id': task_id, 'pipeline_step': 'CONTENT_FILTERING_SAVED'}, final=True)
 
         result_to_return = {"filtered_text_file_path": filtered_text_file_path, 
                              "original_url": original_url, 
@@ -205,13 +247,20 @@ def step_3_filter_content(self, prev_result: Dict[str, str], chain_log_id: str)
                              "status_history": prev_result.get("status_history", []),
                              "cover_letter_preview": filtered_content[:500] + ("..." if len(filtered_content) > 500 else ""),
                              "llm_model_used_for_cv": "N/A",
-                             "filtered_content": filtered_content
+                             "filtered_content": filtered_content,
+                             "job_digest": job_digest
                             }
+        if singleflight_key:
+            # 같은 URL로 합류 대기 중인 요청들이 4단계만 실행할 수 있도록 결과 공유
+            publish_shared_result(singleflight_key, chain_log_id, result_to_return, ttl_seconds=shared_result_ttl_seconds)
         logger.info(f"{log_prefix} ---------- Task finished successfully. Returning result. ----------")
         logger.debug(f"{log_prefix} Returning from step_3: {result_to_return.keys()}, filtered_content length: {len(filtered_content)}")
         self.update_state(state=states.SUCCESS, meta={**result_to_return, 'current_step': '채용공고 내용 필터링이 성공적으로 완료되었습니다.', 'percentage': 100, 'pipeline_step': 'CONTENT_FILTERING_SUCCESS'})
         return result_to_return
 
+    except Retry:
+        # 진행 중인 동일 내용 필터링을 기다리는 재시도 예약 (실패가 아님)
+        raise
     except Exception as e:
         logger.error(f"{log_prefix} Error filtering with LLM: {e}", exc_info=True)
         if filtered_text_file_path and os.path.exists(filtered_text_file_path):
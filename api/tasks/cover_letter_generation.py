@@ -1,18 +1,27 @@
 from api.celery_app import celery_app
 import logging
 import os
+import time
 import traceback
 from celery.exceptions import MaxRetriesExceededError, Reject
 from celery import states
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from api.utils.file_utils import sanitize_filename, try_format_log, get_datetime_prefix, save_content_to_file
+from api.utils.progress_reporter import ProgressReporter
+from api.utils.checkpoints import STEP_GENERATE_COVER_LETTER, checkpointed
+from api.utils.cancellation import cancellable
 from api.utils.celery_utils import _update_root_task_state, get_detailed_error_info
-from api.generate_cover_letter_semantic import generate_cover_letter
+from api.generate_cover_letter_semantic import (GenerationContext, generate_from_context, generate_variants_from_context,
+                                                prepare_generation_context)
 from langchain_groq import ChatGroq
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
 from api.core.config import settings
+from api.utils.metrics_utils import observe_duration, observe_value, record_metric
+from api.utils.rate_limiter import estimate_tokens
+from api.utils.generation_context_cache import save_generation_context
+from api.utils.result_cache import store_pipeline_result
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +33,51 @@ except Exception as e:
     logger.error(f"Failed to load ChatGroq model during module initialization: {e}")
     llm = None
 
+def _generate_drafts(prev_result: Dict[str, Any], filtered_content: str, user_prompt_text: Optional[str], variants: int,
+                     generation_stats: Dict[str, Any], root_task_id: str) -> List[str]:
+    """검색 컨텍스트를 준비(또는 재사용)하고 초안 variants개를 생성합니다. 컨텍스트는 다시 생성 요청을 위해 보관합니다."""
+    cached_context = prev_result.get("generation_context")
+    if cached_context and prev_result.get("generation_context_prompt") == user_prompt_text:
+        generation_context = GenerationContext.from_dict(cached_context)
+        generation_stats["generation_path"] = generation_context.path
+        generation_stats["generation_context"] = "reused"
+    else:
+        generation_context = prepare_generation_context(filtered_content, user_prompt_text, generation_stats,
+                                                        job_digest=prev_result.get("job_digest"))
+        if generation_context is None:
+            return [""]
+    save_generation_context(root_task_id, filtered_content, user_prompt_text, generation_context.to_dict(),
+                            original_url=prev_result.get("original_url"))
+
+    # 경로(direct/rag/digest)별 프롬프트 크기와 생성 지연 비교용 지표
+    prompt_tokens = estimate_tokens(generation_context.query) + generation_context.context_tokens
+    generation_stats["variants"] = variants
+    generation_stats["prompt_tokens"] = prompt_tokens
+    observe_value("generation_prompt_tokens", prompt_tokens, path=generation_context.path)
+    started = time.perf_counter()
+    if variants <= 1:
+        drafts = [generate_from_context(generation_context)]
+    else:
+        drafts = generate_variants_from_context(generation_context, variants)
+    generation_seconds = time.perf_counter() - started
+    generation_stats["generation_seconds"] = round(generation_seconds, 3)
+    observe_duration("generation_llm_seconds", generation_seconds, path=generation_context.path)
+    return drafts
+
+
 @celery_app.task(bind=True, name='celery_tasks.step_4_generate_cover_letter', max_retries=1, default_retry_delay=20)
-def step_4_generate_cover_letter(self, prev_result: Dict[str, Any], chain_log_id: str, user_prompt_text: Optional[str]) -> Dict[str, Any]:
-    """Celery 작업: 필터링된 텍스트와 사용자 프롬프트를 기반으로 자기소개서를 생성하고 저장합니다."""
+@checkpointed(STEP_GENERATE_COVER_LETTER)
+@cancellable(STEP_GENERATE_COVER_LETTER)
+def step_4_generate_cover_letter(self, prev_result: Dict[str, Any], chain_log_id: str, user_prompt_text: Optional[str],
+                                 variants: int = 1) -> Dict[str, Any]:
+    """Celery 작업: 필터링된 텍스트와 사용자 프롬프트를 기반으로 자기소개서를 생성하고 저장합니다.
+
+    variants > 1 이면 검색은 한 번만 하고 샘플링 설정을 달리한 초안을 동시에 생성합니다.
+    prev_result에 generation_context가 있으면 (다시 생성 요청) 같은 프롬프트일 때 검색을 건너뜁니다."""
     task_id = self.request.id
     root_task_id = chain_log_id
     log_prefix = f"[Task {task_id} / Root {root_task_id} / Step 4_generate_cover_letter]"
+    progress = ProgressReporter(self, root_task_id)
     logger.info(f"{log_prefix} ---------- Task started. Received prev_result: { {k: (v[:100] + '...' if isinstance(v, str) and len(v) > 100 else v) for k, v in prev_result.items()} }, User Prompt: {'Provided' if user_prompt_text else 'Not provided'} ----------")
 
     filtered_content = prev_result.get("filtered_content")
@@ -57,41 +105,37 @@ def step_4_generate_cover_letter(self, prev_result: Dict[str, Any], chain_log_id
     try:
         logger.info(f"{log_prefix} Starting cover letter generation. Filtered text length: {len(filtered_content)}, User prompt: {'Yes' if user_prompt_text else 'No'}. Associated filtered_text_file_path for logging: {filtered_text_file_path}")
         # 작업 시작 시 상태 업데이트 (진행률 0%)
-        self.update_state(state='PROGRESS', meta={'current_step': '자기소개서 생성 준비 중입니다.', 'percentage': 0, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_GENERATION_STARTED'})
-        _update_root_task_state(
-            root_task_id=root_task_id, 
-            state=states.STARTED, # STARTED 상태 유지 또는 PROGRESS로 변경 가능
-            meta={
-                'current_step': '맞춤형 자기소개서 생성을 시작합니다...',
-                'status_message': "(4_generate_cover_letter) 자기소개서 생성 시작", 
-                'user_prompt': bool(user_prompt_text), 
-                'current_task_id': task_id,
-                'pipeline_step': 'COVER_LETTER_GENERATION_STARTED',
-                'percentage': 5 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '맞춤형 자기소개서 생성을 시작합니다...',
+            'status_message': "(4_generate_cover_letter) 자기소개서 생성 시작", 
+            'user_prompt': bool(user_prompt_text), 
+            'current_task_id': task_id,
+            'pipeline_step': 'COVER_LETTER_GENERATION_STARTED',
+            'percentage': 5 # 예시 진행률
+        }, task_meta={'current_step': '자기소개서 생성 준비 중입니다.', 'percentage': 0, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_GENERATION_STARTED'})
 
         # LLM 호출 전 상태 업데이트 (진행률 30%)
-        self.update_state(state='PROGRESS', meta={'current_step': '핵심 내용 분석 및 자기소개서 초안 작성 중...', 'percentage': 30, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_GENERATION_LLM_INPUT_PREP'})
-        _update_root_task_state(
-            root_task_id=root_task_id,
-            state=states.STARTED,
-            meta={
-                'current_step': '핵심 내용 분석 및 자기소개서 초안 작성 중입니다. 잠시만 기다려주세요.',
-                'status_message': "(4_generate_cover_letter) LLM 초안 작성 중",
-                'current_task_id': task_id,
-                'pipeline_step': 'COVER_LETTER_GENERATION_LLM_INPUT_PREP',
-                'percentage': 35 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '핵심 내용 분석 및 자기소개서 초안 작성 중입니다. 잠시만 기다려주세요.',
+            'status_message': "(4_generate_cover_letter) LLM 초안 작성 중",
+            'current_task_id': task_id,
+            'pipeline_step': 'COVER_LETTER_GENERATION_LLM_INPUT_PREP',
+            'percentage': 35 # 예시 진행률
+        }, task_meta={'current_step': '핵심 내용 분석 및 자기소개서 초안 작성 중...', 'percentage': 30, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_GENERATION_LLM_INPUT_PREP'})
 
-        # generate_cover_letter_semantic 모듈의 함수를 직접 호출
-        generated_text_tuple = generate_cover_letter(
-            job_posting_content=filtered_content,
-            prompt=user_prompt_text
-        )
-        cover_letter_text = generated_text_tuple[0] # 첫 번째 요소를 사용
-        # formatted_cv = generated_text_tuple[1] # 포맷팅된 버전, 필요시 사용
+        generation_stats = {}
+        drafts = _generate_drafts(prev_result, filtered_content, user_prompt_text, variants, generation_stats, root_task_id)
+        logger.info(f"{log_prefix} Generation stats: {generation_stats}")
+        record_metric("embedding_provider_calls_total", generation_stats.get("embedding_provider_calls", 0))
+        record_metric("embedding_cache_hits_total", generation_stats.get("embedding_cache_hits", 0))
+        record_metric("generation_path_total", path=generation_stats.get("generation_path", "unknown"))
+        if generation_stats.get("estimated_rag_seconds_saved"):
+            record_metric("rag_bypass_seconds_saved_total", generation_stats["estimated_rag_seconds_saved"])
+        if generation_stats.get("vector_index"):
+            record_metric("vector_index_lookups_total", result=generation_stats["vector_index"])
+        # 유효한 초안만 남기고 첫 번째를 대표 결과로 사용
+        valid_drafts = [d for d in drafts if d and "생성 실패" not in d and len(d) >= 50]
+        cover_letter_text = valid_drafts[0] if valid_drafts else drafts[0]
         
         # cover_letter_text 결과 유효성 검사 강화
         if not cover_letter_text or "생성 실패" in cover_letter_text or len(cover_letter_text) < 50: # 최소 길이 조건 추가
@@ -115,18 +159,13 @@ def step_4_generate_cover_letter(self, prev_result: Dict[str, Any], chain_log_id
 
         logger.info(f"{log_prefix} 자기소개서 생성 성공 (길이: {len(cover_letter_text)}) ")
         # LLM 호출 성공 후 상태 업데이트 (진행률 70%)
-        self.update_state(state='PROGRESS', meta={'current_step': '자기소개서 초안이 완성되었습니다. 최종 검토 및 저장을 진행합니다.', 'percentage': 70, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_LLM_COMPLETED'})
-        _update_root_task_state(
-            root_task_id=root_task_id,
-            state=states.STARTED,
-            meta={
-                'current_step': '자기소개서 초안이 완성되었습니다. 최종 검토 및 저장을 진행합니다...',
-                'status_message': "(4_generate_cover_letter) LLM 생성 완료, 저장 준비 중",
-                'current_task_id': task_id,
-                'pipeline_step': 'COVER_LETTER_LLM_COMPLETED',
-                'percentage': 75 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '자기소개서 초안이 완성되었습니다. 최종 검토 및 저장을 진행합니다...',
+            'status_message': "(4_generate_cover_letter) LLM 생성 완료, 저장 준비 중",
+            'current_task_id': task_id,
+            'pipeline_step': 'COVER_LETTER_LLM_COMPLETED',
+            'percentage': 75 # 예시 진행률
+        }, task_meta={'current_step': '자기소개서 초안이 완성되었습니다. 최종 검토 및 저장을 진행합니다.', 'percentage': 70, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_LLM_COMPLETED'})
 
         # 파일 저장 경로 및 이름 생성 (sanitize_filename 사용)
         # base_fn = os.path.splitext(os.path.basename(filtered_text_file_path))[0].replace("_filtered_text", "") if filtered_text_file_path != 'N/A' else sanitize_filename(original_url, ensure_unique=False)
@@ -143,19 +182,14 @@ def step_4_generate_cover_letter(self, prev_result: Dict[str, Any], chain_log_id
             f.write(cover_letter_text)
         logger.info(f"{log_prefix} 생성된 자기소개서 파일 저장 완료: {cover_letter_file_path}")
         # 파일 저장 후 상태 업데이트 (진행률 90%)
-        self.update_state(state='PROGRESS', meta={'current_step': '생성된 자기소개서를 안전하게 저장했습니다.', 'percentage': 90, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_SAVED'})
-        _update_root_task_state(
-            root_task_id=root_task_id,
-            state=states.STARTED, # SUCCESS 전 마지막 PROGRESS
-            meta={
-                'current_step': '자기소개서가 저장되었습니다. 최종 결과를 정리합니다.',
-                'status_message': "(4_generate_cover_letter) 파일 저장 완료",
-                'cover_letter_file_path': cover_letter_file_path,
-                'current_task_id': task_id,
-                'pipeline_step': 'COVER_LETTER_SAVED',
-                'percentage': 95 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '자기소개서가 저장되었습니다. 최종 결과를 정리합니다.',
+            'status_message': "(4_generate_cover_letter) 파일 저장 완료",
+            'cover_letter_file_path': cover_letter_file_path,
+            'current_task_id': task_id,
+            'pipeline_step': 'COVER_LETTER_SAVED',
+            'percentage': 95 # 예시 진행률
+        }, task_meta={'current_step': '생성된 자기소개서를 안전하게 저장했습니다.', 'percentage': 90, 'current_task_id': task_id, 'pipeline_step': 'COVER_LETTER_SAVED'})
 
         # 최종 결과 업데이트
         final_result = {
@@ -166,8 +200,16 @@ def step_4_generate_cover_letter(self, prev_result: Dict[str, Any], chain_log_id
             "chain_log_id": chain_log_id,
             "status_message": "자기소개서 생성 완료",
             "current_step": "자기소개서 생성이 성공적으로 완료되었습니다!",
+            "generation_stats": generation_stats,
             "pipeline_step": "COVER_LETTER_GENERATION_COMPLETED" # 최종 단계 명시
         }
+        if variants > 1:
+            final_result["cover_letter_variants"] = valid_drafts
+        if prev_result.get("regenerated_from"):
+            final_result["regenerated_from"] = prev_result["regenerated_from"]
+        elif settings.RESULT_CACHE_ENABLED and original_url != 'N/A':
+            # 같은 (URL, 사용자 스토리) 재요청 시 파이프라인 없이 바로 돌려주기 위해 보관
+            store_pipeline_result(original_url, user_prompt_text, variants, filtered_content, final_result, root_task_id)
         # 최종 성공 상태 업데이트 (진행률 100%)
         self.update_state(state=states.SUCCESS, meta=final_result) # 여기서는 final_result에 percentage: 100 추가해도 좋음
         _update_root_task_state(
@@ -1,6 +1,6 @@
 from api.celery_app import celery_app
 import logging
-from playwright.sync_api import sync_playwright, Error as PlaywrightError
+from playwright.sync_api import Error as PlaywrightError
 import os
 import hashlib
 import uuid
@@ -9,54 +9,49 @@ from celery.exceptions import MaxRetriesExceededError, Reject
 from celery import states
 from typing import Dict
 from api.utils.playwright_utils import (_get_playwright_page_content_with_iframes_processed,
-                               DEFAULT_PAGE_TIMEOUT, PAGE_NAVIGATION_TIMEOUT)
+                               DEFAULT_PAGE_TIMEOUT, PAGE_NAVIGATION_TIMEOUT,
+                               launch_browser, playwright_session, release_browser)
 from api.utils.file_utils import sanitize_filename, try_format_log
+from api.utils.progress_reporter import ProgressReporter
+from api.utils.checkpoints import STEP_EXTRACT_HTML, checkpointed
+from api.utils.cancellation import cancellable
+from api.utils.deadlines import PipelineDeadlineExceeded, budget_timeout_ms, deadline_passed
 from api.utils.celery_utils import _update_root_task_state
 
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True, name='celery_tasks.step_1_extract_html', max_retries=1, default_retry_delay=10)
+@checkpointed(STEP_EXTRACT_HTML)
+@cancellable(STEP_EXTRACT_HTML)
 def step_1_extract_html(self, url: str, chain_log_id: str) -> Dict[str, str]:
     logger.info("GLOBAL_ENTRY_POINT: step_1_extract_html function called.")
     task_id = self.request.id
     log_prefix = f"[Task {task_id} / Root {chain_log_id} / Step 1_extract_html]"
+    progress = ProgressReporter(self, chain_log_id)
     logger.info(f"{log_prefix} ---------- Task started. URL: {url} ----------")
     logger.debug(f"{log_prefix} Input URL: {url}, Chain Log ID: {chain_log_id}")
 
     # 작업 시작 시 상태 업데이트 (진행률 0%)
-    self.update_state(state='PROGRESS', meta={'current_step': '채용공고 페이지 분석을 시작합니다...', 'percentage': 0, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_INITIATED'})
-    _update_root_task_state(
-        root_task_id=chain_log_id,
-        state=states.STARTED,
-        meta={
-            'current_step': '채용공고 분석 준비 중... (HTML 추출 단계 시작)',
-            'status_message': f"(1_extract_html) HTML 추출 시작: {url}", 
-            'current_task_id': str(task_id), 
-            'url_for_step1': url,
-            'pipeline_step': 'EXTRACT_HTML_INITIATED',
-            'percentage': 2 # 예시 진행률
-        }
-    )
+    progress.report(states.STARTED, {
+        'current_step': '채용공고 분석 준비 중... (HTML 추출 단계 시작)',
+        'status_message': f"(1_extract_html) HTML 추출 시작: {url}", 
+        'current_task_id': str(task_id), 
+        'url_for_step1': url,
+        'pipeline_step': 'EXTRACT_HTML_INITIATED',
+        'percentage': 2 # 예시 진행률
+    }, task_meta={'current_step': '채용공고 페이지 분석을 시작합니다...', 'percentage': 0, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_INITIATED'})
 
     html_file_path = ""
     try:
         logger.info(f"{log_prefix} Initializing Playwright...")
         # Playwright 초기화 중 상태 업데이트 (진행률 5%)
-        self.update_state(state='PROGRESS', meta={'current_step': '페이지 분석 도구를 준비하고 있습니다...', 'percentage': 5, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_PLAYWRIGHT_INIT'})
-        _update_root_task_state(
-            root_task_id=chain_log_id, state=states.STARTED,
-            meta={'current_step': '채용공고 페이지 분석 도구를 준비하고 있습니다...', 'pipeline_step': 'EXTRACT_HTML_PLAYWRIGHT_INIT', 'percentage': 7}
-        )
-        with sync_playwright() as p:
+        progress.report(states.STARTED, {'current_step': '채용공고 페이지 분석 도구를 준비하고 있습니다...', 'pipeline_step': 'EXTRACT_HTML_PLAYWRIGHT_INIT', 'percentage': 7}, task_meta={'current_step': '페이지 분석 도구를 준비하고 있습니다...', 'percentage': 5, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_PLAYWRIGHT_INIT'})
+        with playwright_session() as p:
             logger.info(f"{log_prefix} Playwright initialized. Launching browser...")
             # 브라우저 실행 중 상태 업데이트 (진행률 10%)
-            self.update_state(state='PROGRESS', meta={'current_step': '가상 브라우저를 실행하여 페이지에 접속 준비 중입니다...', 'percentage': 10, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_BROWSER_LAUNCHING'})
-            _update_root_task_state(
-                root_task_id=chain_log_id, state=states.STARTED,
-                meta={'current_step': '채용공고 페이지를 열기 위해 가상 브라우저를 실행 중입니다...', 'pipeline_step': 'EXTRACT_HTML_BROWSER_LAUNCHING', 'percentage': 12}
-            )
+            progress.report(states.STARTED, {'current_step': '채용공고 페이지를 열기 위해 가상 브라우저를 실행 중입니다...', 'pipeline_step': 'EXTRACT_HTML_BROWSER_LAUNCHING', 'percentage': 12}, task_meta={'current_step': '가상 브라우저를 실행하여 페이지에 접속 준비 중입니다...', 'percentage': 10, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_BROWSER_LAUNCHING'})
             try:
-                browser = p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage'])
+                browser = launch_browser(p) # 워커 프로세스의 공유 브라우저가 있으면 재사용
                 logger.info(f"{log_prefix} Browser launched.")
             except Exception as e_browser:
                 logger.error(f"{log_prefix} Error launching browser: {e_browser}", exc_info=True)
@@ -80,37 +75,30 @@ def step_1_extract_html(self, url: str, chain_log_id: str) -> Dict[str, str]:
 
             try:
                 page = browser.new_page()
-                logger.info(f"{log_prefix} New page created. Setting default timeout to {DEFAULT_PAGE_TIMEOUT}ms.")
-                page.set_default_timeout(DEFAULT_PAGE_TIMEOUT)
-                page.set_default_navigation_timeout(PAGE_NAVIGATION_TIMEOUT)
+                # 파이프라인 마감이 가까우면 남은 시간으로 페이지 타임아웃을 줄임
+                page_timeout = budget_timeout_ms(DEFAULT_PAGE_TIMEOUT)
+                logger.info(f"{log_prefix} New page created. Setting default timeout to {page_timeout}ms.")
+                page.set_default_timeout(page_timeout)
+                page.set_default_navigation_timeout(budget_timeout_ms(PAGE_NAVIGATION_TIMEOUT))
                 
                 logger.info(f"{log_prefix} Navigating to URL: {url}")
                 # 페이지 이동 중 상태 업데이트 (진행률 20%)
-                self.update_state(state='PROGRESS', meta={'current_step': '채용공고 페이지에 접속하고 있습니다...', 'percentage': 20, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_PAGE_NAVIGATING'})
-                _update_root_task_state(
-                    root_task_id=chain_log_id, state=states.STARTED,
-                    meta={'current_step': '채용공고 페이지에 접속하고 있습니다...', 'pipeline_step': 'EXTRACT_HTML_PAGE_NAVIGATING', 'percentage': 22}
-                )
+                progress.report(states.STARTED, {'current_step': '채용공고 페이지에 접속하고 있습니다...', 'pipeline_step': 'EXTRACT_HTML_PAGE_NAVIGATING', 'percentage': 22}, task_meta={'current_step': '채용공고 페이지에 접속하고 있습니다...', 'percentage': 20, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_PAGE_NAVIGATING'})
                 page.goto(url, wait_until="domcontentloaded")
                 logger.info(f"{log_prefix} Successfully navigated to URL. Current page URL: {page.url}")
 
                 logger.info(f"{log_prefix} iframe 처리 및 페이지 내용 가져오기 시작.")
                 # 페이지 내용 가져오는 중 상태 업데이트 (진행률 40%)
-                self.update_state(state='PROGRESS', meta={'current_step': '페이지의 전체 내용을 로드하고 있습니다. (iframe 포함)', 'percentage': 40, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_GETTING_CONTENT'})
-                _update_root_task_state(
-                    root_task_id=chain_log_id, state=states.STARTED,
-                    meta={'current_step': '채용공고 페이지의 전체 내용을 불러오는 중입니다...', 'pipeline_step': 'EXTRACT_HTML_GETTING_CONTENT', 'percentage': 42}
-                )
+                progress.report(states.STARTED, {'current_step': '채용공고 페이지의 전체 내용을 불러오는 중입니다...', 'pipeline_step': 'EXTRACT_HTML_GETTING_CONTENT', 'percentage': 42}, task_meta={'current_step': '페이지의 전체 내용을 로드하고 있습니다. (iframe 포함)', 'percentage': 40, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_GETTING_CONTENT'})
                 page_content = _get_playwright_page_content_with_iframes_processed(page, url, chain_log_id, str(task_id))
                 logger.info(f"{log_prefix} 페이지 내용 가져오기 완료 (길이: {len(page_content)}).")
                 # 내용 가져오기 완료 후 상태 업데이트 (진행률 70%)
-                self.update_state(state='PROGRESS', meta={'current_step': '페이지 내용 로드 완료. 분석을 위해 저장합니다.', 'percentage': 70, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_CONTENT_LOADED'})
-                _update_root_task_state(
-                    root_task_id=chain_log_id, state=states.STARTED,
-                    meta={'current_step': '페이지 내용 로드가 완료되었습니다. 추출된 내용을 저장합니다.', 'pipeline_step': 'EXTRACT_HTML_CONTENT_LOADED', 'percentage': 72}
-                )
+                progress.report(states.STARTED, {'current_step': '페이지 내용 로드가 완료되었습니다. 추출된 내용을 저장합니다.', 'pipeline_step': 'EXTRACT_HTML_CONTENT_LOADED', 'percentage': 72}, task_meta={'current_step': '페이지 내용 로드 완료. 분석을 위해 저장합니다.', 'percentage': 70, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_CONTENT_LOADED'})
 
             except PlaywrightError as e_playwright:
+                # 남은 시간으로 줄인 타임아웃이 마감에 걸린 경우: 실패가 아닌 마감 초과로 중단
+                if deadline_passed():
+                    raise PipelineDeadlineExceeded() from e_playwright
                 error_message = f"Playwright operation failed: {e_playwright}"
                 logger.error(f"{log_prefix} {error_message} (URL: {url})", exc_info=True)
                 # 실패 상태 업데이트
@@ -151,22 +139,18 @@ def step_1_extract_html(self, url: str, chain_log_id: str) -> Dict[str, str]:
                 )
                 raise Reject(error_message, requeue=False)
             finally:
-                logger.info(f"{log_prefix} Closing browser.")
+                logger.info(f"{log_prefix} Releasing browser.")
                 if 'browser' in locals() and browser:
                     try:
-                        browser.close()
-                        logger.info(f"{log_prefix} Browser closed successfully.")
+                        release_browser(browser)
+                        logger.info(f"{log_prefix} Browser released successfully.")
                     except Exception as e_close:
                         logger.warning(f"{log_prefix} Error closing browser: {e_close}", exc_info=True)
                 logger.info(f"{log_prefix} Playwright context cleanup finished.")
         
         logger.info(f"{log_prefix} Playwright operations complete.")
         # 파일 저장 중 상태 업데이트 (진행률 80%)
-        self.update_state(state='PROGRESS', meta={'current_step': '추출된 페이지 내용을 파일로 저장하고 있습니다...', 'percentage': 80, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_SAVING_CONTENT'})
-        _update_root_task_state(
-            root_task_id=chain_log_id, state=states.STARTED,
-            meta={'current_step': '추출된 채용공고 내용을 저장하고 있습니다...', 'pipeline_step': 'EXTRACT_HTML_SAVING_CONTENT', 'percentage': 82}
-        )
+        progress.report(states.STARTED, {'current_step': '추출된 채용공고 내용을 저장하고 있습니다...', 'pipeline_step': 'EXTRACT_HTML_SAVING_CONTENT', 'percentage': 82}, task_meta={'current_step': '추출된 페이지 내용을 파일로 저장하고 있습니다...', 'percentage': 80, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_SAVING_CONTENT'})
 
         os.makedirs("logs", exist_ok=True)
         filename_base = sanitize_filename(url, ensure_unique=False)
@@ -187,19 +171,14 @@ def step_1_extract_html(self, url: str, chain_log_id: str) -> Dict[str, str]:
             result_data_for_log['page_content'] = f"<page_content_omitted_from_log, length={page_content_len}>"
 
         # 파일 저장 완료 및 다음 단계 준비 상태 업데이트 (진행률 90%)
-        self.update_state(state='PROGRESS', meta={'current_step': '페이지 내용 저장 완료. 다음 분석 단계를 준비합니다.', 'percentage': 90, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_COMPLETED'})
-        _update_root_task_state(
-            root_task_id=chain_log_id,
-            state=states.STARTED, # SUCCESS 전 마지막 PROGRESS
-            meta={
-                'current_step': "채용공고 HTML 추출 완료. 다음 단계로 이동합니다.",
-                'status_message': "(1_extract_html) HTML 추출 및 저장 완료", 
-                'html_file_path': html_file_path,
-                'current_task_id': str(task_id),
-                'pipeline_step': 'EXTRACT_HTML_COMPLETED',
-                'percentage': 95 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': "채용공고 HTML 추출 완료. 다음 단계로 이동합니다.",
+            'status_message': "(1_extract_html) HTML 추출 및 저장 완료", 
+            'html_file_path': html_file_path,
+            'current_task_id': str(task_id),
+            'pipeline_step': 'EXTRACT_HTML_COMPLETED',
+            'percentage': 95 # 예시 진행률
+        }, task_meta={'current_step': '페이지 내용 저장 완료. 다음 분석 단계를 준비합니다.', 'percentage': 90, 'current_task_id': str(task_id), 'pipeline_step': 'EXTRACT_HTML_COMPLETED'}, final=True)
         logger.info(f"{log_prefix} ---------- Task finished successfully. Result for log: {try_format_log(result_data_for_log)} ----------")
         logger.debug(f"{log_prefix} Returning from step_1: keys={list(result_data.keys())}, page_content length: {len(result_data.get('page_content', '')) if result_data.get('page_content') else 0}")
         # 최종 성공 상태 업데이트 (진행률 100%)
@@ -4,11 +4,13 @@ import datetime
 import traceback
 from celery import states, current_task, Celery, chord, group
 from celery.result import AsyncResult
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 from kombu.utils.uuid import uuid
 
-from api.utils.celery_utils import _update_root_task_state
+from api.utils.celery_utils import _update_root_task_state, get_root_task_status
 from api.utils.file_utils import try_format_log
+from api.utils.singleflight import release_work
+from api.utils.prefetch import record_prefetch_finished
 
 logger = logging.getLogger(__name__)
 
@@ -151,10 +153,15 @@ def handle_pipeline_completion(result, root_task_id: str):
 # from .pipeline_callbacks import handle_task_failure_callback, handle_pipeline_completion
 
 @celery_app.task(bind=True, name="celery_tasks.handle_pipeline_completion")
-def handle_pipeline_completion(self, result_or_request_obj: Any, *, root_task_id: str, is_success: bool):
+def handle_pipeline_completion(self, result_or_request_obj: Any, *, root_task_id: str, is_success: bool,
+                               singleflight_key: Optional[str] = None):
     log_prefix = f"[PipelineCompletion / Root {root_task_id} / Task {self.request.id[:4]}]"
     logger.info(f"{log_prefix} 파이프라인 완료 콜백 시작. Success: {is_success}, Result/Request: {try_format_log(result_or_request_obj, max_len=200)}")
 
+    if singleflight_key and not is_success:
+        # 이전 버전이 발행한 메시지 호환용. 락은 실패 상태를 기록할 때 해제됨 (_update_root_task_state)
+        release_work(singleflight_key, root_task_id)
+
     final_status_meta = {
         "pipeline_overall_status": "SUCCESS" if is_success else "FAILURE",
         "completed_at": datetime.datetime.utcnow().isoformat() + "Z",
@@ -175,11 +182,12 @@ def handle_pipeline_completion(self, result_or_request_obj: Any, *, root_task_id
         else:
             logger.warning(f"{log_prefix} 성공 결과가 dict 타입이 아님: {type(result_or_request_obj)}. 자기소개서 텍스트를 저장할 수 없습니다.")
 
-        # SUCCESS 상태의 meta에는 자기소개서 텍스트 또는 상태 메시지만 저장
         result_data_for_state = cover_letter_text_to_store if cover_letter_text_to_store else status_message_to_store
 
-        # meta에 딕셔너리 형태로 저장하여 _update_root_task_state 호출
-        meta_to_store = {'cover_letter_output': result_data_for_state}
+        # SUCCESS는 해시를 통째로 덮어쓰므로 4단계가 기록한 결과(초안 목록, 생성 통계 등)를 함께 저장
+        # (결과 캐시 적중 경로와 같은 형태: 4단계 결과 + cover_letter_output)
+        step_result = result_or_request_obj if isinstance(result_or_request_obj, dict) else {}
+        meta_to_store = {**step_result, 'cover_letter_output': result_data_for_state, 'percentage': 100}
         
         _update_root_task_state(
             root_task_id=root_task_id, 
@@ -194,8 +202,8 @@ def handle_pipeline_completion(self, result_or_request_obj: Any, *, root_task_id
     else:
         logger.error(f"{log_prefix} 파이프라인 실패로 완료됨. Request object (or error info): {try_format_log(result_or_request_obj)}")
         
-        task_result = AsyncResult(root_task_id, app=celery_app)
-        existing_meta = task_result.info if isinstance(task_result.info, dict) else {}
+        _, existing_info = get_root_task_status(root_task_id)
+        existing_meta = existing_info if isinstance(existing_info, dict) else {}
         
         error_details = {
             "status_message": "파이프라인 실패.",
@@ -242,4 +250,24 @@ def handle_pipeline_completion(self, result_or_request_obj: Any, *, root_task_id
         logger.error(f"{log_prefix} Root task {root_task_id} 최종 상태 FAILURE로 업데이트됨 (콜백에 의해). Exception: {current_exc}")
 
     logger.info(f"{log_prefix} 파이프라인 완료 콜백 종료.")
-    return final_status_meta 
\ No newline at end of file
+    return final_status_meta 
+
+@celery_app.task(bind=True, name="celery_tasks.handle_prefetch_completion")
+def handle_prefetch_completion(self, result_or_request_obj: Any, *, prefetch_id: str, singleflight_key: str, is_success: bool):
+    """선행 처리(1~3단계) 종료 콜백. 공유 결과는 3단계가 이미 게시했으므로 상태만 기록합니다.
+
+    실패 시 락 해제와 선행 처리 기록 삭제는 실패 상태를 기록할 때 처리됨 (Reject로 끝나면 이 콜백이 실행되지 않음)."""
+    log_prefix = f"[PrefetchCompletion / Prefetch {prefetch_id}]"
+    if is_success:
+        record_prefetch_finished(singleflight_key, prefetch_id, is_success=True)
+    else:
+        logger.warning(f"{log_prefix} 선행 처리 실패: {try_format_log(result_or_request_obj)}")
+    _update_root_task_state(
+        root_task_id=prefetch_id,
+        state=states.SUCCESS if is_success else states.FAILURE,
+        meta={
+            'current_step': '채용공고 분석을 미리 완료했습니다.' if is_success else '채용공고 선행 분석에 실패했습니다.',
+            'prefetch': True,
+        }
+    )
+    logger.info(f"{log_prefix} 선행 처리 종료. Success: {is_success}")
@@ -0,0 +1,66 @@
+from api.celery_app import celery_app
+import logging
+from celery import chain, states
+from typing import Dict, Any
+
+from api.core.config import settings
+from api.tasks.html_extraction import step_1_extract_html
+from api.tasks.text_extraction import step_2_extract_text
+from api.tasks.content_filtering import step_3_filter_content
+from api.utils.progress_reporter import ProgressReporter
+from api.utils.checkpoints import STEP_FILTER_CONTENT, checkpointed
+from api.utils.cancellation import cancellable
+from api.utils.deadlines import apply_deadline, current_deadline
+from api.utils.celery_utils import _update_root_task_state
+from api.utils.metrics_utils import record_metric
+from api.utils.singleflight import ATTACH_MAX_RETRIES, get_result, is_in_flight
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task(bind=True, name='celery_tasks.step_3_attach_shared_content', max_retries=ATTACH_MAX_RETRIES,
+                 default_retry_delay=settings.SINGLEFLIGHT_POLL_INTERVAL_SECONDS)
+@checkpointed(STEP_FILTER_CONTENT)
+@cancellable(STEP_FILTER_CONTENT)
+def step_3_attach_shared_content(self, url: str, singleflight_key: str, leader_task_id: str, chain_log_id: str) -> Dict[str, Any]:
+    """(1~3단계 대체) 같은 URL을 처리 중인 리더 파이프라인의 3단계 결과를 받아 4단계로 넘깁니다.
+
+    리더가 결과 없이 끝나면 (실패, 락 만료) 스스로 1~3단계를 실행하도록 자신을 교체합니다."""
+    task_id = self.request.id
+    log_prefix = f"[Task {task_id} / Root {chain_log_id} / Step 3_attach_shared_content]"
+    progress = ProgressReporter(self, chain_log_id)
+
+    if self.request.retries == 0:
+        logger.info(f"{log_prefix} Attaching to in-flight work of leader {leader_task_id} for URL: {url}")
+        progress.report(states.STARTED, {
+            'current_step': '동일한 채용공고를 분석 중인 작업이 있어 그 결과를 함께 사용합니다...',
+            'status_message': f"(3_attach_shared_content) 진행 중인 동일 공고 작업에 합류 (리더: {leader_task_id})",
+            'current_task_id': task_id,
+            'pipeline_step': 'SHARED_CONTENT_WAITING',
+            'percentage': 10
+        })
+
+    shared_result = get_result(singleflight_key)
+    if shared_result is not None:
+        record_metric("singleflight_attached_total", stage="url")
+        logger.info(f"{log_prefix} Shared step 3 result received after {self.request.retries} retries. Proceeding to step 4.")
+        progress.report(states.STARTED, {
+            'current_step': '핵심 채용공고 내용 선별 완료. 자기소개서 생성을 준비합니다...',
+            'status_message': "(3_attach_shared_content) 공유된 필터링 결과 수신",
+            'current_task_id': task_id,
+            'pipeline_step': 'CONTENT_FILTERING_COMPLETED',
+            'percentage': 95
+        }, final=True)
+        return {**shared_result, "original_url": url, "shared_from_task_id": leader_task_id}
+
+    if is_in_flight(singleflight_key):
+        raise self.retry()
+
+    # 리더가 결과 없이 종료됨: 공유 없이 1~3단계를 직접 수행 (체인의 나머지 4단계는 Celery가 이어 붙임)
+    logger.warning(f"{log_prefix} Leader {leader_task_id} finished without a shared result. Running steps 1-3 independently.")
+    record_metric("singleflight_fallbacks_total", stage="url")
+    deadline = current_deadline()
+    raise self.replace(chain(
+        apply_deadline(step_1_extract_html.s(url=url, chain_log_id=chain_log_id), deadline),
+        apply_deadline(step_2_extract_text.s(chain_log_id=chain_log_id), deadline),
+        apply_deadline(step_3_filter_content.s(chain_log_id=chain_log_id), deadline)
+    ))
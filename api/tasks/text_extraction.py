@@ -7,17 +7,23 @@ import traceback
 from celery import states
 from typing import Dict
 from api.utils.file_utils import sanitize_filename, try_format_log
+from api.utils.progress_reporter import ProgressReporter
+from api.utils.checkpoints import STEP_EXTRACT_TEXT, checkpointed
+from api.utils.cancellation import cancellable
 from api.utils.celery_utils import _update_root_task_state
 from celery.exceptions import MaxRetriesExceededError, Reject
 
 logger = logging.getLogger(__name__)
 
 @celery_app.task(bind=True, name='celery_tasks.step_2_extract_text', max_retries=1, default_retry_delay=5)
+@checkpointed(STEP_EXTRACT_TEXT)
+@cancellable(STEP_EXTRACT_TEXT)
 def step_2_extract_text(self, prev_result: Dict[str, str], chain_log_id: str) -> Dict[str, str]:
     """(2단계) 저장된 HTML 파일에서 텍스트를 추출하여 새 파일에 저장합니다."""
     task_id = self.request.id
     step_log_id = "2_extract_text"
     log_prefix = f"[Task {task_id} / Root {chain_log_id} / Step {step_log_id}]"
+    progress = ProgressReporter(self, chain_log_id)
     logger.info(f"{log_prefix} ---------- Task started. Received prev_result_keys: {list(prev_result.keys()) if isinstance(prev_result, dict) else type(prev_result)} ----------")
 
     if not isinstance(prev_result, dict) or 'page_content' not in prev_result or 'html_file_path' not in prev_result or 'original_url' not in prev_result:
@@ -61,49 +67,34 @@ def step_2_extract_text(self, prev_result: Dict[str, str], chain_log_id: str) ->
             base_html_fn_for_saving = re.sub(r'_raw_html_[a-f0-9]{8}_[a-f0-9]{8}$', '', base_html_fn_for_saving)
 
         logger.info(f"{log_prefix} Starting text extraction from page_content (length: {len(html_content)})")
-        self.update_state(state='PROGRESS', meta={'current_step': '텍스트 추출을 준비 중입니다.', 'percentage': 0, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_STARTED'})
-        _update_root_task_state(
-            root_task_id=chain_log_id, 
-            state=states.STARTED,
-            meta={
-                'current_step': '추출된 HTML 내용에서 텍스트 정보를 분석하고 있습니다...',
-                'status_message': f"({step_log_id}) HTML 내용에서 텍스트 추출 시작", 
-                'current_task_id': task_id, 
-                'pipeline_step': 'TEXT_EXTRACTION_STARTED',
-                'percentage': 5 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '추출된 HTML 내용에서 텍스트 정보를 분석하고 있습니다...',
+            'status_message': f"({step_log_id}) HTML 내용에서 텍스트 추출 시작", 
+            'current_task_id': task_id, 
+            'pipeline_step': 'TEXT_EXTRACTION_STARTED',
+            'percentage': 5 # 예시 진행률
+        }, task_meta={'current_step': '텍스트 추출을 준비 중입니다.', 'percentage': 0, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_STARTED'})
 
         logger.debug(f"{log_prefix} HTML content from prev_result successfully received (length verified as {len(html_content)}).")
         
         logger.debug(f"{log_prefix} Initializing BeautifulSoup parser.")
-        self.update_state(state='PROGRESS', meta={'current_step': 'HTML 분석기를 초기화하고 있습니다.', 'percentage': 10, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_BS_INIT'})
-        _update_root_task_state(
-            root_task_id=chain_log_id,
-            state=states.STARTED,
-            meta={
-                'current_step': 'HTML 구조 분석을 준비하고 있습니다...',
-                'status_message': f"({step_log_id}) HTML 파서 초기화 중",
-                'current_task_id': task_id,
-                'pipeline_step': 'TEXT_EXTRACTION_BS_INIT',
-                'percentage': 12 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': 'HTML 구조 분석을 준비하고 있습니다...',
+            'status_message': f"({step_log_id}) HTML 파서 초기화 중",
+            'current_task_id': task_id,
+            'pipeline_step': 'TEXT_EXTRACTION_BS_INIT',
+            'percentage': 12 # 예시 진행률
+        }, task_meta={'current_step': 'HTML 분석기를 초기화하고 있습니다.', 'percentage': 10, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_BS_INIT'})
         soup = BeautifulSoup(html_content, "html.parser")
         logger.info(f"{log_prefix} BeautifulSoup initialized.")
 
-        self.update_state(state='PROGRESS', meta={'current_step': 'HTML에서 불필요한 태그(스크립트, 스타일 등)를 제거 중입니다...', 'percentage': 20, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_TAG_CLEANUP'})
-        _update_root_task_state(
-            root_task_id=chain_log_id,
-            state=states.STARTED,
-            meta={
-                'current_step': 'HTML 문서 정제 중 (스크립트, 스타일 제거 등)...',
-                'status_message': f"({step_log_id}) 불필요 태그 제거 중",
-                'current_task_id': task_id,
-                'pipeline_step': 'TEXT_EXTRACTION_TAG_CLEANUP',
-                'percentage': 22 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': 'HTML 문서 정제 중 (스크립트, 스타일 제거 등)...',
+            'status_message': f"({step_log_id}) 불필요 태그 제거 중",
+            'current_task_id': task_id,
+            'pipeline_step': 'TEXT_EXTRACTION_TAG_CLEANUP',
+            'percentage': 22 # 예시 진행률
+        }, task_meta={'current_step': 'HTML에서 불필요한 태그(스크립트, 스타일 등)를 제거 중입니다...', 'percentage': 20, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_TAG_CLEANUP'})
 
         logger.debug(f"{log_prefix} Removing comments.")
         comments_removed_count = 0
@@ -123,18 +114,13 @@ def step_2_extract_text(self, prev_result: Dict[str, str], chain_log_id: str) ->
         
         target_soup_object = soup
 
-        self.update_state(state='PROGRESS', meta={'current_step': '정제된 HTML에서 텍스트를 추출하고 있습니다...', 'percentage': 40, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_GET_TEXT'})
-        _update_root_task_state(
-            root_task_id=chain_log_id,
-            state=states.STARTED,
-            meta={
-                'current_step': '정제된 HTML에서 주요 텍스트를 추출합니다...',
-                'status_message': f"({step_log_id}) 텍스트 추출 중",
-                'current_task_id': task_id,
-                'pipeline_step': 'TEXT_EXTRACTION_GET_TEXT',
-                'percentage': 42 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '정제된 HTML에서 주요 텍스트를 추출합니다...',
+            'status_message': f"({step_log_id}) 텍스트 추출 중",
+            'current_task_id': task_id,
+            'pipeline_step': 'TEXT_EXTRACTION_GET_TEXT',
+            'percentage': 42 # 예시 진행률
+        }, task_meta={'current_step': '정제된 HTML에서 텍스트를 추출하고 있습니다...', 'percentage': 40, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_GET_TEXT'})
 
         logger.debug(f"{log_prefix} Extracting text with target_soup_object.get_text().")
         text = target_soup_object.get_text(separator="\n", strip=True)
@@ -177,18 +163,13 @@ def step_2_extract_text(self, prev_result: Dict[str, str], chain_log_id: str) ->
             logger.info(f"{log_prefix} Single line text was empty, skipping 50-char formatting.")
             text_formatted = text_single_line
 
-        self.update_state(state='PROGRESS', meta={'current_step': '추출된 텍스트 정제 작업이 완료되었습니다. 결과를 저장합니다.', 'percentage': 70, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_FORMATTING_DONE'})
-        _update_root_task_state(
-            root_task_id=chain_log_id,
-            state=states.STARTED,
-            meta={
-                'current_step': '추출된 텍스트의 줄바꿈 및 공백을 최종 정리했습니다...',
-                'status_message': f"({step_log_id}) 텍스트 포맷팅 완료",
-                'current_task_id': task_id,
-                'pipeline_step': 'TEXT_EXTRACTION_FORMATTING_DONE',
-                'percentage': 72 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '추출된 텍스트의 줄바꿈 및 공백을 최종 정리했습니다...',
+            'status_message': f"({step_log_id}) 텍스트 포맷팅 완료",
+            'current_task_id': task_id,
+            'pipeline_step': 'TEXT_EXTRACTION_FORMATTING_DONE',
+            'percentage': 72 # 예시 진행률
+        }, task_meta={'current_step': '추출된 텍스트 정제 작업이 완료되었습니다. 결과를 저장합니다.', 'percentage': 70, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_FORMATTING_DONE'})
 
         text = text_formatted
         logger.debug(f"{log_prefix} Final extracted text for saving (first 500 chars): {text[:500]}")
@@ -210,19 +191,14 @@ def step_2_extract_text(self, prev_result: Dict[str, str], chain_log_id: str) ->
         with open(extracted_text_file_path, "w", encoding="utf-8") as f:
             f.write(text)
         logger.info(f"{log_prefix} Text extracted and saved to: {extracted_text_file_path} (Final Length: {len(text)}) ")
-        self.update_state(state='PROGRESS', meta={'current_step': '추출된 텍스트를 안전하게 저장했습니다.', 'percentage': 90, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_SAVED'})
-        _update_root_task_state(
-            root_task_id=chain_log_id,
-            state=states.STARTED, # SUCCESS 전 마지막 PROGRESS
-            meta={
-                'current_step': '텍스트 추출 완료. 불필요한 내용 필터링을 준비 중입니다...',
-                'status_message': f"({step_log_id}) 텍스트 파일 저장 완료", 
-                'text_file_path': extracted_text_file_path, 
-                'current_task_id': task_id, 
-                'pipeline_step': 'TEXT_EXTRACTION_COMPLETED',
-                'percentage': 95 # 예시 진행률
-            }
-        )
+        progress.report(states.STARTED, {
+            'current_step': '텍스트 추출 완료. 불필요한 내용 필터링을 준비 중입니다...',
+            'status_message': f"({step_log_id}) 텍스트 파일 저장 완료", 
+            'text_file_path': extracted_text_file_path, 
+            'current_task_id': task_id, 
+            'pipeline_step': 'TEXT_EXTRACTION_COMPLETED',
+            'percentage': 95 # 예시 진행률
+        }, task_meta={'current_step': '추출된 텍스트를 안전하게 저장했습니다.', 'percentage': 90, 'current_task_id': task_id, 'pipeline_step': 'TEXT_EXTRACTION_SAVED'}, final=True)
         
         result_to_return = {"text_file_path": extracted_text_file_path, 
                              "original_url": original_url, 
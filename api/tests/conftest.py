@@ -0,0 +1,21 @@
+"""테스트는 인메모리 Redis(fakeredis)를 쓰는 로컬 모드(EXECUTION_MODE=local)로 실행합니다.
+
+실행 예:
+    python -m pytest api/tests
+"""
+import os
+
+import pytest
+
+pytest.importorskip("fakeredis")
+# 설정은 import 시점에 읽히므로 api 모듈보다 먼저 지정
+os.environ["EXECUTION_MODE"] = "local"
+
+
+@pytest.fixture
+def client():
+    from api.utils.redis_utils import get_redis_client
+    client = get_redis_client(decode_responses=False)
+    client.flushall()
+    yield client
+    client.flushall()
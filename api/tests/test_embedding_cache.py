@@ -0,0 +1,20 @@
+"""임베딩 캐시 저장소의 개수 상한(LRU 삭제)을 검증합니다."""
+import numpy as np
+
+from api.utils.embedding_cache import EmbeddingCacheStore
+
+
+def test_store_stays_near_max_entries(tmp_path, monkeypatch):
+    store = EmbeddingCacheStore(str(tmp_path / "embeddings.sqlite3"), max_entries=1000)
+    checks = []
+    evict = store._evict_if_needed
+    monkeypatch.setattr(store, "_evict_if_needed", lambda conn: (checks.append(1), evict(conn)))
+
+    for i in range(1500):
+        store.put_many({f"key-{i}": np.zeros(4, dtype=np.float32)})
+
+    count = store._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    assert count <= 1000 + store._check_every
+    assert "key-1499" in store.get_many(["key-1499"])
+    # 매 쓰기가 아니라 확인 간격마다 개수를 셈
+    assert len(checks) <= 1500 // store._check_every + 1
@@ -0,0 +1,50 @@
+"""임베딩 게이트웨이를 스텁 백엔드(HashingEmbeddings)와 인메모리 Redis로 검증합니다."""
+import json
+import time
+
+import numpy as np
+import pytest
+
+from api.benchmarks.bench_utils import HashingEmbeddings
+from api.utils.embedding_gateway import (
+    REQUEST_QUEUE_KEY, EmbeddingGateway, GatewayEmbeddings, _PendingRequest, _reply_key,
+)
+
+
+def test_gateway_round_trip_matches_backend(client):
+    backend = HashingEmbeddings(dim=32)
+    gateway = EmbeddingGateway(backend, max_batch_texts=4, max_wait_ms=5)
+    thread = gateway.start_in_thread(poll_timeout_seconds=0.05)
+    try:
+        embeddings = GatewayEmbeddings(reply_timeout_seconds=5)
+        texts = [f"채용공고 문장 {i}" for i in range(6)]
+        assert np.allclose(embeddings.embed_documents(texts), backend.embed_documents(texts), atol=1e-6)
+        assert np.allclose(embeddings.embed_query("우대 사항"), backend.embed_query("우대 사항"), atol=1e-6)
+    finally:
+        gateway.stop(timeout_seconds=5)
+    assert not thread.is_alive()  # 멈춘 게이트웨이가 다음 테스트의 요청을 가져가지 않음
+    assert gateway.stats["batches"] >= 2  # 6개 문서가 배치 한도 4로 나뉨
+
+
+def test_stale_requests_are_dropped_without_reply(client):
+    gateway = EmbeddingGateway(HashingEmbeddings(dim=8), stale_after_seconds=30)
+    now = time.time()
+    gateway.process([
+        _PendingRequest(request_id="stale", kind="document", texts=["오래된 요청"], enqueued_at=now - 60),
+        _PendingRequest(request_id="fresh", kind="document", texts=["새 요청"], enqueued_at=now),
+    ])
+    assert client.llen(_reply_key("stale")) == 0
+    assert client.llen(_reply_key("fresh")) == 1
+    assert gateway.stats["stale"] == 1
+    assert gateway.stats["texts"] == 1
+
+
+def test_request_queue_is_bounded(client, monkeypatch):
+    from api.core.config import settings
+    monkeypatch.setattr(settings, "EMBEDDING_GATEWAY_MAX_QUEUE_LENGTH", 3)
+    embeddings = GatewayEmbeddings(reply_timeout_seconds=0.1)
+    for i in range(5):
+        with pytest.raises(Exception):
+            embeddings._request([f"text {i}"], "document")  # 게이트웨이가 없으므로 응답 없음
+    queued = [json.loads(payload)["texts"][0] for payload in client.lrange(REQUEST_QUEUE_KEY, 0, -1)]
+    assert queued == ["text 4", "text 3", "text 2"]
@@ -0,0 +1,47 @@
+"""로컬 실행기가 단계 실패를 Celery 모드와 같은 방식으로 처리하는지 검증합니다."""
+import asyncio
+
+from celery.exceptions import Reject
+
+from api.celery_app import celery_app
+from api.utils.local_executor import LocalPipelineExecutor
+
+failure_callbacks = []
+
+
+@celery_app.task(name="tests.rejecting_step")
+def rejecting_step():
+    raise Reject("step already recorded FAILURE", requeue=False)
+
+
+@celery_app.task(name="tests.failing_step")
+def failing_step():
+    raise ValueError("unexpected error")
+
+
+@celery_app.task(name="tests.record_failure")
+def record_failure(exc):
+    failure_callbacks.append(exc)
+
+
+def _run_pipeline(step) -> None:
+    async def _run():
+        executor = LocalPipelineExecutor()
+        executor.start(asyncio.get_running_loop())
+        try:
+            await executor._run("root-local-test", [step.s()], record_failure.s(), record_failure.s())
+        finally:
+            await executor.stop()
+    asyncio.run(_run())
+
+
+def test_rejected_step_does_not_run_failure_callback(client):
+    failure_callbacks.clear()
+    _run_pipeline(rejecting_step)
+    assert failure_callbacks == []
+
+
+def test_failed_step_runs_failure_callback(client):
+    failure_callbacks.clear()
+    _run_pipeline(failing_step)
+    assert len(failure_callbacks) == 1
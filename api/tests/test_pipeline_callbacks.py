@@ -0,0 +1,24 @@
+"""파이프라인 완료 콜백이 4단계가 기록한 최종 결과를 보존하는지 검증합니다."""
+from celery import states
+
+from api.tasks.pipeline_callbacks import handle_pipeline_completion
+from api.utils.celery_utils import _update_root_task_state, get_root_task_status
+
+
+def test_completion_keeps_step_4_result(client):
+    root_task_id = "root-completion-test"
+    step_result = {
+        "cover_letter_text": "첫 번째 초안",
+        "cover_letter_variants": ["첫 번째 초안", "두 번째 초안"],
+        "generation_stats": {"generation_path": "direct"},
+        "status_message": "자기소개서 생성 완료",
+    }
+    # 4단계가 먼저 SUCCESS를 기록한 뒤 link 콜백이 실행됨
+    _update_root_task_state(root_task_id=root_task_id, state=states.SUCCESS, meta={**step_result, "percentage": 100})
+    handle_pipeline_completion.apply(args=(step_result,), kwargs={"root_task_id": root_task_id, "is_success": True})
+
+    state, meta = get_root_task_status(root_task_id)
+    assert state == states.SUCCESS
+    assert meta["cover_letter_output"] == "첫 번째 초안"
+    assert meta["cover_letter_variants"] == ["첫 번째 초안", "두 번째 초안"]
+    assert meta["generation_stats"] == {"generation_path": "direct"}
@@ -0,0 +1,34 @@
+"""레이트 리미터 대기열이 승인되지 않은 대기를 남기지 않는지 검증합니다."""
+import asyncio
+
+import pytest
+
+from api.utils.rate_limiter import ProviderRateLimiter, RateLimitQueueTimeout
+
+
+def _exhausted_limiter() -> ProviderRateLimiter:
+    limiter = ProviderRateLimiter("test", "model", requests_per_minute=1, tokens_per_minute=1000)
+    limiter.acquire(estimated_tokens=1)  # 요청 버킷을 비워 다음 호출은 대기열에서 기다리게 함
+    return limiter
+
+
+def _queue_state(client, limiter: ProviderRateLimiter):
+    return client.zcard(limiter._keys[2]), client.hlen(limiter._keys[3])
+
+
+def test_timed_out_wait_leaves_queue(client):
+    limiter = _exhausted_limiter()
+    with pytest.raises(RateLimitQueueTimeout):
+        limiter.acquire(estimated_tokens=1, max_wait_seconds=0.05)
+    assert _queue_state(client, limiter) == (0, 0)
+
+
+def test_cancelled_async_wait_leaves_queue(client):
+    limiter = _exhausted_limiter()
+
+    async def _cancelled_wait():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.aacquire(estimated_tokens=1, max_wait_seconds=30), timeout=0.2)
+
+    asyncio.run(_cancelled_wait())
+    assert _queue_state(client, limiter) == (0, 0)
@@ -0,0 +1,130 @@
+import logging
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from celery import states
+
+from api.core.config import settings
+from api.utils.metrics_utils import record_metric
+from api.utils.queue_metrics import aget_queue_depths
+from api.utils.redis_utils import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# 진행 중 파이프라인 (멤버: 루트 작업 ID, 점수: 접수 시각)과 최근 완료된 파이프라인의 소요 시간(초) 목록
+INFLIGHT_KEY = "cvf:admission:inflight"
+DURATIONS_KEY = "cvf:admission:durations"
+
+
+@dataclass
+class AdmissionDecision:
+    admitted: bool
+    reason: Optional[str]
+    retry_after_seconds: int
+    estimated_wait_seconds: float
+    inflight: int
+    queue_depth: int
+
+
+def register_inflight(root_task_id: str) -> None:
+    """접수한 파이프라인을 진행 중 목록에 추가합니다 (결과 캐시로 바로 완료된 작업은 제외)."""
+    try:
+        get_redis_client().zadd(INFLIGHT_KEY, {root_task_id: time.time()})
+    except Exception as e:
+        logger.warning(f"[Admission / Root {root_task_id}] Failed to register in-flight pipeline: {e}")
+
+
+def finish_inflight(root_task_id: str, state: str) -> None:
+    """종료된 파이프라인을 진행 중 목록에서 빼고, 성공이면 접수부터 완료까지의 시간을 최근 소요 시간에 추가합니다."""
+    try:
+        client = get_redis_client()
+        pipe = client.pipeline(transaction=True)
+        pipe.zscore(INFLIGHT_KEY, root_task_id)
+        pipe.zrem(INFLIGHT_KEY, root_task_id)
+        submitted_at, removed = pipe.execute()
+        if removed and submitted_at is not None and state == states.SUCCESS:
+            pipe = client.pipeline(transaction=False)
+            pipe.lpush(DURATIONS_KEY, f"{time.time() - float(submitted_at):.3f}")
+            pipe.ltrim(DURATIONS_KEY, 0, settings.ADMISSION_LATENCY_SAMPLES - 1)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"[Admission / Root {root_task_id}] Failed to finish in-flight pipeline: {e}")
+
+
+def _typical_pipeline_seconds(raw_durations: List[Any]) -> float:
+    durations = [float(d) for d in raw_durations]
+    return statistics.median(durations) if durations else settings.ADMISSION_DEFAULT_PIPELINE_SECONDS
+
+
+def _wait_seconds(pipelines_ahead: int, typical_seconds: float) -> float:
+    # 동시에 ADMISSION_PIPELINE_CONCURRENCY개씩 처리된다고 보고 앞선 파이프라인이 빠지는 데 걸리는 시간
+    return (pipelines_ahead // settings.ADMISSION_PIPELINE_CONCURRENCY) * typical_seconds
+
+
+async def acheck_admission(requested: int = 1) -> AdmissionDecision:
+    """큐 길이, 진행 중 파이프라인 수, 최근 파이프라인 소요 시간으로 새 요청(requested개 파이프라인)을 받을지 결정합니다.
+
+    Redis 조회에 실패하면 요청을 받아들입니다."""
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return AdmissionDecision(True, None, 0, 0.0, 0, 0)
+    now = time.time()
+    try:
+        pipe = get_async_redis_client().pipeline(transaction=False)
+        # 종료 상태가 기록되지 않은 채 사라진 파이프라인은 제외
+        pipe.zremrangebyscore(INFLIGHT_KEY, "-inf", now - settings.ADMISSION_INFLIGHT_STALE_SECONDS)
+        pipe.zcard(INFLIGHT_KEY)
+        pipe.lrange(DURATIONS_KEY, 0, -1)
+        _, inflight, raw_durations = await pipe.execute()
+        queue_depth = sum((await aget_queue_depths()).values())
+    except Exception as e:
+        logger.warning(f"[Admission] Failed to read load signals, admitting request: {e}")
+        return AdmissionDecision(True, None, 0, 0.0, 0, 0)
+
+    typical_seconds = _typical_pipeline_seconds(raw_durations)
+    estimated_wait = _wait_seconds(inflight + requested - 1, typical_seconds)
+
+    reason = None
+    overflow = 0
+    if inflight + requested > settings.ADMISSION_MAX_INFLIGHT:
+        reason = "inflight"
+        overflow = inflight + requested - settings.ADMISSION_MAX_INFLIGHT
+    elif queue_depth >= settings.ADMISSION_MAX_QUEUE_DEPTH:
+        reason = "queue_depth"
+        overflow = queue_depth - settings.ADMISSION_MAX_QUEUE_DEPTH + 1
+    elif estimated_wait > settings.ADMISSION_MAX_WAIT_SECONDS:
+        reason = "estimated_wait"
+        overflow = math.ceil((estimated_wait - settings.ADMISSION_MAX_WAIT_SECONDS) / typical_seconds
+                             * settings.ADMISSION_PIPELINE_CONCURRENCY)
+
+    if reason is None:
+        return AdmissionDecision(True, None, 0, estimated_wait, inflight, queue_depth)
+
+    # 초과분이 빠질 때까지의 예상 시간을 Retry-After로 안내
+    retry_after = math.ceil(max(overflow, 1) / settings.ADMISSION_PIPELINE_CONCURRENCY * typical_seconds)
+    retry_after = min(max(retry_after, 1), settings.ADMISSION_MAX_RETRY_AFTER_SECONDS)
+    record_metric("admission_rejected_total", reason=reason)
+    logger.warning(f"[Admission] Rejecting {requested} pipeline(s): reason={reason}, inflight={inflight}, "
+                   f"queue_depth={queue_depth}, estimated_wait={estimated_wait:.0f}s, retry_after={retry_after}s")
+    return AdmissionDecision(False, reason, retry_after, estimated_wait, inflight, queue_depth)
+
+
+async def aget_queue_position(task_id: str) -> Optional[Dict[str, Any]]:
+    """진행 중인 파이프라인이면 {"queue_position": 먼저 접수된 진행 중 파이프라인 수, "eta_seconds": 예상 남은 시간}을 반환합니다."""
+    try:
+        pipe = get_async_redis_client().pipeline(transaction=False)
+        pipe.zrank(INFLIGHT_KEY, task_id)
+        pipe.zscore(INFLIGHT_KEY, task_id)
+        pipe.lrange(DURATIONS_KEY, 0, -1)
+        rank, submitted_at, raw_durations = await pipe.execute()
+    except Exception as e:
+        logger.warning(f"[Admission / {task_id}] Failed to read queue position: {e}")
+        return None
+    if rank is None or submitted_at is None:
+        return None
+    typical_seconds = _typical_pipeline_seconds(raw_durations)
+    elapsed = time.time() - float(submitted_at)
+    eta = max(0.0, _wait_seconds(rank, typical_seconds) + typical_seconds - elapsed)
+    return {"queue_position": rank, "eta_seconds": round(eta)}
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from api.core.config import settings
+from api.utils.deadlines import PipelineDeadlineExceeded, budget_timeout, deadline_passed, remaining_seconds
+from api.utils.metrics_utils import record_metric
+from api.utils.rate_limiter import RateLimitQueueTimeout, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# 프로세스당 하나의 백그라운드 이벤트 루프 (fork 이후에는 자식 프로세스에서 새로 생성)
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """LLM 호출을 다중화하는 프로세스 공용 이벤트 루프를 반환합니다 (데몬 스레드에서 실행)."""
+    global _loop, _loop_pid, _llm_semaphore
+    if _loop is not None and _loop_pid == os.getpid():
+        return _loop
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+            _llm_semaphore = None
+            _loop, _loop_pid = loop, os.getpid()
+            logger.info(f"LLM event loop started in pid {_loop_pid} (max concurrency {settings.LLM_MAX_CONCURRENCY}).")
+    return _loop
+
+
+def run_coroutine(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """코루틴을 공용 이벤트 루프에서 실행하고 호출한 스레드에서 결과를 기다립니다."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result(timeout)
+
+
+def _bounded(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """코루틴 함수 fn을 감싸 실제 호출 동안만 LLM_MAX_CONCURRENCY 세마포어를 잡게 합니다.
+
+    레이트 리미터에 fn으로 넘기므로 토큰 대기 중인 호출은 동시 호출 자리를 차지하지 않습니다."""
+    async def call(*args, **kwargs):
+        global _llm_semaphore
+        if _llm_semaphore is None:
+            # 세마포어는 루프 스레드 안에서 처음 사용할 때 생성
+            _llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        async with _llm_semaphore:
+            return await fn(*args, **kwargs)
+    return call
+
+
+async def _within(coro: Awaitable[Any], budget: Optional[float]) -> Any:
+    return await (coro if budget is None else asyncio.wait_for(coro, timeout=budget))
+
+
+def _call_budget() -> Optional[float]:
+    """현재 단계의 남은 시간 예산 (레이트 리밋 대기 + 호출 전체에 적용). 마감이 없으면 None."""
+    budget = remaining_seconds()
+    if budget is not None and budget <= 0:
+        raise PipelineDeadlineExceeded()
+    return budget
+
+
+def _raise_if_deadline(e: BaseException) -> None:
+    # 예산 초과로 끝난 대기/호출은 실패가 아니라 마감 초과로 처리 (cancellable 래퍼가 파이프라인을 중단)
+    if isinstance(e, (asyncio.TimeoutError, RateLimitQueueTimeout)) and deadline_passed():
+        raise PipelineDeadlineExceeded() from e
+
+
+def invoke_llm(runnable, inputs: Dict[str, Any], provider: str, model: str, estimated_tokens: int) -> Any:
+    """레이트 리미터를 거쳐 runnable을 호출합니다.
+
+    LLM_ASYNC_ENABLED이면 공용 이벤트 루프에서 ainvoke로 실행되어, threads 풀 워커의 여러 작업이
+    소켓 대기 중에 프로세스를 점유하지 않고 LLM_MAX_CONCURRENCY 이내에서 동시에 진행됩니다.
+    파이프라인 마감이 있으면 대기와 호출을 남은 시간 안으로 제한합니다."""
+    limiter = get_rate_limiter(provider, model)
+    budget = _call_budget()
+    max_wait = budget_timeout(settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS)
+    try:
+        if not settings.LLM_ASYNC_ENABLED:
+            return limiter.call(runnable.invoke, inputs, estimated_tokens=estimated_tokens, max_wait_seconds=max_wait)
+        return run_coroutine(_within(limiter.acall(_bounded(runnable.ainvoke), inputs, estimated_tokens=estimated_tokens,
+                                                   max_wait_seconds=max_wait), budget))
+    except Exception as e:
+        _raise_if_deadline(e)
+        raise
+
+
+def _successful_results(results: List[Any]) -> List[Any]:
+    """동시 호출 결과에서 실패(예외)를 빼고 성공한 결과만 순서대로 반환합니다. 모두 실패했으면 첫 번째 예외를 다시 발생시킵니다."""
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for error in errors:
+        # 마감 초과·취소 등 Exception이 아닌 예외는 일부 성공 여부와 관계없이 그대로 전파
+        if not isinstance(error, Exception):
+            raise error
+    if errors and len(errors) == len(results):
+        _raise_if_deadline(errors[0])
+        raise errors[0]
+    if errors:
+        logger.warning(f"{len(errors)}/{len(results)} concurrent LLM calls failed; keeping the successful results. "
+                       f"First error: {errors[0]!r}")
+        record_metric("llm_concurrent_call_failures_total", len(errors))
+    return [r for r in results if not isinstance(r, BaseException)]
+
+
+def invoke_llm_concurrently(calls: List[Tuple[Any, Dict[str, Any]]], provider: str, model: str,
+                            estimated_tokens: int) -> List[Any]:
+    """(runnable, inputs) 목록을 동시에 호출하고 성공한 결과를 입력 순서대로 반환합니다 (호출마다 레이트 리미터 적용).
+
+    일부 호출이 실패해도 나머지 결과는 버리지 않으며, 모든 호출이 실패했을 때만 예외를 발생시킵니다."""
+    if not calls:
+        return []
+    limiter = get_rate_limiter(provider, model)
+    # 실행기 스레드와 이벤트 루프에는 단계의 마감이 전달되지 않으므로 예산을 미리 계산해 넘김
+    budget = _call_budget()
+    max_wait = budget_timeout(settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS)
+    if not settings.LLM_ASYNC_ENABLED:
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            futures = [executor.submit(limiter.call, runnable.invoke, inputs, estimated_tokens=estimated_tokens,
+                                       max_wait_seconds=max_wait)
+                       for runnable, inputs in calls]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except BaseException as e:
+                    results.append(e)
+        return _successful_results(results)
+
+    async def _gather():
+        return await asyncio.gather(*[
+            limiter.acall(_bounded(runnable.ainvoke), inputs, estimated_tokens=estimated_tokens, max_wait_seconds=max_wait)
+            for runnable, inputs in calls
+        ], return_exceptions=True)
+    try:
+        results = run_coroutine(_within(_gather(), budget))
+    except Exception as e:
+        _raise_if_deadline(e)
+        raise
+    return _successful_results(results)
@@ -0,0 +1,34 @@
+import logging
+from typing import Any, Tuple
+
+from celery import states
+
+from api.celery_app import celery_app
+from api.utils.progress_store import decode_progress_fields, progress_key
+from api.utils.redis_utils import get_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+async def aget_task_status(task_id: str) -> Tuple[str, Any]:
+    """루트 작업의 (상태, info)를 이벤트 루프를 막지 않고 조회합니다.
+
+    진행 해시와 Celery 결과 키를 한 번의 파이프라인 왕복으로 읽고, 결과 키는 백엔드의 디코더로 직접 해석합니다
+    (AsyncResult.state/.info의 동기 Redis 호출을 대체)."""
+    backend = celery_app.backend
+    pipe = get_async_redis_client(decode_responses=False).pipeline(transaction=False)
+    pipe.hgetall(progress_key(task_id))
+    pipe.get(backend.get_key_for_task(task_id))
+    raw_progress, raw_meta = await pipe.execute()
+
+    if raw_progress:
+        return decode_progress_fields(raw_progress)
+    if raw_meta is None:
+        return states.PENDING, None
+    try:
+        # 직렬화 형식 해석과 실패 결과의 예외 복원은 백엔드와 동일하게 처리 (I/O 없음)
+        meta = backend.decode_result(raw_meta)
+    except Exception as e:
+        logger.warning(f"[AsyncStatus / {task_id}] Failed to decode result meta: {e}")
+        return states.PENDING, None
+    return meta.get("status", states.PENDING), meta.get("result")
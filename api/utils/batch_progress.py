@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from celery import states
+
+from api.core.config import settings
+from api.utils.async_status import aget_task_status
+from api.utils.progress_store import (STATE_FIELD, UPDATED_AT_FIELD, aget_progress, progress_channel, progress_key,
+                                      update_progress)
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_ITEM_KEY_PREFIX = "cvf:batch:item"
+BATCH_DONE_KEY_PREFIX = "cvf:batch:done"
+
+# 항목 종료를 한 번만 집계하고(같은 항목의 FAILURE가 여러 번 기록돼도 중복 없음),
+# 마지막 항목이면 배치 자체를 종료 상태로 바꾸는 원자적 스크립트. 반환값: 새로 집계되었으면 1
+# (진행 해시 값은 JSON 인코딩이므로 정수 필드는 HINCRBY로 그대로 갱신 가능)
+_RECORD_ITEM_LUA = """
+local progress = KEYS[1]
+local done = KEYS[2]
+if redis.call('SADD', done, ARGV[1]) == 0 then
+    return 0
+end
+redis.call('EXPIRE', done, tonumber(ARGV[6]))
+redis.call('HINCRBY', progress, ARGV[2], 1)
+local completed = tonumber(redis.call('HGET', progress, 'completed') or '0')
+local failed = tonumber(redis.call('HGET', progress, 'failed') or '0')
+local total = tonumber(redis.call('HGET', progress, 'total') or '0')
+local finished = completed + failed
+local state = ARGV[7]
+if total > 0 and finished >= total then
+    if completed > 0 then state = ARGV[8] else state = ARGV[9] end
+end
+local percentage = 100
+if total > 0 then percentage = math.floor(finished * 100 / total) end
+redis.call('HSET', progress, ARGV[4], state, ARGV[5], ARGV[10], 'percentage', percentage,
+           'current_step', cjson.encode(string.format(ARGV[11], finished, total, failed)))
+redis.call('EXPIRE', progress, tonumber(ARGV[6]))
+redis.call('PUBLISH', ARGV[3], state)
+return 1
+"""
+_record_item_script = None
+
+
+def _item_key(task_id: str) -> str:
+    return f"{BATCH_ITEM_KEY_PREFIX}:{task_id}"
+
+
+def create_batch(batch_id: str, items: List[Dict[str, str]]) -> None:
+    """배치 진행 해시를 만들고 항목 작업 ID → 배치 ID 매핑을 기록합니다.
+
+    배치 진행은 일반 작업과 같은 진행 해시·채널을 쓰므로 /tasks/{batch_id}, /stream-task-status/{batch_id}로 조회할 수 있습니다.
+    items: [{"url": ..., "task_id": ...}] (파이프라인을 시작하기 전에 호출해야 캐시 적중 항목도 집계됨)"""
+    update_progress(batch_id, states.STARTED, {
+        'current_step': f"배치 진행: 0/{len(items)} 완료",
+        'batch': True,
+        'total': len(items),
+        'completed': 0,
+        'failed': 0,
+        'percentage': 0,
+        'items': items,
+    }, replace=True)
+    pipe = get_redis_client().pipeline(transaction=False)
+    for item in items:
+        pipe.set(_item_key(item["task_id"]), batch_id, ex=settings.PROGRESS_TTL_SECONDS)
+    pipe.execute()
+
+
+def record_batch_item_done(task_id: str, state: str) -> None:
+    """항목 작업이 종료 상태가 되면 소속 배치의 완료/실패 수를 갱신합니다. 배치 항목이 아니면 아무것도 하지 않습니다."""
+    global _record_item_script
+    try:
+        client = get_redis_client()
+        batch_id = client.get(_item_key(task_id))
+        if not batch_id:
+            return
+        if _record_item_script is None:
+            _record_item_script = client.register_script(_RECORD_ITEM_LUA)
+        counted = _record_item_script(
+            keys=[progress_key(batch_id), f"{BATCH_DONE_KEY_PREFIX}:{batch_id}"],
+            args=[task_id, "completed" if state == states.SUCCESS else "failed", progress_channel(batch_id),
+                  STATE_FIELD, UPDATED_AT_FIELD, settings.PROGRESS_TTL_SECONDS,
+                  states.STARTED, states.SUCCESS, states.FAILURE, repr(time.time()),
+                  "배치 진행: %d/%d 완료 (실패 %d)"],
+        )
+        if counted:
+            logger.info(f"[Batch {batch_id}] Item {task_id} finished with state {state}.")
+    except Exception as e:
+        logger.warning(f"[Batch / Item {task_id}] Failed to record batch item result: {e}")
+
+
+async def aget_batch_status(batch_id: str) -> Optional[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]:
+    """(배치 상태, 배치 메타, 항목별 상태·결과 목록)을 반환합니다. 배치가 없으면 None."""
+    progress = await aget_progress(batch_id)
+    if progress is None or not progress[1].get("batch"):
+        return None
+    state, meta = progress
+    items = meta.pop("items", [])
+    item_statuses = await asyncio.gather(*(aget_task_status(item["task_id"]) for item in items))
+    results = []
+    for item, (item_state, info) in zip(items, item_statuses):
+        results.append({
+            **item,
+            "status": item_state,
+            "current_step": info.get("current_step") if isinstance(info, dict) else None,
+            "result": info if isinstance(info, dict) else (str(info) if info is not None else None),
+        })
+    return state, meta, results
@@ -0,0 +1,190 @@
+import asyncio
+import functools
+import logging
+from typing import Callable, Optional, Set
+
+from celery import states
+from celery.exceptions import Ignore
+from celery.signals import task_revoked
+
+from api.celery_app import celery_app
+from api.core.config import settings
+from api.utils.async_status import aget_task_status
+from api.utils.checkpoints import (PIPELINE_STEP_ORDER, STEP_EXTRACT_HTML, STEP_EXTRACT_TEXT, STEP_FILTER_CONTENT,
+                                   STEP_GENERATE_COVER_LETTER)
+from api.utils.deadlines import PipelineDeadlineExceeded, deadline_passed, deadline_scope
+from api.utils.metrics_utils import record_metric
+from api.utils.redis_utils import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CANCEL_KEY_PREFIX = "cvf:cancel"
+WATCHERS_KEY_PREFIX = "cvf:watchers"
+
+# 유예 시간 대기 중인 취소 확인 작업 (가비지 컬렉션되지 않도록 참조 보관)
+_pending_checks: Set[asyncio.Task] = set()
+
+# 큐에서 만료된 메시지의 태스크 이름 -> 단계 (절약된 단계 집계용)
+_TASK_STEPS = {
+    "celery_tasks.step_1_extract_html": STEP_EXTRACT_HTML,
+    "celery_tasks.step_2_extract_text": STEP_EXTRACT_TEXT,
+    "celery_tasks.step_3_filter_content": STEP_FILTER_CONTENT,
+    "celery_tasks.step_3_attach_shared_content": STEP_FILTER_CONTENT,
+    "celery_tasks.step_4_generate_cover_letter": STEP_GENERATE_COVER_LETTER,
+}
+
+# 중단 사유별 REVOKED 상태 메시지
+_ABORT_MESSAGES = {
+    "abandoned": ("작업이 취소되었습니다.", "구독자가 없어 파이프라인이 취소됨"),
+    "deadline_exceeded": ("요청 처리 제한 시간이 지나 작업이 중단되었습니다.", "마감 시각이 지나 파이프라인이 중단됨"),
+}
+
+
+class PipelineCancelled(BaseException):
+    """취소된 파이프라인의 단계를 중단합니다.
+
+    asyncio.CancelledError와 같이 BaseException을 상속해 단계 내부의 except Exception 오류 처리(FAILURE 기록)를 지나
+    cancellable 래퍼까지 전달됩니다."""
+
+
+def _cancel_key(root_task_id: str) -> str:
+    return f"{CANCEL_KEY_PREFIX}:{root_task_id}"
+
+
+def _watchers_key(task_id: str) -> str:
+    return f"{WATCHERS_KEY_PREFIX}:{task_id}"
+
+
+def is_cancelled(root_task_id: str) -> bool:
+    try:
+        return bool(get_redis_client().exists(_cancel_key(root_task_id)))
+    except Exception as e:
+        logger.warning(f"[Cancellation / Root {root_task_id}] Failed to read cancellation flag: {e}")
+        return False
+
+
+def cancellable(step: str) -> Callable:
+    """단계 태스크 함수를 감싸 취소되었거나 마감이 지난 파이프라인이면 시작 전에 건너뛰고,
+    실행 중 PipelineCancelled/PipelineDeadlineExceeded가 발생하면 체인을 멈춥니다.
+
+    deadline 키워드 인자(마감 시각, epoch 초)는 래퍼가 꺼내 단계 실행 동안 deadline_scope로 설정하므로
+    단계 함수는 remaining_seconds()/budget_timeout()으로 남은 시간을 읽습니다.
+    (@checkpointed 아래에 적용하며, 태스크는 chain_log_id 키워드 인자를 받아야 합니다)"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            deadline = kwargs.pop("deadline", None)
+            root_task_id = kwargs.get("chain_log_id")
+            if not root_task_id:
+                return fn(self, *args, **kwargs)
+            try:
+                with deadline_scope(deadline):
+                    if is_cancelled(root_task_id):
+                        raise PipelineCancelled()
+                    if deadline_passed(deadline):
+                        raise PipelineDeadlineExceeded()
+                    return fn(self, *args, **kwargs)
+            except PipelineCancelled:
+                abort_pipeline(root_task_id, step, "abandoned", task_id=self.request.id)
+            except PipelineDeadlineExceeded:
+                abort_pipeline(root_task_id, step, "deadline_exceeded", task_id=self.request.id)
+            # Ignore: 작업 상태·콜백 없이 종료되어 체인의 다음 단계가 실행되지 않음
+            raise Ignore()
+        return wrapper
+    return decorator
+
+
+def abort_pipeline(root_task_id: str, step: str, reason: str, task_id: Optional[str] = None) -> None:
+    """step부터 남은 단계를 실행하지 않고 파이프라인을 REVOKED로 끝냅니다."""
+    # celery_utils가 progress_reporter를 통해 이 모듈을 import하므로 지연 import
+    from api.utils.celery_utils import _update_root_task_state
+
+    logger.info(f"[Task {task_id} / Root {root_task_id}] Pipeline aborted ({reason}) at step '{step}'.")
+    # 실행하지 않게 된 단계 수를 절약된 자원으로 집계 (3·4단계는 LLM 호출, 1단계는 브라우저)
+    for skipped_step in PIPELINE_STEP_ORDER[PIPELINE_STEP_ORDER.index(step):]:
+        record_metric("cancelled_steps_saved_total", step=skipped_step, reason=reason)
+
+    # 중단 직전에 기록된 진행 상태가 REVOKED를 덮어썼을 수 있으므로 다시 기록 (URL 락 해제도 이 경로에서 처리)
+    current_step, status_message = _ABORT_MESSAGES[reason]
+    _update_root_task_state(root_task_id=root_task_id, state=states.REVOKED, meta={
+        'current_step': current_step,
+        'status_message': f"({step}) {status_message}",
+        'cancel_reason': reason,
+        'cancelled_at_step': step,
+    })
+
+
+@task_revoked.connect
+def _on_task_expired(request=None, expired=False, **kwargs):
+    # expires가 지나 큐에서 버려진 단계: 태스크 함수가 실행되지 않으므로 여기서 파이프라인을 끝냄
+    if not expired or request is None:
+        return
+    step = _TASK_STEPS.get(request.task_name)
+    root_task_id = (request.kwargs or {}).get("chain_log_id")
+    if step is None or not root_task_id:
+        return
+    record_metric("pipeline_deadline_exceeded_total", phase="queued")
+    abort_pipeline(root_task_id, step, "deadline_exceeded", task_id=request.id)
+
+
+def cancel_pipeline(root_task_id: str, reason: str) -> None:
+    """취소 플래그를 설정하고, 큐에서 대기 중인 마지막 단계(루트 작업 ID를 사용)를 revoke한 뒤 REVOKED로 기록합니다.
+
+    실행 중인 단계는 진행 보고 시점에 플래그를 확인해 중단하고, 아직 시작하지 않은 단계는 시작 시 건너뜁니다.
+    호출 전 상태 확인 이후 파이프라인이 먼저 끝났다면 그 종료 상태(SUCCESS/FAILURE)를 그대로 둡니다."""
+    from api.utils.celery_utils import _update_root_task_state
+
+    get_redis_client().set(_cancel_key(root_task_id), reason, ex=settings.PROGRESS_TTL_SECONDS)
+    if not settings.LOCAL_MODE:
+        # 로컬 모드는 큐에 대기하는 메시지가 없음 (다음 단계 시작 시 플래그로 건너뜀)
+        celery_app.control.revoke(root_task_id)
+    current_step, status_message = _ABORT_MESSAGES[reason]
+    revoked = _update_root_task_state(root_task_id=root_task_id, state=states.REVOKED, meta={
+        'current_step': current_step,
+        'status_message': status_message,
+        'cancel_reason': reason,
+    }, only_if_active=True)
+    if not revoked:
+        logger.info(f"[Cancellation / Root {root_task_id}] Pipeline already finished; cancellation not recorded.")
+        return
+    record_metric("pipeline_cancelled_total", reason=reason)
+    logger.info(f"[Cancellation / Root {root_task_id}] Pipeline cancelled ({reason}).")
+
+
+async def awatch(task_id: str) -> None:
+    """SSE 구독자 수를 하나 늘립니다."""
+    try:
+        pipe = get_async_redis_client().pipeline(transaction=True)
+        pipe.incr(_watchers_key(task_id))
+        pipe.expire(_watchers_key(task_id), settings.PROGRESS_TTL_SECONDS)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"[Cancellation / {task_id}] Failed to register watcher: {e}")
+
+
+def schedule_unwatch(task_id: str, abandoned: bool) -> None:
+    """SSE 구독자 수를 하나 줄이고, 작업이 끝나기 전에 끊긴 경우 유예 시간 뒤 구독자가 없으면 파이프라인을 취소합니다.
+
+    SSE 제너레이터의 finally는 취소 중에 실행되므로 기다리지 않고 별도 작업으로 처리합니다."""
+    check = asyncio.ensure_future(_unwatch(task_id, abandoned))
+    _pending_checks.add(check)
+    check.add_done_callback(_pending_checks.discard)
+
+
+async def _unwatch(task_id: str, abandoned: bool) -> None:
+    try:
+        client = get_async_redis_client()
+        remaining = await client.decr(_watchers_key(task_id))
+        if not (abandoned and settings.CANCEL_ABANDONED_ENABLED and remaining <= 0):
+            return
+        await asyncio.sleep(settings.CANCEL_ABANDONED_GRACE_SECONDS)
+        watchers = int(await client.get(_watchers_key(task_id)) or 0)
+        if watchers > 0:
+            return
+        state, info = await aget_task_status(task_id)
+        # 배치 ID는 파이프라인이 아니므로 취소하지 않음 (항목은 각자 진행)
+        if state in states.READY_STATES or (isinstance(info, dict) and info.get("batch")):
+            return
+        await asyncio.to_thread(cancel_pipeline, task_id, "abandoned")
+    except Exception as e:
+        logger.warning(f"[Cancellation / {task_id}] Failed to check abandoned pipeline: {e}")
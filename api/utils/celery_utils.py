@@ -1,9 +1,17 @@
 import logging
 import traceback
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from celery import states, current_app # current_app 대신 celery_app 직접 참조 제거
 from celery.result import AsyncResult
 
+from api.utils.progress_store import TERMINAL_STATES, get_progress, update_progress, update_progress_if_active
+from api.utils.progress_reporter import flush_pending_progress
+from api.utils.batch_progress import record_batch_item_done
+from api.utils.admission import finish_inflight
+from api.utils.checkpoints import PARAMS_FIELD, load_checkpoint
+from api.utils.singleflight import release_work, url_work_key
+from api.utils.prefetch import record_prefetch_finished
+
 logger = logging.getLogger(__name__)
 
 # try_format_log 함수 추가 시작
@@ -22,75 +30,91 @@ def try_format_log(data, max_len=200):
         return f"[Unloggable data of type {type(data).__name__}]"
 # try_format_log 함수 추가 끝
 
+def _release_url_work(root_task_id: str) -> None:
+    """실패·중단으로 끝난 파이프라인이 잡고 있던 URL single-flight 락을 해제합니다 (소유자일 때만 해제됨).
+
+    Reject로 끝난 단계는 link_error가 실행되지 않으므로 종료 상태를 기록하는 경로에서 처리해, 합류 대기 중인
+    요청이 락 TTL을 기다리지 않고 스스로 1~3단계를 실행하게 합니다. 선행 처리(prefetch)였다면 기록도 지워
+    이후 제출이 죽은 작업에 적중(in_flight)한 것으로 집계되지 않게 합니다."""
+    params = load_checkpoint(root_task_id, PARAMS_FIELD)
+    if params and params.get("url"):
+        work_key = url_work_key(params["url"])
+        release_work(work_key, root_task_id)
+        record_prefetch_finished(work_key, root_task_id, is_success=False)
+
+
 def _update_root_task_state(root_task_id: str, state: str, meta: Optional[Dict[str, Any]] = None,
-                            exc: Optional[Exception] = None, traceback_str: Optional[str] = None):
+                            exc: Optional[Exception] = None, traceback_str: Optional[str] = None,
+                            only_if_active: bool = False) -> bool:
+    """루트 작업의 진행 상태를 Redis 해시(progress_store)에 필드 단위로 기록합니다.
+
+    진행 중 상태는 기존 meta를 읽어 병합·재직렬화하지 않고 전달된 필드만 HSET으로 갱신합니다.
+    SUCCESS/FAILURE 같은 종료 상태는 AsyncResult 사용처를 위해 Celery 결과 백엔드에도 함께 저장하고, 배치 항목이면 배치 진행에 반영합니다.
+    only_if_active이면 작업이 이미 종료 상태일 때 아무것도 기록하지 않습니다. 상태를 기록했으면 True를 반환합니다."""
     log_prefix = f"[StateUpdate / Root {root_task_id}]"
     try:
         if not root_task_id:
-            logger.warning(f"{log_prefix} root_task_id가 제공되지 않아 상태 업데이트를 건너<0xE1><0x8A><0xB5>니다.")
-            return
+            logger.warning(f"{log_prefix} root_task_id가 제공되지 않아 상태 업데이트를 건너뜁니다.")
+            return False
 
         current_meta_to_store = meta if meta is not None else {}
-        
-        # celery_app 대신 current_app 사용
-        celery_app_instance = current_app._get_current_object() # 현재 Celery 앱 인스턴스 가져오기
 
         # traceback_str 준비 (exc가 제공된 경우)
         if exc and not traceback_str:
             traceback_str = traceback.format_exc()
 
-        if state == states.SUCCESS:
-            # SUCCESS 상태일 경우, 전달된 meta로 덮어쓴다.
-            final_meta_for_update = current_meta_to_store
-            logger.info(f"{log_prefix} SUCCESS 상태. meta를 병합하지 않고 전달된 값으로 덮어씁니다: {try_format_log(final_meta_for_update)}")
-        else: # SUCCESS 상태가 아닐 때만 기존 meta와 병합
-            try:
-                # 기존 메타를 직접 가져오기보다는, 새로운 정보로 덮어쓰거나 추가하는 로직에 집중합니다.
-                # Celery의 상태 업데이트는 보통 새로운 정보로 기존 정보를 대체하는 방식입니다.
-                # 따라서, 여기서는 복잡한 병합 로직 대신 전달된 current_meta_to_store를 사용하고,
-                # 필요한 경우 호출하는 쪽에서 병합 로직을 처리하도록 단순화합니다.
-                # 혹은, 명시적으로 기존 메타를 읽어와서 병합할 수도 있지만,
-                # store_result는 기본적으로 meta를 덮어쓰므로, 여기서의 병합은 큰 의미가 없을 수 있습니다.
-                # 여기서는 로그 목적으로만 기존 메타를 조회하고, 실제 업데이트는 final_meta_for_update를 사용합니다.
-                
-                existing_task_result = AsyncResult(root_task_id, app=celery_app_instance)
-                existing_meta = existing_task_result.info if isinstance(existing_task_result.info, dict) else {}
-                
-                if existing_meta and isinstance(current_meta_to_store, dict):
-                    # 실제 상태 업데이트 시에는 final_meta_for_update가 사용되지만,
-                    # 로깅을 위해 병합된 메타를 보여줄 수 있습니다.
-                    # 하지만 상태 업데이트의 표준 동작은 덮어쓰기이므로, 
-                    # 여기서는 current_meta_to_store를 final_meta_for_update로 사용합니다.
-                    # 만약 병합이 꼭 필요하다면, 이 부분의 로직을 재검토해야 합니다.
-                    # 현재는 로깅 개선 및 호출 단순화에 집중.
-                    final_meta_for_update = {**existing_meta, **current_meta_to_store} # 병합된 메타 (로깅 및 잠재적 사용)
-                    logger.info(f"{log_prefix} 기존 meta ({try_format_log(existing_meta)})와 전달된 meta ({try_format_log(current_meta_to_store)})를 병합하여 업데이트합니다: {try_format_log(final_meta_for_update)}")
-                elif not existing_meta:
-                    final_meta_for_update = current_meta_to_store
-                    logger.info(f"{log_prefix} 기존 meta가 없어 전달된 값으로 meta를 설정합니다: {try_format_log(final_meta_for_update)}")
-                else: # existing_meta는 있지만 current_meta_to_store가 dict가 아닌 경우 등
-                    final_meta_for_update = current_meta_to_store
-                    logger.warning(f"{log_prefix} 기존 meta는 있으나 ({try_format_log(existing_meta)}), 전달된 meta ({try_format_log(current_meta_to_store)})의 타입 문제로 병합하지 않고 전달된 값으로 설정합니다.")
-
-            except Exception as e_fetch_meta:
-                logger.error(f"{log_prefix} 기존 meta 조회 중 오류 발생. 전달된 meta로 업데이트 시도: {e_fetch_meta}", exc_info=True)
-                final_meta_for_update = current_meta_to_store
-
-        # 실제 상태 업데이트 (AsyncResult 객체의 update_state 대신 backend.store_result 사용)
-        celery_app_instance.backend.store_result(
-            task_id=root_task_id, 
-            result=final_meta_for_update, # Celery에서 meta는 result 필드의 일부로 다뤄짐
-            state=state,
-            traceback=traceback_str,
-            # request=request # task 컨텍스트 외부이므로 request 객체 전달 어려움
-        )
-        logger.info(f"{log_prefix} 상태 '{state}' 및 메타 정보 업데이트 시도 완료 (store_result 호출). 저장 시도 meta: {try_format_log(final_meta_for_update)}")
+        is_terminal = state in TERMINAL_STATES
+        if is_terminal:
+            # 백그라운드에 대기 중인 진행 상태가 종료 상태를 덮어쓰지 않도록 먼저 기록
+            flush_pending_progress(root_task_id)
+        if not isinstance(current_meta_to_store, dict):
+            logger.warning(f"{log_prefix} dict가 아닌 meta ({try_format_log(current_meta_to_store)})는 'result' 필드로 저장합니다.")
+            current_meta_to_store = {"result": current_meta_to_store}
+
+        if only_if_active:
+            # 확인과 기록 사이에 끝난 작업의 종료 상태를 덮어쓰지 않도록 한 번에 확인·기록
+            final_meta_for_update = update_progress_if_active(root_task_id, state, current_meta_to_store)
+            if final_meta_for_update is None:
+                logger.info(f"{log_prefix} 이미 종료된 작업이므로 '{state}' 기록을 건너뜁니다.")
+                return False
+        else:
+            # SUCCESS는 전달된 meta로 덮어쓰고, 그 외에는 전달된 필드만 병합
+            final_meta_for_update = update_progress(
+                root_task_id, state, current_meta_to_store,
+                replace=(state == states.SUCCESS),
+                return_merged=is_terminal,
+            )
+        logger.debug(f"{log_prefix} 진행 상태 '{state}' 필드 갱신: {try_format_log(current_meta_to_store)}")
+
+        if is_terminal:
+            current_app._get_current_object().backend.store_result(
+                task_id=root_task_id,
+                result=final_meta_for_update,
+                state=state,
+                traceback=traceback_str,
+            )
+            logger.info(f"{log_prefix} 종료 상태 '{state}'를 결과 백엔드에도 저장했습니다. meta: {try_format_log(final_meta_for_update)}")
+            # 배치 항목이면 배치의 완료/실패 수 갱신 (캐시 적중·단계 실패·완료 콜백 모두 이 경로를 지남)
+            finish_inflight(root_task_id, state)
+            record_batch_item_done(root_task_id, state)
+            if state in (states.FAILURE, states.REVOKED):
+                _release_url_work(root_task_id)
+        return True
 
     except Exception as e:
         logger.critical(f"[StateUpdateFailureCritical] Critically failed to update root task {root_task_id} state: {e}", exc_info=True)
-        if state == 'FAILURE': # 여기서는 mark_as_failure를 직접 호출하지 않고, store_result에 의존.
-             # 필요하다면 mark_as_failure 로직을 여기에 추가할 수 있으나, store_result로도 충분할 수 있음.
+        if state == 'FAILURE':
             logger.error(f"[StateUpdateFailure] Root task {root_task_id} is being marked as FAILURE. Meta: {meta}, Exc: {exc}")
+        return False
+
+
+def get_root_task_status(root_task_id: str) -> Tuple[str, Any]:
+    """루트 작업의 (상태, info)를 반환합니다. 진행 해시를 우선 읽고, 없으면 Celery 결과 백엔드를 조회합니다."""
+    progress = get_progress(root_task_id)
+    if progress is not None:
+        return progress
+    task_result = AsyncResult(root_task_id, app=current_app._get_current_object())
+    return task_result.state, task_result.info
 
 def get_detailed_error_info(exception_obj: Exception) -> Dict[str, str]:
     """예외 객체로부터 상세 정보를 추출합니다."""
@@ -0,0 +1,106 @@
+import functools
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from api.core.config import settings
+from api.utils.metrics_utils import record_metric
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY_PREFIX = "cvf:checkpoint"
+PARAMS_FIELD = "_params"
+
+# 파이프라인 단계 순서 (재개 시 마지막으로 완료된 단계의 다음 단계부터 다시 실행)
+STEP_EXTRACT_HTML = "extract_html"
+STEP_EXTRACT_TEXT = "extract_text"
+STEP_FILTER_CONTENT = "filter_content"
+STEP_GENERATE_COVER_LETTER = "generate_cover_letter"
+PIPELINE_STEP_ORDER = (STEP_EXTRACT_HTML, STEP_EXTRACT_TEXT, STEP_FILTER_CONTENT, STEP_GENERATE_COVER_LETTER)
+
+
+def _checkpoint_key(root_task_id: str) -> str:
+    return f"{CHECKPOINT_KEY_PREFIX}:{root_task_id}"
+
+
+def _hset_json(root_task_id: str, field: str, value: Any) -> None:
+    key = _checkpoint_key(root_task_id)
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.hset(key, field, json.dumps(value, ensure_ascii=False))
+    pipe.expire(key, settings.CHECKPOINT_TTL_SECONDS)
+    pipe.execute()
+
+
+def save_pipeline_params(root_task_id: str, params: Dict[str, Any]) -> None:
+    """재개 시 체인을 다시 만들 수 있도록 파이프라인 입력(URL, 사용자 스토리 등)을 보관합니다."""
+    if not settings.CHECKPOINTS_ENABLED:
+        return
+    try:
+        _hset_json(root_task_id, PARAMS_FIELD, params)
+    except Exception as e:
+        logger.warning(f"[Checkpoint / Root {root_task_id}] Failed to save pipeline params: {e}")
+
+
+def save_checkpoint(root_task_id: str, step: str, output: Dict[str, Any]) -> None:
+    if not settings.CHECKPOINTS_ENABLED:
+        return
+    try:
+        _hset_json(root_task_id, step, output)
+    except Exception as e:
+        logger.warning(f"[Checkpoint / Root {root_task_id}] Failed to save checkpoint '{step}': {e}")
+
+
+def load_checkpoint(root_task_id: str, step: str) -> Optional[Dict[str, Any]]:
+    if not settings.CHECKPOINTS_ENABLED:
+        return None
+    try:
+        raw = get_redis_client().hget(_checkpoint_key(root_task_id), step)
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"[Checkpoint / Root {root_task_id}] Failed to load checkpoint '{step}': {e}")
+        return None
+
+
+def load_checkpoints(root_task_id: str) -> Dict[str, Any]:
+    """{단계 또는 _params: 값} 을 반환합니다. 없으면 빈 dict."""
+    try:
+        raw = get_redis_client().hgetall(_checkpoint_key(root_task_id))
+        return {field: json.loads(value) for field, value in raw.items()}
+    except Exception as e:
+        logger.warning(f"[Checkpoint / Root {root_task_id}] Failed to load checkpoints: {e}")
+        return {}
+
+
+def next_incomplete_step(checkpoints: Dict[str, Any]) -> Optional[str]:
+    """가장 뒤의 체크포인트 다음 단계. 체크포인트가 없으면 첫 단계, 마지막 단계까지 완료되었으면 None.
+
+    합류·선행 처리 결과 사용·다시 생성 파이프라인은 filter_content만 체크포인트로 남기므로 앞에서부터가 아니라
+    뒤에서부터 찾아야 1~3단계를 다시 실행하지 않습니다."""
+    for index in range(len(PIPELINE_STEP_ORDER) - 1, -1, -1):
+        if PIPELINE_STEP_ORDER[index] in checkpoints:
+            return PIPELINE_STEP_ORDER[index + 1] if index + 1 < len(PIPELINE_STEP_ORDER) else None
+    return PIPELINE_STEP_ORDER[0]
+
+
+def checkpointed(step: str) -> Callable:
+    """단계 태스크 함수를 감싸 성공 결과를 루트 작업 ID 아래 체크포인트로 저장합니다.
+
+    재시도·재전달·재개로 같은 루트 작업의 단계가 다시 실행되면 저장된 결과를 그대로 반환합니다.
+    (@celery_app.task 아래에 적용하며, 태스크는 chain_log_id 키워드 인자를 받아야 합니다)"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            root_task_id = kwargs.get("chain_log_id")
+            if root_task_id:
+                saved = load_checkpoint(root_task_id, step)
+                if saved is not None:
+                    logger.info(f"[Task {self.request.id} / Root {root_task_id}] Checkpoint '{step}' found. Skipping completed step.")
+                    record_metric("checkpoint_reused_total", step=step)
+                    return saved
+            result = fn(self, *args, **kwargs)
+            if root_task_id and isinstance(result, dict):
+                save_checkpoint(root_task_id, step, result)
+            return result
+        return wrapper
+    return decorator
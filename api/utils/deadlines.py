@@ -0,0 +1,66 @@
+import contextvars
+import datetime
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# 현재 실행 중인 단계의 파이프라인 마감 시각 (epoch 초). cancellable 래퍼가 단계 실행 동안 설정
+_current_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("cvf_pipeline_deadline", default=None)
+
+
+class PipelineDeadlineExceeded(BaseException):
+    """파이프라인 마감 시각이 지나 남은 작업을 중단합니다 (PipelineCancelled와 같은 이유로 BaseException 상속)."""
+
+
+def make_deadline(seconds: Optional[float]) -> Optional[float]:
+    """지금부터 seconds 뒤의 마감 시각. seconds가 없거나 0 이하이면 마감 없음(None)."""
+    return time.time() + seconds if seconds and seconds > 0 else None
+
+
+def expires_at(deadline: Optional[float]) -> Optional[datetime.datetime]:
+    """Celery expires 옵션 값 (마감이 지난 메시지는 워커가 실행하지 않고 REVOKED 처리)."""
+    return datetime.datetime.fromtimestamp(deadline, tz=datetime.timezone.utc) if deadline else None
+
+
+def current_deadline() -> Optional[float]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]) -> Iterator[None]:
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining_seconds(deadline: Optional[float] = None) -> Optional[float]:
+    """마감까지 남은 시간(초, 음수 가능). deadline을 생략하면 현재 단계의 마감을 사용하고, 마감이 없으면 None."""
+    deadline = deadline if deadline is not None else current_deadline()
+    return deadline - time.time() if deadline is not None else None
+
+
+def deadline_passed(deadline: Optional[float] = None) -> bool:
+    remaining = remaining_seconds(deadline)
+    return remaining is not None and remaining <= 0
+
+
+def budget_timeout(default_seconds: float, minimum_seconds: float = 1.0) -> float:
+    """내부 타임아웃을 남은 시간 예산으로 줄입니다. 마감이 없으면 default_seconds."""
+    remaining = remaining_seconds()
+    if remaining is None:
+        return default_seconds
+    return min(default_seconds, max(minimum_seconds, remaining))
+
+
+def budget_timeout_ms(default_ms: int, minimum_ms: int = 1000) -> int:
+    """Playwright처럼 밀리초 단위 타임아웃을 쓰는 곳을 위한 budget_timeout."""
+    return int(budget_timeout(default_ms / 1000, minimum_ms / 1000) * 1000)
+
+
+def apply_deadline(signature, deadline: Optional[float]):
+    """단계 시그니처에 마감 시각을 deadline 키워드 인자(단계 경계 확인·내부 타임아웃용)와 Celery expires로 전달합니다."""
+    if deadline is None:
+        return signature
+    return signature.clone(kwargs={"deadline": deadline}).set(expires=expires_at(deadline))
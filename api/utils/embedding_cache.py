@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from api.core.config import settings
+from api.utils.rate_limiter import COHERE_MAX_TEXTS_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+EVICTION_FRACTION = 0.1 # 상한 초과 시 가장 오래 사용되지 않은 항목을 이 비율만큼 한 번에 삭제
+# 이만큼(상한 대비 비율) 새로 쓸 때마다 개수를 확인 (COUNT(*)는 테이블 전체를 훑으므로 매 쓰기마다 하지 않음)
+EVICTION_CHECK_FRACTION = 0.01
+
+
+def embedding_cache_key(model: str, kind: str, text: str) -> str:
+    """(모델, 용도, 텍스트 해시) 기반 캐시 키. Cohere는 문서/질의 임베딩 입력 타입이 달라 용도를 키에 포함합니다."""
+    return f"{model}:{kind}:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCacheStore:
+    """float32 벡터를 BLOB으로 저장하는 로컬 SQLite 임베딩 저장소입니다 (LRU 방식 개수 상한)."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        # 마지막 개수 확인 이후 이 프로세스가 쓴 항목 수 (첫 쓰기에서 한 번 확인하도록 임계값에서 시작)
+        self._check_every = max(1, int(max_entries * EVICTION_CHECK_FRACTION))
+        self._written_since_check = self._check_every
+        self._check_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # prefork 워커에서는 fork 이후 프로세스별로 연결을 새로 만들어야 함
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        conn = self._connection()
+        found: Dict[str, np.ndarray] = {}
+        # SQLite 바인딩 변수 개수 제한을 피하기 위해 나누어 조회
+        for start in range(0, len(keys), 500):
+            batch = list(keys[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        if found:
+            with conn:
+                conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(time.time(), k) for k in found])
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in items.items()]
+            )
+        with self._check_lock:
+            self._written_since_check += len(items)
+            if self._written_since_check < self._check_every:
+                return
+            self._written_since_check = 0
+        self._evict_if_needed(conn)
+
+    def _evict_if_needed(self, conn: sqlite3.Connection) -> None:
+        # 확인 사이에 (프로세스 수 x 확인 간격)만큼 상한을 넘을 수 있지만 한 번에 EVICTION_FRACTION만큼 지우므로 곧 회복됨
+        count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        to_delete = count - self.max_entries + int(self.max_entries * EVICTION_FRACTION)
+        with conn:
+            conn.execute("DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)", (to_delete,))
+        logger.info(f"[EmbeddingCache] Evicted {to_delete} least recently used embeddings (count was {count}, max {self.max_entries}).")
+
+
+_default_store: Optional[EmbeddingCacheStore] = None
+
+
+def get_default_store() -> EmbeddingCacheStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = EmbeddingCacheStore(settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_CACHE_MAX_ENTRIES)
+    return _default_store
+
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 호출 앞단의 캐시 래퍼입니다.
+
+    같은 인스턴스 안에서는 고유 텍스트를 한 번만 임베딩하고 (메모리), 이전 요청에서 임베딩한 텍스트는
+    로컬 저장소에서 읽어옵니다. 캐시에 없는 텍스트만 모아 한 번의 배치 호출로 임베딩합니다."""
+
+    def __init__(self, embeddings: Embeddings, model: str, store: Optional[EmbeddingCacheStore] = None,
+                 max_texts_per_request: int = COHERE_MAX_TEXTS_PER_REQUEST):
+        self.embeddings = embeddings
+        self.model = model
+        # 감싼 임베딩이 문서 임베딩을 나누어 보내는 요청당 텍스트 수 (provider_calls 집계용)
+        self.max_texts_per_request = max_texts_per_request
+        self.store = store or get_default_store()
+        self._memory: Dict[str, np.ndarray] = {}
+        self.stats = {"provider_calls": 0, "texts_embedded": 0, "cache_hits": 0, "memory_hits": 0}
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {k: self._memory[k] for k in keys if k in self._memory}
+        self.stats["memory_hits"] += len(found)
+        missing = [k for k in keys if k not in found]
+        if missing:
+            try:
+                stored = self.store.get_many(missing)
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] Store lookup failed, embedding without cache: {e}")
+                stored = {}
+            self.stats["cache_hits"] += len(stored)
+            self._memory.update(stored)
+            found.update(stored)
+        return found
+
+    def _embed_array(self, texts: List[str], kind: str) -> np.ndarray:
+        keys = [embedding_cache_key(self.model, kind, t) for t in texts]
+        unique: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            unique.setdefault(key, text)
+
+        found = self._lookup(list(unique))
+        missing_keys = [k for k in unique if k not in found]
+        if missing_keys:
+            missing_texts = [unique[k] for k in missing_keys]
+            if kind == "query":
+                vectors = [self.embeddings.embed_query(t) for t in missing_texts]
+            else:
+                vectors = self.embeddings.embed_documents(missing_texts)
+            # 문서는 요청당 한도 단위로 나뉘어 호출되고, 질의는 텍스트마다 한 번씩 호출됨
+            self.stats["provider_calls"] += (math.ceil(len(missing_texts) / self.max_texts_per_request)
+                                             if kind == "document" else len(missing_texts))
+            self.stats["texts_embedded"] += len(missing_texts)
+            new_items = {k: np.asarray(v, dtype=np.float32) for k, v in zip(missing_keys, vectors)}
+            self._memory.update(new_items)
+            found.update(new_items)
+            try:
+                self.store.put_many(new_items)
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] Store write failed (vectors still used for this request): {e}")
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([found[k] for k in keys]).astype(np.float32, copy=False)
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """문서 임베딩을 (n, dim) float32 배열로 반환합니다."""
+        return self._embed_array(list(texts), "document")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_array([text], "query")[0].tolist()
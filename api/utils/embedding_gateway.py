@@ -0,0 +1,260 @@
+"""여러 워커의 임베딩 요청을 Redis 리스트로 모아 배치로 처리하는 임베딩 게이트웨이입니다.
+
+작업 쪽은 GatewayEmbeddings로 요청을 넣고 응답 키를 기다리며, 게이트웨이 프로세스는 첫 요청 이후
+EMBEDDING_GATEWAY_MAX_WAIT_MS 동안 도착한 요청을 모아 프로바이더 배치 한도(기본 96개)까지 채워 호출한 뒤
+결과를 요청별로 돌려줍니다.
+
+실행 예:
+    python -m api.utils.embedding_gateway                 # Cohere 백엔드 (COHERE_API_KEY 필요)
+    python -m api.utils.embedding_gateway --backend stub  # 결정적 스텁 임베딩 (테스트/로컬용)
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from api.core.config import settings
+from api.utils.metrics_utils import observe_value, record_metric
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REQUEST_QUEUE_KEY = "cvf:embedgw:requests"
+REPLY_KEY_PREFIX = "cvf:embedgw:reply"
+REPLY_TTL_SECONDS = 60
+
+# 응답 형식: b"OK" + (개수, 차원) uint32 2개 + float32 행렬 바이트 | b"ER" + 오류 메시지
+_REPLY_OK = b"OK"
+_REPLY_ERROR = b"ER"
+
+
+class EmbeddingGatewayError(RuntimeError):
+    """게이트웨이가 임베딩 요청을 처리하지 못한 경우."""
+
+
+def _reply_key(request_id: str) -> str:
+    return f"{REPLY_KEY_PREFIX}:{request_id}"
+
+
+def _encode_vectors(vectors: np.ndarray) -> bytes:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return _REPLY_OK + struct.pack("<II", *vectors.shape) + vectors.tobytes()
+
+
+def _decode_reply(raw: bytes) -> np.ndarray:
+    if raw[:2] == _REPLY_ERROR:
+        raise EmbeddingGatewayError(raw[2:].decode("utf-8", errors="replace"))
+    rows, dim = struct.unpack("<II", raw[2:10])
+    return np.frombuffer(raw[10:], dtype=np.float32).reshape(rows, dim)
+
+
+class GatewayEmbeddings(Embeddings):
+    """임베딩을 게이트웨이에 위임합니다. 게이트웨이가 응답하지 않으면 fallback 임베딩으로 직접 호출합니다."""
+
+    def __init__(self, fallback: Optional[Embeddings] = None, reply_timeout_seconds: Optional[float] = None):
+        self.fallback = fallback
+        self.reply_timeout_seconds = reply_timeout_seconds or settings.EMBEDDING_GATEWAY_REPLY_TIMEOUT_SECONDS
+
+    def _request(self, texts: List[str], kind: str) -> np.ndarray:
+        request_id = uuid.uuid4().hex
+        client = get_redis_client(decode_responses=False)
+        payload = json.dumps({"id": request_id, "kind": kind, "texts": texts, "enqueued_at": time.time()}, ensure_ascii=False)
+        pipe = client.pipeline(transaction=False)
+        pipe.lpush(REQUEST_QUEUE_KEY, payload.encode("utf-8"))
+        # 게이트웨이는 오른쪽(오래된 요청)부터 꺼내므로 한도를 넘으면 가장 오래된 요청이 잘림 (요청자는 응답 대기 후 fallback)
+        pipe.ltrim(REQUEST_QUEUE_KEY, 0, settings.EMBEDDING_GATEWAY_MAX_QUEUE_LENGTH - 1)
+        pipe.execute()
+        reply = client.blpop([_reply_key(request_id)], timeout=self.reply_timeout_seconds)
+        if reply is None:
+            raise EmbeddingGatewayError(f"No reply from embedding gateway within {self.reply_timeout_seconds}s")
+        return _decode_reply(reply[1])
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        if not texts:
+            return []
+        try:
+            return self._request(texts, kind).tolist()
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"[EmbeddingGateway] Gateway unavailable, embedding directly: {e}")
+            record_metric("embedding_gateway_fallbacks_total")
+            if kind == "query":
+                return [self.fallback.embed_query(t) for t in texts]
+            return self.fallback.embed_documents(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+
+@dataclass
+class _PendingRequest:
+    request_id: str
+    kind: str
+    texts: List[str]
+    enqueued_at: float
+    vectors: List[Optional[np.ndarray]] = field(default_factory=list)
+
+
+class EmbeddingGateway:
+    """요청 큐를 소비하며 같은 종류(document/query)의 텍스트를 모아 배치로 임베딩하는 게이트웨이 루프입니다."""
+
+    def __init__(self, backend: Embeddings, max_batch_texts: Optional[int] = None, max_wait_ms: Optional[int] = None,
+                 stale_after_seconds: Optional[float] = None):
+        self.backend = backend
+        self.max_batch_texts = max_batch_texts or settings.EMBEDDING_GATEWAY_MAX_BATCH_TEXTS
+        self.max_wait_seconds = (max_wait_ms if max_wait_ms is not None else settings.EMBEDDING_GATEWAY_MAX_WAIT_MS) / 1000
+        # 요청자가 응답 대기를 포기한 뒤의 요청은 임베딩해도 읽히지 않으므로 버림
+        self.stale_after_seconds = stale_after_seconds or settings.EMBEDDING_GATEWAY_REPLY_TIMEOUT_SECONDS
+        self.stats = {"requests": 0, "stale": 0, "batches": 0, "texts": 0, "fill_ratio_sum": 0.0, "queue_delay_sum": 0.0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._poll_timeout_seconds: float = 1
+
+    def _collect(self, client, first_payload: bytes) -> List[_PendingRequest]:
+        """첫 요청 이후 대기 시간 동안 또는 배치 한도가 찰 때까지 요청을 모읍니다."""
+        requests = [self._parse(first_payload)]
+        collected_texts = len(requests[0].texts)
+        deadline = time.monotonic() + self.max_wait_seconds
+        while collected_texts < self.max_batch_texts and time.monotonic() < deadline:
+            payload = client.rpop(REQUEST_QUEUE_KEY)
+            if payload is None:
+                time.sleep(0.001)
+                continue
+            requests.append(self._parse(payload))
+            collected_texts += len(requests[-1].texts)
+        return requests
+
+    @staticmethod
+    def _parse(payload: bytes) -> _PendingRequest:
+        data = json.loads(payload)
+        return _PendingRequest(request_id=data["id"], kind=data.get("kind", "document"), texts=data["texts"], enqueued_at=data["enqueued_at"])
+
+    def _embed_batch(self, kind: str, texts: List[str]) -> np.ndarray:
+        if kind == "query":
+            vectors = [self.backend.embed_query(t) for t in texts]
+        else:
+            vectors = self.backend.embed_documents(texts)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def process(self, requests: List[_PendingRequest]) -> None:
+        """모인 요청을 종류별로 합쳐 배치 한도 단위로 임베딩하고 요청별 응답을 보냅니다.
+
+        응답 대기 시간(stale_after_seconds)이 지난 요청은 임베딩하지 않고 버립니다."""
+        dispatched_at = time.time()
+        stale = [r for r in requests if dispatched_at - r.enqueued_at > self.stale_after_seconds]
+        if stale:
+            logger.warning(f"[EmbeddingGateway] Dropping {len(stale)} stale requests (older than {self.stale_after_seconds}s).")
+            record_metric("embedding_gateway_stale_requests_total", len(stale))
+            self.stats["stale"] += len(stale)
+            requests = [r for r in requests if dispatched_at - r.enqueued_at <= self.stale_after_seconds]
+            if not requests:
+                return
+        for request in requests:
+            observe_value("embedding_gateway_queue_delay_seconds", dispatched_at - request.enqueued_at)
+            self.stats["queue_delay_sum"] += dispatched_at - request.enqueued_at
+        self.stats["requests"] += len(requests)
+
+        failed: Dict[str, str] = {}
+        for kind in ("document", "query"):
+            # (요청, 요청 내 위치, 텍스트) 를 평탄화해 배치 한도 단위로 자름
+            items = [(r, i, t) for r in requests if r.kind == kind for i, t in enumerate(r.texts)]
+            for r in requests:
+                if r.kind == kind and not r.vectors:
+                    r.vectors = [None] * len(r.texts)
+            for start in range(0, len(items), self.max_batch_texts):
+                batch = items[start:start + self.max_batch_texts]
+                fill_ratio = len(batch) / self.max_batch_texts
+                self.stats["batches"] += 1
+                self.stats["texts"] += len(batch)
+                self.stats["fill_ratio_sum"] += fill_ratio
+                observe_value("embedding_gateway_batch_fill_ratio", fill_ratio, kind=kind)
+                try:
+                    vectors = self._embed_batch(kind, [t for _, _, t in batch])
+                except Exception as e:
+                    logger.error(f"[EmbeddingGateway] Batch of {len(batch)} {kind} texts failed: {e}", exc_info=True)
+                    for r, _, _ in batch:
+                        failed[r.request_id] = str(e)
+                    continue
+                for (r, i, _), vector in zip(batch, vectors):
+                    r.vectors[i] = vector
+
+        client = get_redis_client(decode_responses=False)
+        pipe = client.pipeline(transaction=False)
+        for r in requests:
+            if r.request_id in failed:
+                reply = _REPLY_ERROR + failed[r.request_id].encode("utf-8")
+            else:
+                reply = _encode_vectors(np.vstack(r.vectors) if r.vectors else np.zeros((0, 0), dtype=np.float32))
+            pipe.rpush(_reply_key(r.request_id), reply)
+            pipe.expire(_reply_key(r.request_id), REPLY_TTL_SECONDS)
+        pipe.execute()
+
+    def run(self, poll_timeout_seconds: float = 1) -> None:
+        logger.info(f"[EmbeddingGateway] Started (max_batch_texts={self.max_batch_texts}, max_wait_ms={self.max_wait_seconds * 1000:.0f}).")
+        client = get_redis_client(decode_responses=False)
+        while not self._stop.is_set():
+            try:
+                item = client.brpop([REQUEST_QUEUE_KEY], timeout=poll_timeout_seconds)
+                if item is None:
+                    continue
+                self.process(self._collect(client, item[1]))
+            except Exception as e:
+                logger.error(f"[EmbeddingGateway] Loop error: {e}", exc_info=True)
+                time.sleep(1)
+        logger.info(f"[EmbeddingGateway] Stopped. Stats: {self.stats}")
+
+    def start_in_thread(self, poll_timeout_seconds: float = 1) -> threading.Thread:
+        """게이트웨이를 데몬 스레드로 실행합니다 (테스트/단일 프로세스 실행용)."""
+        self._poll_timeout_seconds = poll_timeout_seconds
+        self._thread = threading.Thread(target=self.run, args=(poll_timeout_seconds,), name="embedding-gateway", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout_seconds: Optional[float] = None) -> None:
+        """루프를 멈추고, start_in_thread로 시작한 스레드가 있으면 현재 대기 중인 BRPOP이 끝날 때까지 기다립니다.
+
+        기다리지 않으면 멈춘 게이트웨이가 대기 중에 들어온 다음 요청을 꺼내 처리할 수 있습니다."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout_seconds if timeout_seconds is not None else self._poll_timeout_seconds + 5)
+            if self._thread.is_alive():
+                logger.warning("[EmbeddingGateway] Gateway thread did not stop within the timeout.")
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the micro-batching embedding gateway.")
+    parser.add_argument("--backend", choices=["cohere", "stub"], default="cohere")
+    parser.add_argument("--max-batch-texts", type=int, default=None)
+    parser.add_argument("--max-wait-ms", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.backend == "stub":
+        from api.benchmarks.bench_utils import HashingEmbeddings
+        backend = HashingEmbeddings()
+    else:
+        from langchain_cohere import CohereEmbeddings
+        from api.generate_cover_letter_semantic import EMBEDDING_MODEL
+        from api.utils.rate_limiter import RateLimitedEmbeddings
+        backend = RateLimitedEmbeddings(
+            CohereEmbeddings(model=EMBEDDING_MODEL, cohere_api_key=os.environ["COHERE_API_KEY"], user_agent="langchain"),
+            provider="cohere", model=EMBEDDING_MODEL
+        )
+    EmbeddingGateway(backend, max_batch_texts=args.max_batch_texts, max_wait_ms=args.max_wait_ms).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import re
 import hashlib
 import time
 import uuid
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 from typing import Any
 import datetime
 import os
@@ -11,6 +11,8 @@ import os
 logger = logging.getLogger(__name__)
 
 MAX_FILENAME_LENGTH = 100
+# 공고 내용과 무관한 유입 추적용 쿼리 파라미터 (URL 정규화 시 제거)
+TRACKING_QUERY_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "fbclid", "gclid", "ref"}
 
 def try_format_log(data: Any, max_len: int = 250) -> str:
     """로깅을 위해 데이터를 안전하게 문자열로 변환하고, 너무 길면 축약합니다."""
@@ -76,4 +78,21 @@ def save_content_to_file(file_path: str, content: str, encoding: str = "utf-8"):
         logger.info(f"Content successfully saved to: {file_path}")
     except Exception as e:
         logger.error(f"Error saving content to file {file_path}: {e}", exc_info=True)
-        raise 
\ No newline at end of file
+        raise 
+
+def normalize_job_url(url: str) -> str:
+    """동일한 공고를 가리키는 URL이 같은 문자열이 되도록 정규화합니다 (스킴/호스트 소문자, 추적 파라미터·프래그먼트 제거, 쿼리 정렬)."""
+    try:
+        parsed = urlparse(url.strip())
+        netloc = parsed.netloc.lower()
+        if netloc.endswith(":80") and parsed.scheme == "http":
+            netloc = netloc[:-3]
+        elif netloc.endswith(":443") and parsed.scheme == "https":
+            netloc = netloc[:-4]
+        query_items = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                       if k.lower() not in TRACKING_QUERY_PARAMS]
+        path = parsed.path.rstrip("/") or "/"
+        return urlunparse((parsed.scheme.lower(), netloc, path, parsed.params, urlencode(sorted(query_items)), ""))
+    except Exception as e:
+        logger.warning(f"Failed to normalize URL '{url}', using it as is: {e}")
+        return url.strip()
@@ -0,0 +1,40 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from api.core.config import settings
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+GENERATION_CONTEXT_KEY_PREFIX = "cvf:gencontext"
+
+
+def _context_key(task_id: str) -> str:
+    return f"{GENERATION_CONTEXT_KEY_PREFIX}:{task_id}"
+
+
+def save_generation_context(task_id: str, filtered_content: str, user_prompt_text: Optional[str],
+                            generation_context: Dict[str, Any], original_url: Optional[str] = None) -> None:
+    """4단계의 검색 컨텍스트를 작업 ID 기준으로 보관합니다 (다시 생성 요청 시 1~3단계와 검색을 건너뛰기 위함)."""
+    try:
+        payload = {
+            "filtered_content": filtered_content,
+            "user_prompt_text": user_prompt_text,
+            "original_url": original_url,
+            "generation_context": generation_context,
+        }
+        get_redis_client().set(_context_key(task_id), json.dumps(payload, ensure_ascii=False),
+                               ex=settings.GENERATION_CONTEXT_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"[GenerationContext / {task_id}] Failed to cache generation context: {e}")
+
+
+def load_generation_context(task_id: str) -> Optional[Dict[str, Any]]:
+    """보관된 검색 컨텍스트를 반환합니다. 없거나 만료되었으면 None."""
+    try:
+        raw = get_redis_client().get(_context_key(task_id))
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"[GenerationContext / {task_id}] Failed to load generation context: {e}")
+        return None
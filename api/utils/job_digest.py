@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import re
+from typing import List, Optional
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field, ValidationError
+
+from api.core.config import settings
+from api.utils.async_runtime import invoke_llm
+from api.utils.deadlines import budget_timeout
+from api.utils.metrics_utils import record_metric
+from api.utils.rate_limiter import estimate_tokens
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+JOB_DIGEST_KEY_PREFIX = "cvf:digest"
+DIGEST_EXPECTED_OUTPUT_TOKENS = 800
+
+
+class JobPostingDigest(BaseModel):
+    """필터링된 채용공고의 구조화된 요약 (4단계 프롬프트를 줄이기 위한 컨텍스트)."""
+    company: Optional[str] = None
+    role: Optional[str] = None
+    responsibilities: List[str] = Field(default_factory=list)
+    requirements: List[str] = Field(default_factory=list)
+    preferred_qualifications: List[str] = Field(default_factory=list)
+    tech_stack: List[str] = Field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.role or self.responsibilities or self.requirements)
+
+    def to_prompt_text(self) -> str:
+        """생성 프롬프트에 넣을 간결한 텍스트로 변환합니다."""
+        sections = [("회사", [self.company] if self.company else []), ("직무", [self.role] if self.role else []),
+                    ("주요 업무", self.responsibilities), ("자격 요건", self.requirements),
+                    ("우대 사항", self.preferred_qualifications), ("기술 스택", self.tech_stack)]
+        lines = []
+        for title, items in sections:
+            if not items:
+                continue
+            if len(items) == 1 and title in ("회사", "직무"):
+                lines.append(f"{title}: {items[0]}")
+            else:
+                lines.append(f"{title}:")
+                lines.extend(f"- {item}" for item in items)
+        return "\n".join(lines)
+
+
+DIGEST_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "당신은 채용공고를 구조화하는 도우미입니다. 주어진 채용공고에서 아래 JSON 스키마의 필드만 추출해 "
+               "JSON 객체 하나로만 응답하십시오. 설명, 마크다운, 코드 블록은 포함하지 마십시오. "
+               "공고에 없는 정보는 null 또는 빈 배열로 두고, 목록 항목은 짧은 한국어 구절로 작성하십시오.\n"
+               "스키마: {{\"company\": string|null, \"role\": string|null, \"responsibilities\": [string], "
+               "\"requirements\": [string], \"preferred_qualifications\": [string], \"tech_stack\": [string]}}"),
+    ("human", "{text_content}"),
+])
+
+
+def digest_cache_key(content: str, model: str) -> str:
+    return f"{JOB_DIGEST_KEY_PREFIX}:" + hashlib.sha256(f"{model}\n{content}".encode("utf-8")).hexdigest()[:32]
+
+
+def parse_digest(raw: str) -> Optional[JobPostingDigest]:
+    """LLM 응답에서 JSON 객체를 꺼내 스키마로 검증합니다. 검증에 실패하면 None."""
+    match = re.search(r"\{.*\}", raw or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        return JobPostingDigest.model_validate_json(match.group(0))
+    except ValidationError as e:
+        logger.warning(f"[JobDigest] Digest failed schema validation: {e}")
+        return None
+
+
+def get_cached_digest(content: str, model: str) -> Optional[JobPostingDigest]:
+    try:
+        raw = get_redis_client().get(digest_cache_key(content, model))
+        return JobPostingDigest.model_validate_json(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"[JobDigest] Failed to read cached digest: {e}")
+        return None
+
+
+def extract_job_digest(content: str, model: str, groq_api_key: str) -> Optional[JobPostingDigest]:
+    """콘텐츠 해시별로 캐시된 요약을 반환하고, 없으면 LLM으로 생성·검증해 캐시합니다. 실패 시 None."""
+    cached = get_cached_digest(content, model)
+    if cached is not None:
+        record_metric("job_digest_cache_hits_total")
+        return cached
+
+    chat = ChatGroq(temperature=0, groq_api_key=groq_api_key, model_name=model,
+                    timeout=budget_timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS))
+    chain = DIGEST_PROMPT | chat | StrOutputParser()
+    raw = invoke_llm(chain, {"text_content": content}, provider="groq", model=model,
+                     estimated_tokens=estimate_tokens(content) + DIGEST_EXPECTED_OUTPUT_TOKENS)
+    digest = parse_digest(raw)
+    if digest is None or digest.is_empty():
+        record_metric("job_digest_invalid_total")
+        return None
+    try:
+        get_redis_client().set(digest_cache_key(content, model), digest.model_dump_json(),
+                               ex=settings.JOB_DIGEST_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"[JobDigest] Failed to cache digest: {e}")
+    return digest
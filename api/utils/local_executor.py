@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Set, Tuple
+
+from celery import states
+
+from api.core.config import settings
+from api.utils.metrics_utils import observe_duration, record_metric
+
+logger = logging.getLogger(__name__)
+
+# 1단계는 프로세스 메모리를 크게 쓰므로 celery 모드의 browser 워커처럼 동시 실행 수를 따로 제한
+BROWSER_TASK_NAME = "celery_tasks.step_1_extract_html"
+
+
+class LocalPipelineExecutor:
+    """EXECUTION_MODE=local에서 Celery 체인 대신 단계 시그니처들을 FastAPI 이벤트 루프의 asyncio 작업으로 차례로 실행합니다.
+
+    각 단계는 스레드 풀에서 Signature.apply()(eager)로 실행하므로 checkpointed/cancellable 래퍼, 진행 보고, 재시도가
+    Celery 모드와 같게 동작하고, 단계 사이 결과는 브로커 직렬화 없이 그대로 넘깁니다.
+    (프로세스 풀은 인메모리 저장소를 공유하지 못하므로 사용하지 않음)"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._browser_slots: Optional[asyncio.Semaphore] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """FastAPI 시작 시 이벤트 루프 안에서 호출합니다."""
+        self._loop = loop
+        self._pool = ThreadPoolExecutor(max_workers=settings.LOCAL_EXECUTOR_MAX_WORKERS, thread_name_prefix="cvf-local")
+        self._browser_slots = asyncio.Semaphore(settings.LOCAL_BROWSER_CONCURRENCY)
+        logger.info(f"[LocalExecutor] Started (workers={settings.LOCAL_EXECUTOR_MAX_WORKERS}, "
+                    f"browser_concurrency={settings.LOCAL_BROWSER_CONCURRENCY}).")
+
+    async def stop(self) -> None:
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        if self._pool is not None:
+            # 실행 중인 단계는 끝까지 돌지만 기다리지 않음 (진행 중 파이프라인은 /resume으로 재개)
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        logger.info("[LocalExecutor] Stopped.")
+
+    def submit(self, root_task_id: str, signatures: List[Any], on_success: Any, on_failure: Any) -> None:
+        """파이프라인 실행을 이벤트 루프에 예약합니다. 루프 스레드와 asyncio.to_thread 작업 어디서든 호출할 수 있습니다.
+
+        Celery 체인과 같이 마지막 단계가 루트 작업 ID를 쓰고, 끝나면 on_success(결과) 또는 on_failure(예외)를 실행합니다."""
+        if self._loop is None:
+            raise RuntimeError("Local executor is not started (EXECUTION_MODE=local runs pipelines inside the FastAPI process).")
+        self._loop.call_soon_threadsafe(self._spawn, root_task_id, list(signatures), on_success, on_failure)
+
+    def _spawn(self, root_task_id: str, signatures: List[Any], on_success: Any, on_failure: Any) -> None:
+        task = self._loop.create_task(self._run(root_task_id, signatures, on_success, on_failure))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, root_task_id: str, signatures: List[Any], on_success: Any, on_failure: Any) -> None:
+        log_prefix = f"[LocalExecutor / Root {root_task_id}]"
+        started = time.perf_counter()
+        previous: Tuple[Any, ...] = ()
+        try:
+            for index, sig in enumerate(signatures):
+                step_task_id = root_task_id if index == len(signatures) - 1 else str(uuid.uuid4())
+                eager = await self._apply(sig, previous, step_task_id)
+                if eager.state == states.IGNORED:
+                    # 취소·마감으로 중단된 단계: 상태는 cancellable 래퍼가 이미 REVOKED로 기록
+                    logger.info(f"{log_prefix} Step {sig.task} stopped the pipeline (ignored).")
+                    return
+                if eager.state == states.REJECTED:
+                    # Reject로 끝난 단계는 실패 상태를 이미 기록함. Celery 모드와 같이 link_error(on_failure)를 실행하지 않음
+                    logger.error(f"{log_prefix} Step {sig.task} rejected: {eager.result!r}")
+                    record_metric("local_pipelines_total", state=states.FAILURE)
+                    return
+                if eager.state != states.SUCCESS:
+                    logger.error(f"{log_prefix} Step {sig.task} failed: {eager.result!r}")
+                    await self._apply(on_failure, (eager.result,), str(uuid.uuid4()))
+                    record_metric("local_pipelines_total", state=states.FAILURE)
+                    return
+                previous = (eager.result,)
+            await self._apply(on_success, previous, str(uuid.uuid4()))
+            record_metric("local_pipelines_total", state=states.SUCCESS)
+            observe_duration("local_pipeline_seconds", time.perf_counter() - started)
+        except asyncio.CancelledError:
+            logger.warning(f"{log_prefix} Pipeline interrupted by shutdown.")
+            raise
+        except Exception as e:
+            logger.error(f"{log_prefix} Unexpected executor error: {e}", exc_info=True)
+
+    async def _apply(self, sig: Any, args: Tuple[Any, ...], task_id: str):
+        # Celery 체인과 같이 이전 단계 결과를 첫 번째 위치 인자로 붙여 실행
+        apply = functools.partial(sig.apply, args, task_id=task_id)
+        if sig.task == BROWSER_TASK_NAME:
+            async with self._browser_slots:
+                return await self._loop.run_in_executor(self._pool, apply)
+        return await self._loop.run_in_executor(self._pool, apply)
+
+
+local_executor = LocalPipelineExecutor()
@@ -0,0 +1,79 @@
+import logging
+from typing import Dict, Optional
+
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "cvf:metrics"
+EWMA_ALPHA = 0.2 # 지수 가중 이동 평균에서 새 관측값의 가중치 (대략 최근 10회 관측이 값을 결정)
+
+# 해시 필드의 이동 평균을 원자적으로 갱신 (첫 관측은 그대로 저장)
+_EWMA_LUA = """
+local value = tonumber(ARGV[2])
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current then
+    value = tonumber(current) + tonumber(ARGV[3]) * (value - tonumber(current))
+end
+redis.call('HSET', KEYS[1], ARGV[1], tostring(value))
+return tostring(value)
+"""
+
+
+def _metric_field(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    label_str = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{label_str}}}"
+
+
+def record_metric(name: str, value: float = 1, **labels) -> None:
+    """카운터성 지표를 Redis 해시에 누적합니다. 지표 기록 실패는 작업 흐름에 영향을 주지 않습니다."""
+    try:
+        get_redis_client().hincrbyfloat(METRICS_KEY, _metric_field(name, labels), value)
+    except Exception as e:
+        logger.warning(f"[Metrics] Failed to record metric {name} ({labels}): {e}")
+
+
+def observe_value(name: str, value: float, **labels) -> None:
+    """관측값을 _count/_sum 쌍으로 누적합니다 (평균 = sum / count)."""
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hincrbyfloat(METRICS_KEY, _metric_field(f"{name}_count", labels), 1)
+        pipe.hincrbyfloat(METRICS_KEY, _metric_field(f"{name}_sum", labels), value)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[Metrics] Failed to observe {name} ({labels}): {e}")
+
+
+def observe_duration(name: str, seconds: float, **labels) -> None:
+    """소요 시간 지표를 _count/_sum 쌍으로 누적합니다."""
+    observe_value(name, seconds, **labels)
+
+
+def observe_ewma(name: str, value: float, **labels) -> None:
+    """관측값의 지수 가중 이동 평균을 {name}_ewma 필드에 갱신합니다 (누적 평균과 달리 최근 값을 따라감)."""
+    try:
+        get_redis_client().eval(_EWMA_LUA, 1, METRICS_KEY, _metric_field(f"{name}_ewma", labels), repr(value), repr(EWMA_ALPHA))
+    except Exception as e:
+        logger.warning(f"[Metrics] Failed to update moving average {name} ({labels}): {e}")
+
+
+def get_metrics_snapshot() -> Dict[str, float]:
+    """누적된 모든 지표를 {필드: 값} 형태로 반환합니다."""
+    try:
+        raw = get_redis_client().hgetall(METRICS_KEY)
+        return {field: float(value) for field, value in sorted(raw.items())}
+    except Exception as e:
+        logger.warning(f"[Metrics] Failed to read metrics snapshot: {e}")
+        return {}
+
+
+def get_recent_average(name: str, **labels) -> Optional[float]:
+    """observe_ewma로 갱신한 최근 이동 평균을 반환합니다. 기록이 없으면 None."""
+    try:
+        value = get_redis_client().hget(METRICS_KEY, _metric_field(f"{name}_ewma", labels))
+        return float(value) if value is not None else None
+    except Exception as e:
+        logger.warning(f"[Metrics] Failed to read moving average {name} ({labels}): {e}")
+        return None
@@ -1,9 +1,17 @@
 import logging
+import os
+import threading
 import uuid
 import time
+from contextlib import contextmanager
 from bs4 import BeautifulSoup
-from playwright.sync_api import Error as PlaywrightError, Page, Frame, Locator, ElementHandle # Frame, Locator, ElementHandle 추가
-from typing import Union # 추가
+from celery.signals import worker_process_shutdown
+from playwright.sync_api import sync_playwright, Browser, Playwright, Error as PlaywrightError, Page, Frame, Locator, ElementHandle # Frame, Locator, ElementHandle 추가
+from typing import Iterator, Optional, Union # 추가
+
+from api.core.config import settings
+from api.utils.deadlines import budget_timeout_ms
+from api.utils.metrics_utils import record_metric
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -16,6 +24,100 @@ IFRAME_LOAD_TIMEOUT = 30000  # 밀리초
 ELEMENT_HANDLE_TIMEOUT = 20000 # 밀리초
 GET_ATTRIBUTE_TIMEOUT = 10000 # 밀리초
 EVALUATE_TIMEOUT_SHORT = 10000 # 밀리초
+BROWSER_LAUNCH_ARGS = ['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
+
+
+class _SharedBrowser:
+    """워커 프로세스에서 여러 1단계 작업이 재사용하는 Playwright 드라이버와 Chromium.
+
+    Playwright sync API는 시작한 스레드에서만 쓸 수 있으므로 같은 프로세스·스레드에서만 재사용합니다."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.thread_id = threading.get_ident()
+        self.playwright: Playwright = sync_playwright().start()
+        self.browser: Optional[Browser] = None
+        self.pages_served = 0
+
+    def usable_here(self) -> bool:
+        return self.pid == os.getpid() and self.thread_id == threading.get_ident()
+
+    def get_browser(self) -> Browser:
+        if self.browser is None or not self.browser.is_connected() or self.pages_served >= settings.BROWSER_REUSE_MAX_PAGES:
+            self.close_browser()
+            self.browser = self.playwright.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+            self.pages_served = 0
+            record_metric("browser_launches_total", mode="shared")
+            logger.info(f"[SharedBrowser / pid {self.pid}] Chromium launched for reuse.")
+        self.pages_served += 1
+        return self.browser
+
+    def close_browser(self) -> None:
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception as e:
+                logger.warning(f"[SharedBrowser / pid {self.pid}] Error closing shared browser: {e}")
+            self.browser = None
+
+    def stop(self) -> None:
+        self.close_browser()
+        try:
+            self.playwright.stop()
+        except Exception as e:
+            logger.warning(f"[SharedBrowser / pid {self.pid}] Error stopping Playwright: {e}")
+
+
+_shared_browser: Optional[_SharedBrowser] = None
+
+
+def _get_shared_browser() -> Optional[_SharedBrowser]:
+    global _shared_browser
+    if not settings.BROWSER_REUSE_ENABLED:
+        return None
+    if _shared_browser is None or _shared_browser.pid != os.getpid():
+        # fork 이전에 만든 인스턴스는 자식 프로세스에서 쓸 수 없으므로 새로 시작
+        _shared_browser = _SharedBrowser()
+    return _shared_browser if _shared_browser.usable_here() else None
+
+
+@contextmanager
+def playwright_session() -> Iterator[Playwright]:
+    """BROWSER_REUSE_ENABLED이면 프로세스에서 재사용하는 Playwright를, 아니면(또는 다른 스레드면) 작업 전용 Playwright를 제공합니다."""
+    shared = _get_shared_browser()
+    if shared is not None:
+        yield shared.playwright
+        return
+    with sync_playwright() as p:
+        yield p
+
+
+def launch_browser(p: Playwright) -> Browser:
+    """공유 Playwright이면 재사용 중인 브라우저를, 아니면 새 브라우저를 실행해 반환합니다."""
+    if _shared_browser is not None and p is _shared_browser.playwright:
+        return _shared_browser.get_browser()
+    record_metric("browser_launches_total", mode="dedicated")
+    return p.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+
+
+def release_browser(browser: Browser) -> None:
+    """작업이 끝난 브라우저를 정리합니다. 공유 브라우저는 이 작업이 연 페이지(컨텍스트)만 닫고 유지합니다."""
+    if _shared_browser is not None and browser is _shared_browser.browser:
+        try:
+            for context in list(browser.contexts):
+                context.close()
+        except Exception as e:
+            logger.warning(f"[SharedBrowser / pid {_shared_browser.pid}] Error closing contexts, restarting browser on next use: {e}")
+            _shared_browser.close_browser()
+        return
+    browser.close()
+
+
+@worker_process_shutdown.connect
+def _stop_shared_browser(**kwargs):
+    if _shared_browser is not None and _shared_browser.usable_here():
+        _shared_browser.stop()
+
 
 def _flatten_iframes_in_live_dom_sync(current_playwright_context: Union[Page, Frame],
                                  current_depth: int,
@@ -86,7 +188,7 @@ def _flatten_iframes_in_live_dom_sync(current_playwright_context: Union[Page, Fr
             logger.info(f"{log_prefix} Processing iframe (loop iteration #{loop_iteration_count}, Effective ID: {iframe_log_id}).")
             iframe_locator.evaluate("el => el.setAttribute('data-cvf-processing', 'true')", timeout=EVALUATE_TIMEOUT_SHORT)
 
-            iframe_handle = iframe_locator.element_handle(timeout=ELEMENT_HANDLE_TIMEOUT)
+            iframe_handle = iframe_locator.element_handle(timeout=budget_timeout_ms(ELEMENT_HANDLE_TIMEOUT))
             if not iframe_handle:
                 logger.warning(f"{log_prefix} Null element_handle for iframe {iframe_log_id}. Marking with error and skipping.")
                 iframe_locator.evaluate("el => { el.setAttribute('data-cvf-error', 'true'); el.removeAttribute('data-cvf-processing'); }", timeout=EVALUATE_TIMEOUT_SHORT)
@@ -121,7 +223,7 @@ def _flatten_iframes_in_live_dom_sync(current_playwright_context: Union[Page, Fr
 
             try:
                 logger.info(f"{log_prefix} Waiting for child_frame (ID: {iframe_log_id}, URL: {child_frame_url_for_log}) to load (domcontentloaded)...")
-                child_frame.wait_for_load_state('domcontentloaded', timeout=IFRAME_LOAD_TIMEOUT)
+                child_frame.wait_for_load_state('domcontentloaded', timeout=budget_timeout_ms(IFRAME_LOAD_TIMEOUT))
                 final_child_frame_url = "[child frame final URL not accessible]"
                 try:
                     final_child_frame_url = child_frame.url
@@ -0,0 +1,73 @@
+import logging
+import time
+from typing import Optional
+
+from api.core.config import settings
+from api.utils.metrics_utils import observe_duration, record_metric
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# URL single-flight 키별 선행 처리 기록 (필드: prefetch_id, started_at, finished_at). 적중률·절약 시간 측정용
+PREFETCH_KEY_PREFIX = "cvf:prefetch"
+
+
+def _prefetch_key(work_key: str) -> str:
+    return f"{PREFETCH_KEY_PREFIX}:{work_key}"
+
+
+def record_prefetch_started(work_key: str, prefetch_id: str) -> None:
+    try:
+        pipe = get_redis_client().pipeline(transaction=True)
+        pipe.delete(_prefetch_key(work_key))
+        pipe.hset(_prefetch_key(work_key), mapping={"prefetch_id": prefetch_id, "started_at": repr(time.time())})
+        pipe.expire(_prefetch_key(work_key), settings.PREFETCH_RESULT_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[Prefetch / {work_key}] Failed to record prefetch start: {e}")
+    record_metric("prefetch_started_total")
+
+
+def record_prefetch_finished(work_key: str, prefetch_id: str, is_success: bool) -> None:
+    """선행 처리(1~3단계)가 끝난 시각을 기록합니다. 실패하면 기록을 지워 이후 제출이 적중으로 집계되지 않게 합니다.
+
+    prefetch_id가 기록의 소유자가 아니면 (일반 파이프라인, 이미 처리된 종료) 아무것도 하지 않습니다."""
+    try:
+        client = get_redis_client()
+        if client.hget(_prefetch_key(work_key), "prefetch_id") != prefetch_id:
+            return
+        if is_success:
+            client.hset(_prefetch_key(work_key), "finished_at", repr(time.time()))
+        else:
+            client.delete(_prefetch_key(work_key))
+    except Exception as e:
+        logger.warning(f"[Prefetch / {work_key}] Failed to record prefetch completion: {e}")
+        return
+    record_metric("prefetch_finished_total", state="SUCCESS" if is_success else "FAILURE")
+
+
+def record_prefetch_lookup(work_key: str, is_leader: bool) -> Optional[str]:
+    """제출된 파이프라인이 선행 처리 결과를 쓰는지 집계합니다: ready(완료된 결과 사용) | in_flight(진행 중 작업에 합류) | miss.
+
+    적중이면 1~3단계에서 기다리지 않아도 된 시간(완료: 선행 처리 소요 시간, 진행 중: 이미 진행된 시간)을
+    prefetch_time_saved_seconds로 누적하고 결과를 반환합니다."""
+    if not settings.PREFETCH_ENABLED:
+        return None
+    record = None
+    if not is_leader:
+        try:
+            record = get_redis_client().hgetall(_prefetch_key(work_key))
+        except Exception as e:
+            logger.warning(f"[Prefetch / {work_key}] Failed to read prefetch record: {e}")
+    if not record or "started_at" not in record:
+        record_metric("prefetch_lookups_total", result="miss")
+        return "miss"
+
+    started_at = float(record["started_at"])
+    if record.get("finished_at"):
+        result, saved = "ready", float(record["finished_at"]) - started_at
+    else:
+        result, saved = "in_flight", time.time() - started_at
+    record_metric("prefetch_lookups_total", result=result)
+    observe_duration("prefetch_time_saved_seconds", max(0.0, saved), result=result)
+    return result
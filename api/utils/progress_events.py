@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+from api.core.config import settings
+from api.utils.progress_store import PROGRESS_CHANNEL_PREFIX, aget_progress
+from api.utils.redis_utils import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+StatusSnapshot = Tuple[str, Any]
+
+
+class ProgressBroadcaster:
+    """프로세스당 하나의 Redis pub/sub 연결로 진행 상태 변경 알림을 받아 같은 작업의 SSE 구독자들에게 나눠 줍니다.
+
+    알림 한 건당 해시를 한 번만 읽어 모든 구독자 큐에 최신 상태를 넣습니다 (느린 구독자는 중간 상태를 건너뜀)."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        self._ensure_listener()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(task_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(task_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[task_id]
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        pattern = f"{PROGRESS_CHANNEL_PREFIX}:*"
+        if settings.LOCAL_MODE:
+            await self._listen_local(pattern)
+            return
+        backoff = 1.0
+        while True:
+            pubsub = get_async_redis_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(pattern)
+                logger.info(f"[ProgressBroadcaster] Subscribed to {pattern}.")
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    await self._on_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 끊긴 동안 놓친 알림은 SSE 쪽의 느린 폴링이 보완
+                logger.warning(f"[ProgressBroadcaster] Pub/sub connection lost: {e}. Reconnecting in {backoff:.0f}s.")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def _listen_local(self, pattern: str) -> None:
+        # 로컬 모드: 알림은 실행기 스레드에서 인메모리 서버로 발행되므로 스레드 안전한 동기 pub/sub을 별도 스레드에서 읽음
+        pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(pattern)
+        logger.info(f"[ProgressBroadcaster] Subscribed to {pattern} (in-process).")
+        try:
+            while True:
+                message = await asyncio.to_thread(pubsub.get_message, timeout=1.0)
+                if message:
+                    await self._on_message(message)
+        finally:
+            pubsub.close()
+
+    async def _on_message(self, message: Dict[str, Any]) -> None:
+        if message.get("type") != "pmessage":
+            return
+        task_id = message["channel"][len(PROGRESS_CHANNEL_PREFIX) + 1:]
+        if task_id in self._subscribers:
+            await self._dispatch(task_id)
+
+    async def _dispatch(self, task_id: str) -> None:
+        snapshot = await aget_progress(task_id)
+        if snapshot is None:
+            return
+        for queue in list(self._subscribers.get(task_id, ())):
+            publish_latest(queue, snapshot)
+
+
+def publish_latest(queue: asyncio.Queue, snapshot: StatusSnapshot) -> None:
+    """크기 1 큐에 이전 값을 버리고 최신 상태만 남깁니다."""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(snapshot)
+
+
+progress_broadcaster = ProgressBroadcaster()
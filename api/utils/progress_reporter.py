@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from celery import states
+from celery.signals import task_postrun
+
+from api.core.config import settings
+from api.utils.cancellation import PipelineCancelled, is_cancelled
+from api.utils.deadlines import PipelineDeadlineExceeded, deadline_passed
+
+logger = logging.getLogger(__name__)
+
+# 프로세스당 하나의 기록 스레드 (작업 스레드의 임계 경로 밖에서 순서대로 기록)
+_writer: Optional[ThreadPoolExecutor] = None
+_writer_pid: Optional[int] = None
+_writer_lock = threading.Lock()
+
+# 루트 작업 ID -> 활성 리포터 (종료 상태 기록 전에 대기 중인 진행 상태를 먼저 내보내기 위함)
+_active_reporters: Dict[str, "ProgressReporter"] = {}
+
+
+def _get_writer() -> ThreadPoolExecutor:
+    global _writer, _writer_pid
+    if _writer is not None and _writer_pid == os.getpid():
+        return _writer
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="progress-writer")
+            _writer_pid = os.getpid()
+    return _writer
+
+
+def _default_root_writer(root_task_id: str, state: str, meta: Dict[str, Any]) -> None:
+    # celery_utils가 이 모듈을 import하므로 순환 import를 피하기 위해 지연 import
+    from api.utils.celery_utils import _update_root_task_state
+    _update_root_task_state(root_task_id=root_task_id, state=state, meta=meta)
+
+
+class ProgressReporter:
+    """파이프라인 단계의 진행 상태 보고를 병합·간격 제한해 백그라운드 스레드에서 기록합니다.
+
+    min_interval 안에 들어온 보고는 대기 중인 필드에 병합되고 마지막 값만 기록됩니다.
+    종료 상태(SUCCESS/FAILURE 등)와 final=True 보고는 대기분과 함께 호출 스레드에서 즉시 기록됩니다."""
+
+    def __init__(self, task, root_task_id: str, min_interval: Optional[float] = None,
+                 root_writer: Optional[Callable[[str, str, Dict[str, Any]], None]] = None,
+                 task_writer: Optional[Callable[[str, str, Dict[str, Any]], None]] = None,
+                 cancel_checker: Optional[Callable[[str], bool]] = None):
+        self.root_task_id = root_task_id
+        # 백그라운드 스레드에서는 task.request가 비어 있으므로 작업 ID를 미리 보관
+        self.task_id = str(task.request.id) if task is not None else None
+        self.min_interval = settings.PROGRESS_MIN_INTERVAL_SECONDS if min_interval is None else min_interval
+        self._root_writer = root_writer or _default_root_writer
+        if task_writer is None and task is not None:
+            task_writer = lambda task_id, state, meta: task.update_state(task_id=task_id, state=state, meta=meta)
+        self._task_writer = task_writer
+        self._cancel_checker = cancel_checker or is_cancelled
+
+        self._lock = threading.Lock()
+        self._pending_state: Optional[str] = None
+        self._pending_meta: Dict[str, Any] = {}
+        self._pending_task_meta: Optional[Dict[str, Any]] = None
+        self._last_write_at = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._inflight: Optional[Future] = None
+        self._cancel_checked_at = 0.0
+        self.reports = 0
+        self.writes = 0
+        self.closed = False
+        _active_reporters[root_task_id] = self
+
+    def report(self, state: str, meta: Dict[str, Any], task_meta: Optional[Dict[str, Any]] = None,
+               final: bool = False) -> None:
+        """루트 작업 meta(와 선택적으로 하위 작업 meta)를 보고합니다.
+
+        중간 보고 지점에서 파이프라인 취소·마감 여부를 확인해(최대 CANCEL_CHECK_INTERVAL_SECONDS마다 한 번) 해당하면
+        대기분을 버리고 PipelineCancelled/PipelineDeadlineExceeded를 발생시킵니다."""
+        if not final and state not in states.READY_STATES:
+            self._raise_if_cancelled()
+        with self._lock:
+            self.reports += 1
+            self._pending_state = state
+            self._pending_meta.update(meta)
+            if task_meta is not None:
+                self._pending_task_meta = task_meta
+            if final or state in states.READY_STATES:
+                flush_now = "sync"
+            elif time.monotonic() - self._last_write_at >= self.min_interval:
+                flush_now = "async"
+            else:
+                flush_now = None
+                self._schedule_timer_locked()
+
+        if flush_now == "sync":
+            self.flush()
+            if final:
+                self.close()
+        elif flush_now == "async":
+            self._submit()
+
+    def _raise_if_cancelled(self) -> None:
+        now = time.monotonic()
+        if now - self._cancel_checked_at < settings.CANCEL_CHECK_INTERVAL_SECONDS:
+            return
+        self._cancel_checked_at = now
+        if self._cancel_checker(self.root_task_id):
+            abort = PipelineCancelled()
+        elif deadline_passed():
+            abort = PipelineDeadlineExceeded()
+        else:
+            return
+        with self._lock:
+            # 취소 후 기록된 진행 상태가 REVOKED를 덮어쓰지 않도록 대기분 폐기
+            self._pending_state, self._pending_meta, self._pending_task_meta = None, {}, None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.close()
+        raise abort
+
+    def flush(self) -> None:
+        """진행 중인 백그라운드 기록을 기다린 뒤 대기분을 호출 스레드에서 기록합니다."""
+        inflight = self._inflight
+        if inflight is not None:
+            try:
+                inflight.result()
+            except Exception:
+                pass
+        self._write_pending()
+
+    def close(self) -> None:
+        """대기분을 기록하고 리포터를 해제합니다. 보고/기록 횟수를 로그로 남깁니다."""
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        if _active_reporters.get(self.root_task_id) is self:
+            del _active_reporters[self.root_task_id]
+        logger.info(f"[ProgressReporter / Root {self.root_task_id} / Task {self.task_id}] "
+                    f"Progress reports coalesced: {self.reports} reports -> {self.writes} writes")
+
+    def _schedule_timer_locked(self) -> None:
+        # 간격 제한으로 보류된 보고가 다음 보고 없이도 늦게나마 기록되도록 예약
+        if self._timer is not None:
+            return
+        delay = max(0.0, self.min_interval - (time.monotonic() - self._last_write_at))
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        if not self.closed:
+            self._submit()
+
+    def _submit(self) -> None:
+        self._inflight = _get_writer().submit(self._write_pending)
+
+    def _write_pending(self) -> None:
+        with self._lock:
+            if self._pending_state is None:
+                return
+            state, meta, task_meta = self._pending_state, self._pending_meta, self._pending_task_meta
+            self._pending_state, self._pending_meta, self._pending_task_meta = None, {}, None
+            self._last_write_at = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self.writes += 1
+        try:
+            if task_meta is not None and self._task_writer is not None and self.task_id:
+                self._task_writer(self.task_id, "PROGRESS", task_meta)
+            self._root_writer(self.root_task_id, state, meta)
+        except Exception as e:
+            logger.warning(f"[ProgressReporter / Root {self.root_task_id}] Failed to write progress: {e}")
+
+
+def flush_pending_progress(root_task_id: str) -> None:
+    """루트 작업의 대기 중인 진행 상태를 기록하고 리포터를 닫습니다 (종료 상태 기록 직전에 호출)."""
+    reporter = _active_reporters.get(root_task_id)
+    if reporter is not None:
+        reporter.close()
+
+
+@task_postrun.connect
+def _close_reporters_after_task(task_id=None, **kwargs) -> None:
+    # 재시도·예외 등으로 닫히지 않은 리포터의 대기분을 작업 종료 시 기록
+    for reporter in [r for r in list(_active_reporters.values()) if r.task_id == task_id]:
+        reporter.close()
@@ -0,0 +1,118 @@
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from celery import states
+
+from api.core.config import settings
+from api.utils.redis_utils import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY_PREFIX = "cvf:progress"
+PROGRESS_CHANNEL_PREFIX = "cvf:progress:events"
+# 메타 키와 겹치지 않도록 예약 필드는 밑줄로 시작
+STATE_FIELD = "_state"
+UPDATED_AT_FIELD = "_updated_at"
+
+TERMINAL_STATES = frozenset(states.READY_STATES)
+
+# 현재 상태가 종료 상태가 아닐 때만 필드를 갱신하는 check-and-set 스크립트 (종료 상태면 false)
+# ARGV: 상태 필드 이름, TTL, 알림 채널, 새 상태, 종료 상태 개수 N, 종료 상태 N개, 필드/값 쌍...
+_UPDATE_IF_ACTIVE_LUA = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local terminal_count = tonumber(ARGV[5])
+for i = 6, 5 + terminal_count do
+    if current == ARGV[i] then
+        return false
+    end
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 6 + terminal_count))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('PUBLISH', ARGV[3], ARGV[4])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def progress_key(task_id: str) -> str:
+    return f"{PROGRESS_KEY_PREFIX}:{task_id}"
+
+
+def progress_channel(task_id: str) -> str:
+    return f"{PROGRESS_CHANNEL_PREFIX}:{task_id}"
+
+
+def _encode_fields(state: str, meta: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    fields = {k: json.dumps(v, ensure_ascii=False, default=str) for k, v in (meta or {}).items()}
+    fields[STATE_FIELD] = state
+    fields[UPDATED_AT_FIELD] = repr(time.time())
+    return fields
+
+
+def decode_progress_fields(raw: Dict[Any, Any]) -> Tuple[str, Dict[str, Any]]:
+    if raw and isinstance(next(iter(raw)), bytes):
+        # decode_responses=False 클라이언트로 읽은 경우
+        raw = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+    meta: Dict[str, Any] = {}
+    for field, value in raw.items():
+        if field.startswith("_"):
+            continue
+        try:
+            meta[field] = json.loads(value)
+        except (TypeError, ValueError):
+            meta[field] = value
+    return raw.get(STATE_FIELD, states.PENDING), meta
+
+
+def update_progress(task_id: str, state: str, meta: Optional[Dict[str, Any]] = None, replace: bool = False,
+                    return_merged: bool = False) -> Optional[Dict[str, Any]]:
+    """전달된 필드만 HSET으로 갱신하고 작업별 채널에 변경을 알립니다 (읽기 없이 한 번의 MULTI/EXEC 왕복).
+
+    replace이면 기존 필드를 지우고 새로 씁니다. return_merged이면 같은 트랜잭션에서 병합된 메타를 읽어 반환합니다."""
+    key = progress_key(task_id)
+    pipe = get_redis_client().pipeline(transaction=True)
+    if replace:
+        pipe.delete(key)
+    pipe.hset(key, mapping=_encode_fields(state, meta))
+    pipe.expire(key, settings.PROGRESS_TTL_SECONDS)
+    if return_merged:
+        pipe.hgetall(key)
+    # SSE 구독자는 알림을 받으면 해시를 다시 읽으므로 메시지에는 상태만 담음
+    pipe.publish(progress_channel(task_id), state)
+    results = pipe.execute()
+    return decode_progress_fields(results[-2])[1] if return_merged else None
+
+
+def update_progress_if_active(task_id: str, state: str, meta: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """작업이 아직 종료 상태가 아닐 때만 update_progress처럼 필드를 갱신하고 병합된 메타를 반환합니다.
+
+    확인과 기록을 한 스크립트로 처리하므로 그 사이에 기록된 SUCCESS/FAILURE를 덮어쓰지 않습니다. 이미 끝났으면 None."""
+    terminal = sorted(TERMINAL_STATES)
+    pairs = [item for field_value in _encode_fields(state, meta).items() for item in field_value]
+    raw = get_redis_client().eval(_UPDATE_IF_ACTIVE_LUA, 1, progress_key(task_id),
+                                  STATE_FIELD, settings.PROGRESS_TTL_SECONDS, progress_channel(task_id), state,
+                                  len(terminal), *terminal, *pairs)
+    if not raw:
+        return None
+    return decode_progress_fields(dict(zip(raw[::2], raw[1::2])))[1]
+
+
+def get_progress(task_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(상태, 메타)를 반환합니다. 진행 정보가 없으면 None."""
+    try:
+        raw = get_redis_client().hgetall(progress_key(task_id))
+    except Exception as e:
+        logger.warning(f"[ProgressStore / {task_id}] Failed to read progress: {e}")
+        return None
+    return decode_progress_fields(raw) if raw else None
+
+
+async def aget_progress(task_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """get_progress의 asyncio 버전 (웹 계층 이벤트 루프용)."""
+    try:
+        raw = await get_async_redis_client().hgetall(progress_key(task_id))
+    except Exception as e:
+        logger.warning(f"[ProgressStore / {task_id}] Failed to read progress: {e}")
+        return None
+    return decode_progress_fields(raw) if raw else None
@@ -0,0 +1,64 @@
+import logging
+import time
+from typing import Dict
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+
+from api.celery_app import STAGE_QUEUES, celery_app
+from api.utils.metrics_utils import observe_duration
+from api.utils.redis_utils import get_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+# 발행 시각을 메시지 헤더로 전달해 워커에서 큐 대기 시간을 계산
+SENT_AT_HEADER = "cvf_sent_at"
+
+# 작업 ID -> 실행 시작 시각 (워커 프로세스 내부)
+_started_at: Dict[str, float] = {}
+
+
+def _queue_of(task) -> str:
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or celery_app.conf.task_default_queue
+
+
+def _short_task_name(task) -> str:
+    return task.name.rsplit(".", 1)[-1]
+
+
+@before_task_publish.connect
+def _stamp_sent_at(headers=None, **kwargs) -> None:
+    if headers is not None:
+        headers.setdefault(SENT_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def _record_queue_wait(task_id=None, task=None, **kwargs) -> None:
+    _started_at[task_id] = time.perf_counter()
+    sent_at = getattr(task.request, SENT_AT_HEADER, None)
+    if sent_at:
+        # countdown 재시도는 대기 시간에 예약 지연이 포함됨
+        observe_duration("celery_queue_wait_seconds", max(0.0, time.time() - float(sent_at)),
+                         queue=_queue_of(task), task=_short_task_name(task))
+
+
+@task_postrun.connect
+def _record_task_runtime(task_id=None, task=None, state=None, **kwargs) -> None:
+    started = _started_at.pop(task_id, None)
+    if started is None:
+        return
+    observe_duration("celery_task_seconds", time.perf_counter() - started,
+                     queue=_queue_of(task), task=_short_task_name(task), state=state or "UNKNOWN")
+
+
+async def aget_queue_depths() -> Dict[str, int]:
+    """단계별 큐와 기본 큐에 대기 중인 메시지 수를 반환합니다 (Redis 브로커의 리스트 길이)."""
+    queues = list(STAGE_QUEUES) + [celery_app.conf.task_default_queue]
+    try:
+        pipe = get_async_redis_client().pipeline(transaction=False)
+        for queue in queues:
+            pipe.llen(queue)
+        return dict(zip(queues, await pipe.execute()))
+    except Exception as e:
+        logger.warning(f"[QueueMetrics] Failed to read queue depths: {e}")
+        return {}
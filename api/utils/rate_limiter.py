@@ -0,0 +1,348 @@
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from api.core.config import settings
+from api.utils.metrics_utils import observe_duration, record_metric
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "cvf:ratelimit"
+QUEUE_HEARTBEAT_TIMEOUT_SECONDS = 10 # 이 시간 동안 재시도하지 않은 대기열 선두는 죽은 호출로 보고 제거
+MAX_POLL_INTERVAL_SECONDS = 0.5 # 대기 중 재확인 간격 상한 (하트비트 역할도 겸함)
+COHERE_MAX_TEXTS_PER_REQUEST = 96
+
+# 요청/토큰 버킷을 동시에 확인하고, 대기열 선두인 경우에만 차감하는 원자적 스크립트
+# 반환값: {허용 여부(1/0), 대기해야 할 시간(ms)}
+_ACQUIRE_LUA = """
+local req_key = KEYS[1]
+local tok_key = KEYS[2]
+local queue_key = KEYS[3]
+local hb_key = KEYS[4]
+local blocked_key = KEYS[5]
+
+local now = tonumber(ARGV[1])
+local rpm = tonumber(ARGV[2])
+local tpm = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local member = ARGV[5]
+local hb_timeout = tonumber(ARGV[6])
+
+redis.call('HSET', hb_key, member, now)
+if redis.call('ZSCORE', queue_key, member) == false then
+    redis.call('ZADD', queue_key, now, member)
+end
+
+while true do
+    local head = redis.call('ZRANGE', queue_key, 0, 0)[1]
+    if head == nil or head == member then break end
+    local last_seen = tonumber(redis.call('HGET', hb_key, head) or '0')
+    if last_seen >= now - hb_timeout then
+        return {0, 50}
+    end
+    redis.call('ZREM', queue_key, head)
+    redis.call('HDEL', hb_key, head)
+end
+
+local blocked_until = tonumber(redis.call('GET', blocked_key) or '0')
+if blocked_until > now then
+    return {0, math.ceil((blocked_until - now) * 1000)}
+end
+
+local function refill(key, capacity)
+    local data = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    return math.min(capacity, tokens + math.max(0, now - ts) * capacity / 60.0)
+end
+
+local req_tokens = refill(req_key, rpm)
+local tok_tokens = refill(tok_key, tpm)
+cost = math.min(cost, tpm)
+
+if req_tokens >= 1 and tok_tokens >= cost then
+    redis.call('HSET', req_key, 'tokens', req_tokens - 1, 'ts', now)
+    redis.call('HSET', tok_key, 'tokens', tok_tokens - cost, 'ts', now)
+    redis.call('EXPIRE', req_key, 3600)
+    redis.call('EXPIRE', tok_key, 3600)
+    redis.call('ZREM', queue_key, member)
+    redis.call('HDEL', hb_key, member)
+    return {1, 0}
+end
+
+redis.call('HSET', req_key, 'tokens', req_tokens, 'ts', now)
+redis.call('HSET', tok_key, 'tokens', tok_tokens, 'ts', now)
+local wait_req = 0
+if req_tokens < 1 then wait_req = (1 - req_tokens) * 60.0 / rpm end
+local wait_tok = 0
+if tok_tokens < cost then wait_tok = (cost - tok_tokens) * 60.0 / tpm end
+return {0, math.ceil(math.max(wait_req, wait_tok) * 1000)}
+"""
+
+
+class RateLimitQueueTimeout(RuntimeError):
+    """레이트 리밋 대기열에서 허용 시간 내에 차례를 받지 못했을 때 발생합니다."""
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """호출 전 토큰 수를 대략 추정합니다. (한글 등 비ASCII는 글자당 1토큰, ASCII는 4글자당 1토큰)"""
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_count = len(text) - non_ascii
+    return non_ascii + math.ceil(ascii_count / 4)
+
+
+def _parse_reset_duration(value: str) -> Optional[float]:
+    """'2m59.56s', '7.66s', '120ms' 형태의 리셋 시간을 초 단위로 변환합니다."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        amount = float(amount)
+        total += {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit] * amount
+    return total if matched else None
+
+
+def _extract_rate_limit_info(exc: Exception) -> Tuple[bool, Optional[Mapping[str, str]]]:
+    """프로바이더 SDK 예외에서 429 여부와 응답 헤더를 꺼냅니다. (Groq: exc.response, Cohere: exc.headers)"""
+    response = getattr(exc, "response", None)
+    status_code = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    is_rate_limited = status_code == 429 or type(exc).__name__ in ("RateLimitError", "TooManyRequestsError")
+    return is_rate_limited, headers
+
+
+class ProviderRateLimiter:
+    """프로바이더/모델 단위로 모든 워커가 공유하는 Redis 기반 요청·토큰 버킷입니다."""
+
+    def __init__(self, provider: str, model: str, requests_per_minute: int, tokens_per_minute: int):
+        self.provider = provider
+        self.model = model
+        self.requests_per_minute = max(1, int(requests_per_minute))
+        self.tokens_per_minute = max(1, int(tokens_per_minute))
+        base_key = f"{RATE_LIMIT_KEY_PREFIX}:{provider}:{model}"
+        self._keys = [f"{base_key}:req", f"{base_key}:tok", f"{base_key}:queue", f"{base_key}:hb", f"{base_key}:blocked_until"]
+        self._script = None
+
+    def _get_script(self):
+        if self._script is None:
+            self._script = get_redis_client().register_script(_ACQUIRE_LUA)
+        return self._script
+
+    def _try_acquire(self, member: str, estimated_tokens: int, started_at: float, max_wait_seconds: float,
+                     state: Dict[str, bool]) -> Optional[float]:
+        """버킷 차감을 한 번 시도합니다. 승인되면 None, 아니면 다음 시도까지 대기할 시간(초)을 반환합니다."""
+        now = time.time()
+        allowed, wait_ms = self._get_script()(keys=self._keys, args=[now, self.requests_per_minute, self.tokens_per_minute,
+                                                                    max(0, int(estimated_tokens)), member, QUEUE_HEARTBEAT_TIMEOUT_SECONDS])
+        if int(allowed) == 1:
+            return None
+        if not state.get("throttled"):
+            state["throttled"] = True
+            record_metric("llm_throttle_events_total", provider=self.provider, model=self.model)
+            logger.info(f"[RateLimit / {self.provider}:{self.model}] Throttled. Estimated tokens: {estimated_tokens}, suggested wait: {int(wait_ms)}ms")
+        if now - started_at > max_wait_seconds:
+            record_metric("llm_queue_timeouts_total", provider=self.provider, model=self.model)
+            raise RateLimitQueueTimeout(f"{self.provider}:{self.model} rate limit queue wait exceeded {max_wait_seconds}s")
+        return min(max(int(wait_ms), 10) / 1000.0, MAX_POLL_INTERVAL_SECONDS)
+
+    def _leave_queue(self, member: str) -> None:
+        """승인되지 않고 끝난 대기(시간 초과, 취소, 마감 초과)를 대기열과 하트비트에서 지웁니다.
+
+        남겨 두면 하트비트 만료(QUEUE_HEARTBEAT_TIMEOUT_SECONDS)까지 선두를 차지해 모든 워커의 호출을 막습니다."""
+        try:
+            pipe = get_redis_client().pipeline(transaction=True)
+            pipe.zrem(self._keys[2], member)
+            pipe.hdel(self._keys[3], member)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[RateLimit / {self.provider}:{self.model}] Failed to leave the wait queue: {e}")
+
+    def _admitted(self, started_at: float, estimated_tokens: int) -> float:
+        waited = time.time() - started_at
+        observe_duration("llm_queue_wait_seconds", waited, provider=self.provider, model=self.model)
+        if waited > 1:
+            logger.info(f"[RateLimit / {self.provider}:{self.model}] Admitted after waiting {waited:.2f}s (estimated tokens: {estimated_tokens}).")
+        return waited
+
+    def acquire(self, estimated_tokens: int, max_wait_seconds: Optional[float] = None) -> float:
+        """차례가 올 때까지 대기한 뒤 버킷을 차감합니다. 대기한 시간(초)을 반환합니다."""
+        max_wait_seconds = settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        member = uuid.uuid4().hex
+        started_at = time.time()
+        state: Dict[str, bool] = {}
+        admitted = False
+        try:
+            while True:
+                delay = self._try_acquire(member, estimated_tokens, started_at, max_wait_seconds, state)
+                if delay is None:
+                    admitted = True
+                    break
+                time.sleep(delay)
+        except RateLimitQueueTimeout:
+            raise
+        except Exception as e:
+            # Redis 장애 시에는 레이트 리밋 없이 진행 (파이프라인 자체를 막지 않음)
+            logger.warning(f"[RateLimit / {self.provider}:{self.model}] Rate limiter unavailable, proceeding without admission control: {e}")
+            return time.time() - started_at
+        finally:
+            # 승인 시에는 스크립트가 이미 제거함. 그 외 모든 종료(PipelineCancelled 등 BaseException 포함)에서 자리를 비움
+            if not admitted:
+                self._leave_queue(member)
+        return self._admitted(started_at, estimated_tokens)
+
+    async def aacquire(self, estimated_tokens: int, max_wait_seconds: Optional[float] = None) -> float:
+        """acquire의 asyncio 버전. 대기 중에도 이벤트 루프의 다른 호출을 막지 않습니다."""
+        max_wait_seconds = settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        member = uuid.uuid4().hex
+        started_at = time.time()
+        state: Dict[str, bool] = {}
+        admitted = False
+        try:
+            while True:
+                # Redis 호출은 동기 클라이언트이므로 루프를 막지 않도록 스레드에서 실행
+                delay = await asyncio.to_thread(self._try_acquire, member, estimated_tokens, started_at, max_wait_seconds, state)
+                if delay is None:
+                    admitted = True
+                    break
+                await asyncio.sleep(delay)
+        except RateLimitQueueTimeout:
+            raise
+        except Exception as e:
+            logger.warning(f"[RateLimit / {self.provider}:{self.model}] Rate limiter unavailable, proceeding without admission control: {e}")
+            return time.time() - started_at
+        finally:
+            # 취소(wait_for 만료 포함) 중에는 다시 await할 수 없으므로 동기로 한 번 호출해 자리를 비움
+            if not admitted:
+                self._leave_queue(member)
+        return self._admitted(started_at, estimated_tokens)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """429 응답 등의 레이트 리밋 헤더를 반영해 공유 버킷을 조정합니다."""
+        if not headers:
+            return
+        try:
+            lowered = {str(k).lower(): v for k, v in dict(headers).items()}
+            now = time.time()
+            client = get_redis_client()
+            pipe = client.pipeline(transaction=False)
+
+            blocked_for = _parse_reset_duration(lowered.get("retry-after"))
+            remaining_requests = lowered.get("x-ratelimit-remaining-requests")
+            remaining_tokens = lowered.get("x-ratelimit-remaining-tokens")
+            if blocked_for is None and remaining_requests is not None and int(float(remaining_requests)) <= 0:
+                blocked_for = _parse_reset_duration(lowered.get("x-ratelimit-reset-requests"))
+            if blocked_for is None and remaining_tokens is not None and int(float(remaining_tokens)) <= 0:
+                blocked_for = _parse_reset_duration(lowered.get("x-ratelimit-reset-tokens"))
+
+            if blocked_for:
+                pipe.set(self._keys[4], now + blocked_for, ex=max(1, math.ceil(blocked_for)))
+            if remaining_requests is not None:
+                pipe.hset(self._keys[0], mapping={"tokens": max(0.0, float(remaining_requests)), "ts": now})
+            if remaining_tokens is not None:
+                pipe.hset(self._keys[1], mapping={"tokens": max(0.0, float(remaining_tokens)), "ts": now})
+            pipe.execute()
+            logger.info(f"[RateLimit / {self.provider}:{self.model}] Buckets adjusted from headers. blocked_for={blocked_for}, remaining_requests={remaining_requests}, remaining_tokens={remaining_tokens}")
+        except Exception as e:
+            logger.warning(f"[RateLimit / {self.provider}:{self.model}] Failed to apply rate limit headers: {e}")
+
+    def _handle_call_error(self, e: Exception, attempt: int) -> None:
+        """429가 아니거나 재시도 한도를 넘으면 예외를 다시 던지고, 아니면 헤더를 반영합니다."""
+        is_rate_limited, headers = _extract_rate_limit_info(e)
+        if not is_rate_limited:
+            raise e
+        record_metric("llm_rate_limit_errors_total", provider=self.provider, model=self.model)
+        self.update_from_headers(headers)
+        if attempt > settings.LLM_RATE_LIMIT_MAX_429_RETRIES:
+            raise e
+        logger.warning(f"[RateLimit / {self.provider}:{self.model}] 429 received (attempt {attempt}). Re-queueing call.")
+
+    def call(self, fn: Callable[..., Any], *args, estimated_tokens: int = 0, max_wait_seconds: Optional[float] = None,
+             **kwargs) -> Any:
+        """버킷 승인 후 fn을 호출하고, 429 응답이면 헤더에 맞춰 조정한 뒤 다시 대기열에 들어갑니다."""
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens, max_wait_seconds)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                self._handle_call_error(e, attempt)
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, estimated_tokens: int = 0,
+                    max_wait_seconds: Optional[float] = None, **kwargs) -> Any:
+        """call의 asyncio 버전 (fn은 코루틴 함수, 예: runnable.ainvoke)."""
+        attempt = 0
+        while True:
+            await self.aacquire(estimated_tokens, max_wait_seconds)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                self._handle_call_error(e, attempt)
+
+
+_limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+
+
+def _load_overrides() -> Dict[str, Dict[str, int]]:
+    if not settings.LLM_RATE_LIMIT_OVERRIDES:
+        return {}
+    try:
+        return json.loads(settings.LLM_RATE_LIMIT_OVERRIDES)
+    except ValueError as e:
+        logger.error(f"LLM_RATE_LIMIT_OVERRIDES is not valid JSON, ignoring: {e}")
+        return {}
+
+
+def get_rate_limiter(provider: str, model: str) -> ProviderRateLimiter:
+    """프로바이더/모델별 레이트 리미터를 반환합니다 (프로세스 내 캐시)."""
+    limiter = _limiters.get((provider, model))
+    if limiter is None:
+        defaults = {
+            "groq": (settings.GROQ_REQUESTS_PER_MINUTE, settings.GROQ_TOKENS_PER_MINUTE),
+            "cohere": (settings.COHERE_REQUESTS_PER_MINUTE, settings.COHERE_TOKENS_PER_MINUTE),
+        }
+        rpm, tpm = defaults.get(provider, (60, 100000))
+        override = _load_overrides().get(f"{provider}:{model}", {})
+        limiter = ProviderRateLimiter(provider, model, override.get("rpm", rpm), override.get("tpm", tpm))
+        _limiters[(provider, model)] = limiter
+    return limiter
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """Embeddings 호출이 공유 레이트 리미터를 거치도록 감싸는 래퍼입니다."""
+
+    def __init__(self, embeddings: Embeddings, provider: str, model: str):
+        self.embeddings = embeddings
+        self.limiter = get_rate_limiter(provider, model)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors: List[List[float]] = []
+        # 요청당 텍스트 수 제한을 지키도록 나누어 각 요청이 버킷을 한 번씩 차감하게 함
+        for start in range(0, len(texts), COHERE_MAX_TEXTS_PER_REQUEST):
+            batch = texts[start:start + COHERE_MAX_TEXTS_PER_REQUEST]
+            vectors.extend(self.limiter.call(self.embeddings.embed_documents, batch,
+                                             estimated_tokens=sum(estimate_tokens(t) for t in batch)))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.limiter.call(self.embeddings.embed_query, text, estimated_tokens=estimate_tokens(text))
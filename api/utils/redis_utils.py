@@ -0,0 +1,76 @@
+import logging
+import ssl
+import threading
+from typing import Dict
+
+import redis
+import redis.asyncio as aioredis
+
+from api.celery_app import FINAL_REDIS_URL
+from api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# decode_responses 값별로 하나씩만 생성 (redis-py 커넥션 풀은 fork 이후 pid를 확인해 자동으로 재생성됨)
+_redis_clients: Dict[bool, redis.Redis] = {}
+_redis_clients_lock = threading.Lock()
+# FastAPI 프로세스의 이벤트 루프에서 사용하는 asyncio 클라이언트 (decode_responses 값별로 하나)
+_async_redis_clients: Dict[bool, aioredis.Redis] = {}
+# EXECUTION_MODE=local에서 Redis를 대신하는 프로세스 내 인메모리 서버 (동기·asyncio 클라이언트가 데이터와 pub/sub을 공유)
+_local_server = None
+
+
+def _local_client(decode_responses: bool, use_asyncio: bool):
+    global _local_server
+    try:
+        import fakeredis
+        import fakeredis.aioredis
+    except ImportError as e:  # 선택 의존성: 로컬 모드에서만 필요
+        raise RuntimeError("EXECUTION_MODE=local requires the 'fakeredis[lua]' package.") from e
+    if _local_server is None:
+        _local_server = fakeredis.FakeServer()
+        logger.info("EXECUTION_MODE=local: using in-process fakeredis server instead of Redis.")
+    client_cls = fakeredis.aioredis.FakeRedis if use_asyncio else fakeredis.FakeRedis
+    return client_cls(server=_local_server, decode_responses=decode_responses)
+
+
+def get_redis_client(decode_responses: bool = True) -> redis.Redis:
+    """Celery 브로커/백엔드와 동일한 Redis 인스턴스에 연결된 공용 클라이언트를 반환합니다 (로컬 모드는 인메모리 서버)."""
+    client = _redis_clients.get(decode_responses)
+    if client is not None:
+        return client
+
+    with _redis_clients_lock:
+        client = _redis_clients.get(decode_responses)
+        if client is None and settings.LOCAL_MODE:
+            client = _local_client(decode_responses, use_asyncio=False)
+            _redis_clients[decode_responses] = client
+        elif client is None:
+            client_kwargs = {"decode_responses": decode_responses, "health_check_interval": 30}
+            if FINAL_REDIS_URL.startswith("rediss://"):
+                client_kwargs["ssl_cert_reqs"] = ssl.CERT_REQUIRED
+            client = redis.Redis.from_url(FINAL_REDIS_URL, **client_kwargs)
+            _redis_clients[decode_responses] = client
+            logger.info(f"Shared Redis client created (decode_responses={decode_responses}).")
+    return client
+
+
+def get_async_redis_client(decode_responses: bool = True) -> aioredis.Redis:
+    """웹 계층 이벤트 루프용 asyncio Redis 클라이언트를 반환합니다.
+
+    풀이 가득 차면 예외 대신 빈 연결을 기다리는 BlockingConnectionPool을 사용합니다."""
+    client = _async_redis_clients.get(decode_responses)
+    if client is None and settings.LOCAL_MODE:
+        client = _local_client(decode_responses, use_asyncio=True)
+        _async_redis_clients[decode_responses] = client
+    elif client is None:
+        pool_kwargs = {"decode_responses": decode_responses, "health_check_interval": 30,
+                       "max_connections": settings.ASYNC_REDIS_MAX_CONNECTIONS}
+        if FINAL_REDIS_URL.startswith("rediss://"):
+            pool_kwargs["ssl_cert_reqs"] = ssl.CERT_REQUIRED
+        pool = aioredis.BlockingConnectionPool.from_url(FINAL_REDIS_URL, **pool_kwargs)
+        client = aioredis.Redis(connection_pool=pool)
+        _async_redis_clients[decode_responses] = client
+        logger.info(f"Shared asyncio Redis client created (decode_responses={decode_responses}, "
+                    f"max_connections={settings.ASYNC_REDIS_MAX_CONNECTIONS}).")
+    return client
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from api.core.config import settings
+from api.utils.file_utils import normalize_job_url
+from api.utils.metrics_utils import record_metric
+from api.utils.redis_utils import get_redis_client
+from api.utils.singleflight import get_result, url_work_key
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_KEY_PREFIX = "cvf:resultcache"
+
+
+def content_hash(filtered_content: str) -> str:
+    return hashlib.sha256(filtered_content.encode("utf-8")).hexdigest()[:32]
+
+
+def result_cache_key(url: str, user_prompt_text: Optional[str], variants: int) -> str:
+    """(정규화 URL, 사용자 스토리, 초안 수) 기준의 전체 파이프라인 결과 캐시 키."""
+    url_digest = hashlib.sha256(normalize_job_url(url).encode("utf-8")).hexdigest()[:32]
+    story_digest = hashlib.sha256(f"{variants}\n{user_prompt_text or ''}".encode("utf-8")).hexdigest()[:32]
+    return f"{RESULT_CACHE_KEY_PREFIX}:{url_digest}:{story_digest}"
+
+
+def store_pipeline_result(url: str, user_prompt_text: Optional[str], variants: int, filtered_content: str,
+                          result: Dict[str, Any], task_id: str) -> None:
+    """4단계 최종 결과를 공고 콘텐츠 해시와 함께 보관합니다."""
+    try:
+        payload = {
+            "content_hash": content_hash(filtered_content),
+            "task_id": task_id,
+            "stored_at": time.time(),
+            "result": result,
+        }
+        get_redis_client().set(result_cache_key(url, user_prompt_text, variants),
+                               json.dumps(payload, ensure_ascii=False), ex=settings.RESULT_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"[ResultCache / {task_id}] Failed to store pipeline result: {e}")
+
+
+def lookup_pipeline_result(url: str, user_prompt_text: Optional[str], variants: int) -> Optional[Dict[str, Any]]:
+    """보관된 결과를 반환합니다. 없거나, 같은 URL의 최신 3단계 결과와 콘텐츠 해시가 다르면 None."""
+    key = result_cache_key(url, user_prompt_text, variants)
+    try:
+        raw = get_redis_client().get(key)
+    except Exception as e:
+        logger.warning(f"[ResultCache] Failed to read pipeline result: {e}")
+        return None
+    if not raw:
+        record_metric("result_cache_lookups_total", result="miss")
+        return None
+
+    entry = json.loads(raw)
+    # 같은 URL을 최근에 다시 수집한 결과가 있으면 공고 내용이 바뀌지 않았는지 확인
+    shared = get_result(url_work_key(url))
+    if shared and shared.get("filtered_content") and content_hash(shared["filtered_content"]) != entry.get("content_hash"):
+        record_metric("result_cache_lookups_total", result="stale")
+        try:
+            get_redis_client().delete(key)
+        except Exception:
+            pass
+        return None
+    record_metric("result_cache_lookups_total", result="hit")
+    return entry
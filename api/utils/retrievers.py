@@ -0,0 +1,76 @@
+import logging
+from typing import List
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRIEVAL_K = 4 # RetrievalQA(vectorstore.as_retriever()) 기본 검색 개수와 동일
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화된 연속 float32 복사본을 반환합니다 (memory-map 입력도 한 번만 읽음)."""
+    matrix = np.array(vectors, dtype=np.float32, copy=True, order="C")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class NumpyRetriever(BaseRetriever):
+    """청크 벡터를 하나의 float32 행렬로 보관하고 코사인 유사도 top-k를 벡터화 연산으로 찾는 정확 검색기입니다.
+
+    요청마다 수십 개 수준인 청크에서는 FAISS 인덱스와 vectorstore 래퍼를 만드는 비용보다
+    행렬-벡터 곱 한 번이 더 저렴합니다."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    embeddings: Embeddings
+    docs: List[Document]
+    matrix: np.ndarray
+    k: int = DEFAULT_RETRIEVAL_K
+
+    @classmethod
+    def from_vectors(cls, docs: List[Document], vectors: np.ndarray, embeddings: Embeddings,
+                     k: int = DEFAULT_RETRIEVAL_K) -> "NumpyRetriever":
+        if len(docs) != len(vectors):
+            raise ValueError(f"docs/vectors length mismatch ({len(docs)} != {len(vectors)})")
+        return cls(embeddings=embeddings, docs=docs, matrix=_normalize_rows(vectors), k=k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        if not self.docs:
+            return []
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector /= norm
+        scores = self.matrix @ query_vector
+        k = min(self.k, len(self.docs))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        return [self.docs[i] for i in top]
+
+
+def build_retriever(docs: List[Document], vectors: np.ndarray, embeddings: Embeddings,
+                    k: int = DEFAULT_RETRIEVAL_K) -> BaseRetriever:
+    """청크 수가 NUMPY_RETRIEVER_MAX_DOCS 이하이면 NumpyRetriever, 초과하면 FAISS 검색기를 반환합니다."""
+    if len(docs) <= settings.NUMPY_RETRIEVER_MAX_DOCS:
+        return NumpyRetriever.from_vectors(docs, vectors, embeddings, k=k)
+    logger.debug(f"청크 수 {len(docs)} > {settings.NUMPY_RETRIEVER_MAX_DOCS}: FAISS 검색기 사용")
+    vectorstore = FAISS.from_embeddings(
+        text_embeddings=list(zip([d.page_content for d in docs], vectors)),
+        embedding=embeddings,
+        metadatas=[d.metadata for d in docs]
+    )
+    return vectorstore.as_retriever(search_kwargs={"k": k})
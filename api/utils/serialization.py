@@ -0,0 +1,65 @@
+import datetime
+import decimal
+import logging
+import uuid
+import zlib
+from typing import Any
+
+import msgpack
+from kombu.serialization import register
+
+from api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성: 없으면 zlib으로 압축
+    zstandard = None
+
+SERIALIZER_NAME = "cvf-msgpack"
+CONTENT_TYPE = "application/x-cvf-msgpack"
+
+# 본문 앞 1바이트로 압축 방식을 표시해 임계값·압축기 설정이 바뀌어도 기존 메시지를 해석할 수 있게 함
+_RAW, _ZLIB, _ZSTD = b"\x00", b"\x01", b"\x02"
+
+
+def _default(obj: Any) -> Any:
+    # kombu json과 같은 방식으로 msgpack이 모르는 타입을 문자열로 변환
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """msgpack으로 직렬화하고, SERIALIZER_COMPRESS_MIN_BYTES 이상이면 zstd(없으면 zlib)로 압축합니다."""
+    packed = msgpack.packb(obj, use_bin_type=True, default=_default)
+    if len(packed) < settings.SERIALIZER_COMPRESS_MIN_BYTES:
+        return _RAW + packed
+    if zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor(level=settings.SERIALIZER_ZSTD_LEVEL).compress(packed)
+    return _ZLIB + zlib.compress(packed, 6)
+
+
+def loads(data: Any) -> Any:
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    header, body = bytes(data[:1]), data[1:]
+    if header == _ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd-compressed payload received but the 'zstandard' package is not installed.")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif header == _ZLIB:
+        body = zlib.decompress(body)
+    elif header != _RAW:
+        raise ValueError(f"Unknown {SERIALIZER_NAME} payload header: {header!r}")
+    return msgpack.unpackb(body, raw=False)
+
+
+def register_serializer() -> None:
+    """kombu에 직렬화기를 등록합니다 (accept_content에 SERIALIZER_NAME이 있어야 수신 가능)."""
+    register(SERIALIZER_NAME, dumps, loads, content_type=CONTENT_TYPE, content_encoding="binary")
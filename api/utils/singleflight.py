@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from api.core.config import settings
+from api.utils.file_utils import normalize_job_url
+from api.utils.redis_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+SINGLEFLIGHT_KEY_PREFIX = "cvf:singleflight"
+COMPLETED_LEADER = "COMPLETED" # 이미 결과가 게시된 경우 claim_work가 돌려주는 리더 ID
+# 진행 중인 리더에 합류한 작업의 countdown 재시도 횟수 (워커 슬롯을 점유하지 않고 대기).
+# 리더 락 TTL의 두 배까지 재시도해, 재시도 지연이 누적되어도 락이 만료된 뒤 직접 실행으로 넘어갈 여유를 둠
+ATTACH_MAX_RETRIES = max(1, 2 * settings.SINGLEFLIGHT_LOCK_TTL_SECONDS // max(1, settings.SINGLEFLIGHT_POLL_INTERVAL_SECONDS))
+
+# 락 소유자만 해제하도록 하는 compare-and-delete 스크립트
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def url_work_key(url: str) -> str:
+    """정규화된 URL 기준의 single-flight 키를 반환합니다."""
+    return "url:" + hashlib.sha256(normalize_job_url(url).encode("utf-8")).hexdigest()[:32]
+
+
+def content_work_key(text: str, model: str) -> str:
+    """(3단계 필터링용) 추출 텍스트와 모델 기준의 single-flight 키를 반환합니다."""
+    digest = hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()[:32]
+    return f"content:{digest}"
+
+
+def _lock_key(work_key: str) -> str:
+    return f"{SINGLEFLIGHT_KEY_PREFIX}:{work_key}:lock"
+
+
+def _result_key(work_key: str) -> str:
+    return f"{SINGLEFLIGHT_KEY_PREFIX}:{work_key}:result"
+
+
+def claim_work(work_key: str, owner_id: str) -> Tuple[bool, Optional[str]]:
+    """작업 리더 자리를 차지합니다. (리더 여부, 기존 리더 ID 또는 COMPLETED) 를 반환합니다.
+
+    Redis를 사용할 수 없으면 중복 제거 없이 리더로 진행합니다."""
+    try:
+        client = get_redis_client()
+        for _ in range(3):
+            if client.exists(_result_key(work_key)):
+                return False, COMPLETED_LEADER
+            if client.set(_lock_key(work_key), owner_id, nx=True, ex=settings.SINGLEFLIGHT_LOCK_TTL_SECONDS):
+                return True, None
+            leader_id = client.get(_lock_key(work_key))
+            if leader_id is not None:
+                return False, leader_id
+            # 확인 사이에 리더가 끝났거나 락이 만료된 경우 다시 시도
+        return True, None
+    except Exception as e:
+        logger.warning(f"[SingleFlight / {work_key}] Could not claim work, proceeding without deduplication: {e}")
+        return True, None
+
+
+def publish_result(work_key: str, owner_id: str, result: Dict[str, Any], ttl_seconds: Optional[int] = None) -> None:
+    """리더가 공유 결과를 게시하고 락을 해제합니다. ttl_seconds를 생략하면 SINGLEFLIGHT_RESULT_TTL_SECONDS 동안 보관합니다."""
+    try:
+        client = get_redis_client()
+        client.set(_result_key(work_key), json.dumps(result, ensure_ascii=False),
+                   ex=ttl_seconds or settings.SINGLEFLIGHT_RESULT_TTL_SECONDS)
+        client.eval(_RELEASE_LUA, 1, _lock_key(work_key), owner_id)
+        logger.info(f"[SingleFlight / {work_key}] Shared result published by {owner_id}.")
+    except Exception as e:
+        logger.warning(f"[SingleFlight / {work_key}] Failed to publish shared result: {e}")
+
+
+def release_work(work_key: str, owner_id: str) -> None:
+    """리더가 결과 없이 끝났을 때 (실패 등) 락만 해제해 대기 중인 요청이 스스로 처리하도록 합니다."""
+    try:
+        released = get_redis_client().eval(_RELEASE_LUA, 1, _lock_key(work_key), owner_id)
+        if released:
+            logger.info(f"[SingleFlight / {work_key}] Lock released by {owner_id} without result.")
+    except Exception as e:
+        logger.warning(f"[SingleFlight / {work_key}] Failed to release lock: {e}")
+
+
+def get_result(work_key: str) -> Optional[Dict[str, Any]]:
+    """게시된 공유 결과를 반환합니다. 없으면 None."""
+    try:
+        raw = get_redis_client().get(_result_key(work_key))
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"[SingleFlight / {work_key}] Failed to read shared result: {e}")
+        return None
+
+
+def is_in_flight(work_key: str) -> bool:
+    """리더가 아직 작업 중인지 (락이 살아 있는지) 확인합니다."""
+    try:
+        return bool(get_redis_client().exists(_lock_key(work_key)))
+    except Exception as e:
+        logger.warning(f"[SingleFlight / {work_key}] Failed to check lock: {e}")
+        return False
+
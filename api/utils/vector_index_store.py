@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILENAME = "vectors.npy"
+DOCS_FILENAME = "docs.json"
+EVICTION_TARGET_RATIO = 0.9 # 상한 초과 시 이 비율까지 줄여 매 저장마다 정리가 반복되지 않도록 함
+
+
+def vector_index_key(content: str, chunking_strategy: str, embedding_model: str) -> str:
+    """(임베딩 모델, 청킹 전략, 공고 콘텐츠) 해시 기반 인덱스 키."""
+    return hashlib.sha256(f"{embedding_model}\n{chunking_strategy}\n{content}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StoredVectorIndex:
+    """저장된 공고 인덱스: 청크 문서와 (n, dim) float32 벡터 (읽기 전용 memory-map)."""
+    key: str
+    docs: List[Document]
+    vectors: np.ndarray
+
+
+class VectorIndexStore:
+    """공고별 청크/임베딩을 `<root>/<key>/{vectors.npy, docs.json}` 로 저장하는 로컬 인덱스 저장소입니다.
+
+    벡터는 np.load(mmap_mode="r")로 읽어 밀리초 단위로 로드되며, 디렉토리 mtime을 최근 사용 시각으로 삼아
+    총 디스크 사용량이 상한을 넘으면 오래 사용되지 않은 인덱스부터 삭제합니다."""
+
+    def __init__(self, root_dir: str, max_bytes: int):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+
+    def _index_dir(self, key: str) -> str:
+        return os.path.join(self.root_dir, key)
+
+    def load(self, key: str) -> Optional[StoredVectorIndex]:
+        index_dir = self._index_dir(key)
+        if not os.path.isdir(index_dir):
+            return None
+        try:
+            vectors = np.load(os.path.join(index_dir, VECTORS_FILENAME), mmap_mode="r")
+            with open(os.path.join(index_dir, DOCS_FILENAME), "r", encoding="utf-8") as f:
+                raw_docs = json.load(f)
+            if len(raw_docs) != vectors.shape[0]:
+                raise ValueError(f"docs/vectors length mismatch ({len(raw_docs)} != {vectors.shape[0]})")
+            os.utime(index_dir, None)
+        except Exception as e:
+            logger.warning(f"[VectorIndexStore] Discarding unreadable index {key}: {e}")
+            shutil.rmtree(index_dir, ignore_errors=True)
+            return None
+        docs = [Document(page_content=d["page_content"], metadata=d.get("metadata") or {}) for d in raw_docs]
+        return StoredVectorIndex(key=key, docs=docs, vectors=vectors)
+
+    def save(self, key: str, docs: List[Document], vectors: np.ndarray) -> None:
+        """임시 디렉토리에 쓴 뒤 rename하여, 동시에 읽는 워커가 불완전한 인덱스를 보지 않도록 합니다."""
+        index_dir = self._index_dir(key)
+        if os.path.isdir(index_dir):
+            return
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f".{key[:16]}-", dir=self.root_dir)
+        try:
+            np.save(os.path.join(tmp_dir, VECTORS_FILENAME), np.ascontiguousarray(vectors, dtype=np.float32))
+            with open(os.path.join(tmp_dir, DOCS_FILENAME), "w", encoding="utf-8") as f:
+                json.dump([{"page_content": d.page_content, "metadata": d.metadata} for d in docs], f, ensure_ascii=False)
+            os.rename(tmp_dir, index_dir)
+        except OSError:
+            # 다른 워커가 같은 인덱스를 먼저 저장한 경우
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(index_dir):
+                raise
+            return
+        self._evict_if_needed()
+
+    def _evict_if_needed(self) -> None:
+        entries = []
+        total_bytes = 0
+        for name in os.listdir(self.root_dir):
+            index_dir = os.path.join(self.root_dir, name)
+            if name.startswith(".") or not os.path.isdir(index_dir):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(index_dir))
+                entries.append((os.stat(index_dir).st_mtime, size, index_dir))
+            except FileNotFoundError:
+                continue
+            total_bytes += size
+        if total_bytes <= self.max_bytes:
+            return
+
+        target_bytes = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        evicted = 0
+        for _, size, index_dir in sorted(entries):
+            if total_bytes <= target_bytes:
+                break
+            shutil.rmtree(index_dir, ignore_errors=True)
+            total_bytes -= size
+            evicted += 1
+        logger.info(f"[VectorIndexStore] Evicted {evicted} least recently used indexes (now {total_bytes} bytes, max {self.max_bytes}).")
+
+
+_default_store: Optional[VectorIndexStore] = None
+
+
+def get_default_vector_index_store() -> VectorIndexStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = VectorIndexStore(settings.VECTOR_INDEX_CACHE_DIR, settings.VECTOR_INDEX_CACHE_MAX_BYTES)
+    return _default_store
@@ -45,6 +45,47 @@ document.addEventListener('DOMContentLoaded', function() {
     return;
   }
 
+  // 유효한 공고 URL이 입력되면 사용자가 자기소개서 내용을 쓰는 동안 공고 분석(1~3단계)을 미리 시작
+  let lastPrefetchedUrl = null;
+
+  function isValidJobUrl(value) {
+    try {
+      const parsed = new URL(value);
+      // 점으로 구분된 호스트와 공고 경로(또는 쿼리)가 있는 완성된 주소만 선행 처리
+      const hasHost = /^[^.]+(\.[^.]+)+$/.test(parsed.hostname) && /^[a-z]{2,}$/i.test(parsed.hostname.split('.').pop());
+      const hasPage = parsed.pathname.length > 1 || parsed.search.length > 1;
+      return (parsed.protocol === "http:" || parsed.protocol === "https:") && hasHost && hasPage;
+    } catch (e) {
+      return false;
+    }
+  }
+
+  function prefetchJobPosting() {
+    const jobUrl = job_url_textarea.value.trim();
+    if (!isValidJobUrl(jobUrl) || jobUrl === lastPrefetchedUrl) {
+      return;
+    }
+    lastPrefetchedUrl = jobUrl;
+    fetch(API_PREFIX + "/prefetch", {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ job_url: jobUrl }),
+    })
+    .catch(error => {
+      // 선행 처리는 실패해도 제출 시 처음부터 처리하므로 무시
+      console.warn('Prefetch request failed:', error);
+    });
+  }
+
+  // 입력 도중 멈춘 미완성 URL로 1~3단계(브라우저, 필터링 LLM)를 실행하지 않도록 붙여넣기와 입력 완료(blur) 시에만 선행 처리
+  job_url_textarea.addEventListener('paste', function() {
+    // paste 이벤트 시점에는 아직 값이 바뀌지 않았으므로 다음 틱에 읽음
+    setTimeout(prefetchJobPosting, 0);
+  });
+  job_url_textarea.addEventListener('blur', prefetchJobPosting);
+
   showLoadingState(false); // 페이지 로드 시 스피너 숨김 및 버튼 텍스트 표시
   statusMessageElement.textContent = ""; // 초기 상태 메시지 없음
 
@@ -197,6 +238,10 @@ document.addEventListener('DOMContentLoaded', function() {
           } else {
             statusText = data.status || "상태를 받아오는 중..."; // 모든 매핑에 실패하면 원래 상태값 또는 기본 메시지
           }
+          if (typeof data.eta_seconds === 'number') { // 서버가 추정한 대기 순번과 남은 시간
+            const etaMinutes = Math.max(1, Math.round(data.eta_seconds / 60));
+            statusText += ` (앞선 작업 ${data.queue_position}건, 약 ${etaMinutes}분 남음)`;
+          }
         }
         
         // console.log(`[DEBUG] 최종 statusText 결정: ${statusText}, 현재 상태: ${data.status}, 현재 단계: ${data.current_step || 'N/A'}`);
@@ -288,6 +333,10 @@ document.addEventListener('DOMContentLoaded', function() {
     })
     .then(response => {
       console.log("Received response from /api/create-cover-letter/");
+      if (response.status === 429) { // 처리 한도 초과: Retry-After(초) 이후 다시 시도하도록 안내
+        const retryAfter = parseInt(response.headers.get('Retry-After') || '60', 10);
+        throw new Error(`요청이 많아 지금은 처리할 수 없습니다. 약 ${Math.max(1, Math.round(retryAfter / 60))}분 후 다시 시도해주세요.`);
+      }
       if (!response.ok) {
         return response.json().then(errData => {
           console.error("Error response from server:", errData);